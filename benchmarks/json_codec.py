@@ -0,0 +1,98 @@
+"""Compare the time and peak memory of decoding large cardano-wallet responses
+the old way (str body, json.loads, eager debug log) against the codec layer
+(raw bytes, fastest installed JSON backend, lazy debug log).
+
+    python benchmarks/json_codec.py --entries 50000
+"""
+import argparse
+import json
+import logging
+import time
+import tracemalloc
+
+import requests
+
+from cardano_tools.utils import LogText, json_codec
+
+logger = logging.getLogger("benchmark")
+
+
+def make_response(payload: dict) -> requests.Response:
+    r = requests.Response()
+    r.status_code = 200
+    r.encoding = "utf-8"
+    r._content = json.dumps(payload).encode()
+    return r
+
+
+def utxo_snapshot(n: int) -> dict:
+    return {
+        "entries": [
+            {
+                "ada": {"quantity": 1_000_000 + i, "unit": "lovelace"},
+                "ada_minimum": {"quantity": 999_978, "unit": "lovelace"},
+                "assets": [{"policy_id": f"{i:056x}", "asset_name": "4e4654", "quantity": 1}]
+                if i % 3 == 0
+                else [],
+            }
+            for i in range(n)
+        ]
+    }
+
+
+def transactions(n: int) -> list:
+    return [
+        {
+            "id": f"{i:064x}",
+            "amount": {"quantity": 1_000_000 + i, "unit": "lovelace"},
+            "fee": {"quantity": 170_000, "unit": "lovelace"},
+            "inserted_at": {"absolute_slot_number": i, "epoch_number": i // 432000},
+            "direction": "incoming",
+            "status": "in_ledger",
+            "inputs": [{"id": f"{i:064x}", "index": 0}],
+            "outputs": [{"address": "addr1" + "q" * 98, "amount": {"quantity": i}}],
+        }
+        for i in range(n)
+    ]
+
+
+def decode_old(r: requests.Response):
+    payload = json.loads(r.text)
+    logger.debug(r.text)
+    return payload
+
+
+def decode_new(r: requests.Response):
+    logger.debug("%s", LogText(r.content))
+    return json_codec.loads(r.content)
+
+
+def measure(func, r: requests.Response) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(r)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=50_000)
+    args = parser.parse_args()
+
+    print(f"JSON backend: {json_codec.backend}")
+    for name, payload in (
+        ("get_utxo_snapshot", utxo_snapshot(args.entries)),
+        ("get_transactions", transactions(args.entries)),
+    ):
+        r = make_response(payload)
+        print(f"{name}: {len(r.content) / 1e6:.1f} MB body")
+        for label, func in (("old", decode_old), ("codec", decode_new)):
+            elapsed, peak = measure(func, r)
+            print(f"  {label:>5}: {elapsed * 1e3:8.1f} ms, peak {peak / 1e6:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
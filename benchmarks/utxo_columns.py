@@ -0,0 +1,59 @@
+"""Compare the time and peak memory of analysing a large UTxO snapshot by decoding
+it into dicts against streaming it into UtxoColumns.
+
+    python benchmarks/utxo_columns.py --entries 200000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from cardano_tools.utils import UtxoColumns, json_codec
+
+
+def snapshot_body(n: int) -> bytes:
+    return json.dumps(
+        {
+            "entries": [
+                {
+                    "ada": {"quantity": 1_000_000 + i, "unit": "lovelace"},
+                    "ada_minimum": {"quantity": 999_978, "unit": "lovelace"},
+                    "assets": [{"policy_id": f"{i:056x}", "asset_name": "4e4654", "quantity": 1}]
+                    if i % 3 == 0
+                    else [],
+                }
+                for i in range(n)
+            ]
+        }
+    ).encode()
+
+
+def analyse_dicts(body: bytes) -> int:
+    entries = json_codec.loads(body)["entries"]
+    return sum(1 for e in entries if e["ada"]["quantity"] <= 1_000_000)
+
+
+def analyse_columns(body: bytes) -> int:
+    chunks = (body[i : i + 2**16] for i in range(0, len(body), 2**16))
+    return UtxoColumns.from_chunks(chunks).dust_count()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=200_000)
+    args = parser.parse_args()
+
+    body = snapshot_body(args.entries)
+    print(f"{args.entries} entries, {len(body) / 1e6:.1f} MB body")
+    for label, func in (("dicts", analyse_dicts), ("columns", analyse_columns)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func(body)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {label:>7}: {elapsed * 1e3:8.1f} ms, peak {peak / 1e6:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
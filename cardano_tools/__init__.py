@@ -1,8 +1,48 @@
-from .node_tools import CardanoNode
+from .address_index import AddressIndex
+from .node_tools import CardanoNode, NodeLogStream, NodeSupervisor
+from .node_fleet import NodeFleet
+from .node_metrics import NodeMetrics
+from .node_resources import ProcessSampler
+from .node_sync import NodeSyncTracker
+from .wallet_balancer import BalancedWalletHTTP
 from .cli_tools import NodeCLI
+from .fee_planner import FeePlanner
+from .kes import KESClock, KESPlanner
+from .leadership import LeadershipSchedule
+from .rate_limit import RequestLimiter
 from .wallet_tools import WalletCLI, WalletHTTP
+from .wallet_cache import StakePoolCache, WalletResponseCache
+from .wallet_fleet import WalletFleet
+from .wallet_migration import WalletMigration
+from .wallet_pipeline import TransactionPipeline
+from .wallet_sync import WalletSyncWaiter
 from . import utils
 
 __version__ = "2.0.0"
 
-__all__ = ["CardanoNode", "NodeCLI", "WalletCLI", "WalletHTTP", "utils"]
+__all__ = [
+    "AddressIndex",
+    "BalancedWalletHTTP",
+    "CardanoNode",
+    "FeePlanner",
+    "KESClock",
+    "KESPlanner",
+    "LeadershipSchedule",
+    "NodeCLI",
+    "NodeFleet",
+    "NodeLogStream",
+    "NodeMetrics",
+    "NodeSupervisor",
+    "NodeSyncTracker",
+    "ProcessSampler",
+    "RequestLimiter",
+    "StakePoolCache",
+    "TransactionPipeline",
+    "WalletCLI",
+    "WalletHTTP",
+    "WalletFleet",
+    "WalletMigration",
+    "WalletResponseCache",
+    "WalletSyncWaiter",
+    "utils",
+]
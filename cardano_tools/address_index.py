@@ -0,0 +1,208 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Cardano-Tools components
+from .wallet_tools import WalletHTTP
+
+
+def _fingerprint(wallet: dict) -> tuple:
+    """The parts of a wallet listing entry that change when the wallet may have new addresses.
+
+    Addresses are only added to a wallet's pool when one of its unused addresses receives funds.
+    That usually changes the balance, but not if the funds are spent again before the next
+    refresh, so the wallet's tip is included as well."""
+    return (
+        wallet.get("address_pool_gap"),
+        wallet.get("balance", {}).get("total", {}).get("quantity"),
+        wallet.get("tip", {}).get("absolute_slot_number"),
+    )
+
+
+def _index(entry: dict) -> tuple:
+    """The (role, address index) of an address entry, i.e. the last two derivation path
+    components (role 0 for external and 1 for change addresses), or None."""
+    path = entry.get("derivation_path") or []
+    try:
+        return path[-2], int(path[-1])
+    except (IndexError, TypeError, ValueError):
+        return None
+
+
+class AddressIndex:
+    """A reverse index from address to the ID of the wallet that owns it, across all wallets known
+    to a cardano-wallet server.
+
+    The index is built by fetching the address listings of all wallets concurrently. A wallet only
+    gains addresses when one of its unused addresses receives funds, so a refresh only looks at
+    wallets whose tip, balance or address pool gap changed since they were indexed, and fetches
+    just their unused addresses (a listing of address_pool_gap entries): new addresses start out
+    unused. If new addresses were used before the refresh (a gap in the address indices of a
+    role), the wallet's full listing is fetched instead. Listings bypass the client's response
+    cache. New wallets are fetched in full and deleted wallets are dropped.
+
+    Lookups are dict lookups. An address that is not found triggers a refresh, but refreshes caused
+    by lookup misses happen at most once every miss_refresh_interval seconds, independently of
+    explicit refresh() calls.
+
+    Usage:
+
+        index = AddressIndex(WalletHTTP()).build()
+        wallet_id = index.owner(deposit_address)
+    """
+
+    def __init__(
+        self, wallet: WalletHTTP, max_workers: int = 16, miss_refresh_interval: float = 10.0
+    ):
+        self.wallet = wallet
+        self.max_workers = max_workers
+        self.miss_refresh_interval = miss_refresh_interval
+        self.logger = logging.getLogger(__name__)
+        self._owners = {}
+        self._addresses = {}
+        self._fingerprints = {}
+        self._next_index = {}
+        self._miss_refreshed = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._owners)
+
+    def __contains__(self, address: str) -> bool:
+        return address in self._owners
+
+    def build(self) -> "AddressIndex":
+        """Index the addresses of all wallets."""
+        self.refresh()
+        return self
+
+    def refresh(self) -> dict:
+        """Bring the index up to date with the wallet server.
+
+        Returns
+        -------
+        dict
+            {"wallets": int, "fetched": int, "removed": int, "added": int, "errors": [wallet_id]}
+            i.e. the number of wallets known to the server, the number whose addresses were
+            fetched, the number of deleted wallets dropped from the index and the number of new
+            addresses indexed.
+        """
+        with self._refresh_lock:
+            wallets = self.wallet.get_all_wallets() or []
+            fingerprints = {w.get("id"): _fingerprint(w) for w in wallets}
+            with self._lock:
+                stale = [
+                    wid
+                    for wid, fingerprint in fingerprints.items()
+                    if self._fingerprints.get(wid) != fingerprint
+                ]
+                removed = [wid for wid in self._fingerprints if wid not in fingerprints]
+                for wallet_id in removed:
+                    self._drop(wallet_id)
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                listings = list(executor.map(self._fetch, stale))
+
+            added, errors = 0, []
+            with self._lock:
+                for wallet_id, entries in zip(stale, listings):
+                    if entries is None:
+                        # The wallet stays stale and is fetched again on the next refresh
+                        errors.append(wallet_id)
+                        continue
+                    known = self._addresses.setdefault(wallet_id, set())
+                    for entry in entries:
+                        address = entry.get("id")
+                        if address not in known:
+                            known.add(address)
+                            self._owners[address] = wallet_id
+                            added += 1
+                    indices = [_index(entry) for entry in entries]
+                    if None in indices:
+                        self._next_index[wallet_id] = None
+                    else:
+                        next_index = self._next_index.setdefault(wallet_id, {})
+                        for role, index in indices:
+                            next_index[role] = max(index + 1, next_index.get(role, 0))
+                    self._fingerprints[wallet_id] = fingerprints[wallet_id]
+
+        if errors:
+            self.logger.warning(f"Unable to fetch the addresses of {len(errors)} wallets")
+        self.logger.debug(
+            f"Address index refreshed: {len(stale)} wallets fetched, {added} addresses added, "
+            f"{len(removed)} wallets removed"
+        )
+        return {
+            "wallets": len(fingerprints),
+            "fetched": len(stale),
+            "removed": len(removed),
+            "added": added,
+            "errors": errors,
+        }
+
+    def _fetch(self, wallet_id: str) -> list:
+        """The address entries of a wallet that may be new to the index, or None on failure."""
+        with self._lock:
+            known = set(self._addresses.get(wallet_id, ()))
+            next_index = self._next_index.get(wallet_id)
+            next_index = dict(next_index) if next_index is not None else None
+        if known and next_index is not None:
+            unused = self.wallet.list_addresses(wallet_id, state="unused", cached=False)
+            if unused is None:
+                return None
+            new = {_index(entry) for entry in unused if entry.get("id") not in known}
+            tops = {}
+            for role, index in filter(None, map(_index, unused)):
+                tops[role] = max(index, tops.get(role, -1))
+            if None not in new and all(
+                (role, i) in new
+                for role, top in tops.items()
+                for i in range(next_index.get(role, 0), top + 1)
+            ):
+                return unused
+            self.logger.debug(f"New addresses of wallet {wallet_id} already used, listing all")
+        entries = self.wallet.list_addresses(wallet_id, cached=False)
+        # Every wallet has addresses, so an empty listing is a failed request
+        return entries or None
+
+    def _drop(self, wallet_id: str) -> None:
+        """Remove a wallet from the index. Must be called with the lock held."""
+        for address in self._addresses.pop(wallet_id, set()):
+            if self._owners.get(address) == wallet_id:
+                del self._owners[address]
+        self._fingerprints.pop(wallet_id, None)
+        self._next_index.pop(wallet_id, None)
+
+    def _refresh_on_miss(self) -> bool:
+        """Refresh after a lookup miss unless a miss already caused a refresh within the last
+        miss_refresh_interval seconds. Returns True if the index was refreshed."""
+        with self._lock:
+            now = time.monotonic()
+            last = self._miss_refreshed
+            if last is not None and now - last < self.miss_refresh_interval:
+                return False
+            self._miss_refreshed = now
+        self.refresh()
+        return True
+
+    def owner(self, address: str) -> str:
+        """Returns the ID of the wallet owning the address, or None if no wallet owns it."""
+        wallet_id = self._owners.get(address)
+        if wallet_id is None and self._refresh_on_miss():
+            wallet_id = self._owners.get(address)
+        return wallet_id
+
+    def owners(self, addresses: list) -> dict:
+        """Look up many addresses at once, refreshing the index at most once for the batch.
+
+        Returns
+        -------
+        dict
+            The owning wallet ID (or None) of each address.
+        """
+        result = {address: self._owners.get(address) for address in addresses}
+        if None in result.values() and self._refresh_on_miss():
+            result = {address: self._owners.get(address) for address in addresses}
+        return result
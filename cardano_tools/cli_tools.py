@@ -14,6 +14,8 @@ import requests
 
 # Cardano-Tools components
 from . import utils
+from .leadership import parse_leadership_schedule
+from .node_sync import NodeSyncTracker
 
 LATEST_SUPPORTED_NODE_VERSION = "1.32.1"
 
@@ -67,9 +69,9 @@ class NodeCLI:
         result = subprocess.run(shlex.split(cmd), capture_output=True)
         stdout = result.stdout.decode().strip()
         stderr = result.stderr.decode().strip()
-        self.logger.debug(f'CMD: "{cmd}"')
-        self.logger.debug(f'stdout: "{stdout}"')
-        self.logger.debug(f'stderr: "{stderr}"')
+        self.logger.debug('CMD: "%s"', cmd)
+        self.logger.debug('stdout: "%s"', utils.LogText(stdout))
+        self.logger.debug('stderr: "%s"', utils.LogText(stderr))
         ResultType = namedtuple("Result", "stdout, stderr")
         return ResultType(stdout, stderr)
 
@@ -140,6 +142,12 @@ class NodeCLI:
         vals = self.cli_tip_query()
         return float(vals["syncProgress"])
 
+    def wait_until_synced(self, threshold: float = 99.9, timeout: float = None, callback=None):
+        """Wait until the node reports at least threshold percent sync progress, polling the
+        tip on an adaptive schedule (see NodeSyncTracker). Returns False on timeout."""
+        tracker = NodeSyncTracker(self.cli_tip_query)
+        return tracker.wait_until_synced(threshold, timeout, callback)
+
     def get_epoch(self) -> int:
         """Query the node for the current epoch."""
         vals = self.cli_tip_query()
@@ -548,7 +556,9 @@ class NodeCLI:
 
         return (kes_vkey, kes_skey)
 
-    def create_block_producing_keys(self, genesis_file, pool_name="pool", folder=None):
+    def create_block_producing_keys(
+        self, genesis_file, pool_name="pool", folder=None, kes_period=None
+    ):
         """Create keys for a block-producing node.
         WARNING: You may want to use your local machine for this process
         (assuming you have cardano-node and cardano-cli on it). Make sure you
@@ -564,11 +574,14 @@ class NodeCLI:
         Parameters
         ----------
         genesis_file : str or Path
-            Path to the genesis file.
+            Path to the genesis file (not used if kes_period is given).
         pool_name : str
             Pool name for file/certificate naming.
         folder : str or Path, optional
             The directory where the generated files/certs will be placed.
+        kes_period : int, optional
+            The start KES period of the certificate (default: the KES period
+            of the current tip). See KESClock to compute it locally.
         """
 
         # Get a working directory to store the generated files and make sure
@@ -602,15 +615,16 @@ class NodeCLI:
         # Generate the KES Key pair
         kes_vkey, kes_skey = self.generate_kes_keys(pool_name, folder)
 
-        # Get the network genesis parameters
-        json_data = self._load_text_file(genesis_file)
-        genesis_parameters = json.loads(json_data)
+        if kes_period is None:
+            # Get the network genesis parameters
+            json_data = self._load_text_file(genesis_file)
+            genesis_parameters = json.loads(json_data)
+            slots_kes_period = genesis_parameters["slotsPerKESPeriod"]
+            tip = self.get_tip()
+            kes_period = tip // slots_kes_period  # Integer division
 
         # Generate the Operational Certificate/
         cert_file = folder / (pool_name + ".cert")
-        slots_kes_period = genesis_parameters["slotsPerKESPeriod"]
-        tip = self.get_tip()
-        kes_period = tip // slots_kes_period  # Integer division
         self.run_cli(
             f"{self.cli} node issue-op-cert "
             f"--kes-verification-key-file {kes_vkey} "
@@ -635,13 +649,14 @@ class NodeCLI:
         cold_counter,
         pool_name="pool",
         folder=None,
+        kes_period=None,
     ):
         """Update KES keys for an existing stake pool.
 
         Parameters
         ----------
         genesis_file : str or Path
-            Path to the genesis file.
+            Path to the genesis file (not used if kes_period is given).
         cold_skey : str or Path
             Path to the pool's cold signing key.
         cold_counter : str or Path
@@ -650,6 +665,9 @@ class NodeCLI:
             Pool name for file/certificate naming.
         folder : str or Path, optional
             The directory where the generated files/certs will be placed.
+        kes_period : int, optional
+            The start KES period of the new certificate (default: the KES
+            period of the current tip). See KESClock to compute it locally.
         """
 
         # Get a working directory to store the generated files and make sure
@@ -664,15 +682,16 @@ class NodeCLI:
         kes_vkey, kes_skey = self.generate_kes_keys(pool_name, folder)
 
         # Generate the new pool operation certificate
-        # Get the network genesis parameters
-        json_data = self._load_text_file(genesis_file)
-        genesis_parameters = json.loads(json_data)
+        if kes_period is None:
+            # Get the network genesis parameters
+            json_data = self._load_text_file(genesis_file)
+            genesis_parameters = json.loads(json_data)
+            slots_kes_period = genesis_parameters["slotsPerKESPeriod"]
+            tip = self.get_tip()
+            kes_period = tip // slots_kes_period  # Integer division
 
         # Generate the Operational Certificate
         cert_file = folder / (pool_name + ".cert")
-        slots_kes_period = genesis_parameters["slotsPerKESPeriod"]
-        tip = self.get_tip()
-        kes_period = tip // slots_kes_period  # Integer division
         result = self.run_cli(
             f"{self.cli} node issue-op-cert "
             f"--kes-verification-key-file {kes_vkey} "
@@ -1676,7 +1695,7 @@ class NodeCLI:
         return pool_id
 
     def get_leadership_schedule(
-        self, genesis_file, pool_vrf_key, pool_id, current_epoch, next_epoch
+        self, genesis_file, pool_vrf_key, pool_id, current_epoch=False, next_epoch=False
     ) -> str:
         """Return the stake pool slot leadership schedule for the current
         or next epoch (Note: This command takes a few minutes to complete)
@@ -1697,18 +1716,16 @@ class NodeCLI:
         Returns
         ----------
         str
-            The slot leadership schedule for the current and/or next epoch.
+            The slot leadership schedule for the current or next epoch. See
+            get_leader_slots for the parsed schedule.
 
         --genesis ../relay1/mainnet-shelley-genesis.json --vrf-signing-key-file FAITH_vrf.skey --stake-pool-id 383696c7f29a9a49c1da49ed35bebbd6097cea5b58a95da5c7df27ee --next
 
         """
         # Must specify current or next epoch flag (but can't specify both)
-        if current_epoch:
-            flag = "--current "
-        elif next_epoch:
-            flag = "--next "
-        if flag == "":
-            raise NodeCLIError(f"Must set current_epoch or next_epoch argument to True.")
+        if current_epoch == next_epoch:
+            raise NodeCLIError("Must set either current_epoch or next_epoch argument to True.")
+        flag = "--current" if current_epoch else "--next"
 
         result = self.run_cli(
             f"{self.cli} query leadership-schedule {self.network} "
@@ -1717,9 +1734,24 @@ class NodeCLI:
             f"--stake-pool-id {pool_id} "
             f"{flag} "
         )
+        # Even an empty schedule prints a table header
+        if not result.stdout and result.stderr:
+            raise NodeCLIError(result.stderr)
         schedule = result.stdout
         return schedule
 
+    def get_leader_slots(
+        self, genesis_file, pool_vrf_key, pool_id, current_epoch=False, next_epoch=False
+    ) -> list:
+        """The slot leadership schedule for the current or next epoch (see
+        get_leadership_schedule) as a list of LeaderSlot(slot, time). Use a
+        LeadershipSchedule to compute schedules in the background and cache them."""
+        return parse_leadership_schedule(
+            self.get_leadership_schedule(
+                genesis_file, pool_vrf_key, pool_id, current_epoch, next_epoch
+            )
+        )
+
     def claim_staking_rewards(
         self,
         stake_addr,
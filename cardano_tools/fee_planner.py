@@ -0,0 +1,143 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Cardano-Tools components
+from .utils import estimate_output_size
+from .wallet_tools import WalletHTTP
+
+
+class FeePlanner:
+    """Estimates the fees of many candidate payment sets for one wallet, to compare batching
+    options without a round trip per variant.
+
+    The fee of a transaction depends on its size, so payment sets with the same shape (the same
+    number of outputs, each with the same estimated serialized size, i.e. the same address type
+    and asset mix, and a total of the same order of magnitude, which determines roughly how many
+    inputs are selected) are estimated once and the result is reused. Distinct shapes are
+    estimated concurrently.
+
+    Usage:
+
+        planner = FeePlanner(WalletHTTP(), wallet_id)
+        table = planner.compare_batch_sizes(payments, [10, 50, 100])
+    """
+
+    def __init__(self, wallet: WalletHTTP, wallet_id: str, max_workers: int = 8):
+        self.wallet = wallet
+        self.wallet_id = wallet_id
+        self.max_workers = max_workers
+        self.logger = logging.getLogger(__name__)
+        self._estimates = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def shape(payments: list) -> tuple:
+        """The memoization key of a payment set."""
+        total = sum(int(p.get("amount", {}).get("quantity", 0)) for p in payments)
+        return len(str(total)), tuple(sorted(estimate_output_size(p) for p in payments))
+
+    def _fetch(self, payments: list) -> dict:
+        estimate = self.wallet.estimate_payment_fees(self.wallet_id, payments)
+        if not estimate:
+            return {}
+        return {
+            "fee_min": estimate.get("estimated_min", {}).get("quantity"),
+            "fee_max": estimate.get("estimated_max", {}).get("quantity"),
+            "deposit": estimate.get("deposit", {}).get("quantity", 0),
+        }
+
+    def estimate(self, candidates: list) -> list:
+        """Estimate the fee of each candidate payment set.
+
+        Parameters
+        ----------
+        candidates : list
+            Payment sets, each a list of payments in the send_batch_tx format.
+
+        Returns
+        -------
+        list
+            One row per candidate, in order:
+            {"outputs": int, "size": int, "fee_min": int, "fee_max": int, "deposit": int,
+             "fee_per_output": float, "cached": bool, "error": str or None}
+            where size is the estimated size of the outputs (bytes) and cached tells whether
+            the estimate was reused from an identical shape. Failed estimates have None fees.
+        """
+        shapes = [self.shape(payments) for payments in candidates]
+        with self._lock:
+            known = set(self._estimates)
+        missing = {}
+        for key, payments in zip(shapes, candidates):
+            if key not in known:
+                missing.setdefault(key, payments)
+        if missing:
+            self.logger.debug(
+                f"Estimating {len(missing)} distinct shapes for {len(candidates)} payment sets"
+            )
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                fetched = dict(zip(missing, executor.map(self._fetch, missing.values())))
+            with self._lock:
+                # Failures are not memoized so that they are retried by the next call
+                self._estimates.update({key: est for key, est in fetched.items() if est})
+        else:
+            fetched = {}
+
+        table = []
+        for key, payments in zip(shapes, candidates):
+            with self._lock:
+                estimate = self._estimates.get(key, {})
+            row = {
+                "outputs": len(payments),
+                "size": sum(key[1]),
+                "fee_min": estimate.get("fee_min"),
+                "fee_max": estimate.get("fee_max"),
+                "deposit": estimate.get("deposit"),
+                "fee_per_output": None,
+                # The first row of a shape fetched by this call is not cached, repeats are
+                "cached": key not in fetched,
+                "error": None if estimate else "Fee estimation failed",
+            }
+            if estimate and payments:
+                row["fee_per_output"] = estimate["fee_max"] / len(payments)
+            table.append(row)
+            fetched.pop(key, None)
+        return table
+
+    def compare_batch_sizes(self, payments: list, batch_sizes: list) -> list:
+        """Compare the total fees of sending the payments in batches of each of the given sizes.
+
+        Returns
+        -------
+        list
+            One row per batch size: {"batch_size": int, "transactions": int, "fee_min": int,
+            "fee_max": int, "fee_per_output": float, "errors": int}. The fee totals only cover
+            the batches that could be estimated.
+        """
+        plans = {
+            size: [payments[i : i + size] for i in range(0, len(payments), size)]
+            for size in batch_sizes
+        }
+        # Estimate every batch of every plan in one go so that the shapes are shared
+        rows = iter(self.estimate([batch for batches in plans.values() for batch in batches]))
+        comparison = []
+        for size, batches in plans.items():
+            estimates = [next(rows) for _ in batches]
+            ok = [e for e in estimates if not e["error"]]
+            fee_max = sum(e["fee_max"] for e in ok)
+            comparison.append(
+                {
+                    "batch_size": size,
+                    "transactions": len(batches),
+                    "fee_min": sum(e["fee_min"] for e in ok),
+                    "fee_max": fee_max,
+                    "fee_per_output": fee_max / len(payments) if payments else None,
+                    "errors": len(estimates) - len(ok),
+                }
+            )
+        return comparison
+
+    def clear(self) -> None:
+        """Forget all memoized estimates (e.g. after a protocol parameter update)."""
+        with self._lock:
+            self._estimates.clear()
@@ -0,0 +1,260 @@
+import json
+import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Cardano-Tools components
+from .leadership import MAINNET_SHELLEY_START, PREPROD_SHELLEY_START
+
+MAINNET_MAGIC = 764824073
+
+# The first Shelley slot and its start time of public networks that started in the Byron era
+SHELLEY_START = {MAINNET_MAGIC: MAINNET_SHELLEY_START, 1: PREPROD_SHELLEY_START}
+
+# Public networks that started in the Shelley era, at slot 0 (preview)
+_SHELLEY_FROM_GENESIS = (2,)
+
+# The fields of an operational certificate (node.cert)
+OpCert = namedtuple("OpCert", ["kes_vkey", "counter", "kes_period", "cold_vkey"])
+
+
+def _cbor_item(data: bytes, i: int):
+    """Decode the unsigned integer, byte string or array at data[i:]. Returns (item, next i)."""
+    major, info = data[i] >> 5, data[i] & 31
+    i += 1
+    if info < 24:
+        value = info
+    elif info <= 27:
+        size = 1 << (info - 24)
+        value = int.from_bytes(data[i : i + size], "big")
+        i += size
+    else:
+        raise ValueError("Unsupported CBOR item")
+    if major == 0:
+        return value, i
+    if major == 2:
+        return data[i : i + value], i + value
+    if major == 4:
+        items = []
+        for _ in range(value):
+            item, i = _cbor_item(data, i)
+            items.append(item)
+        return items, i
+    raise ValueError("Unsupported CBOR item")
+
+
+def read_op_cert(path) -> OpCert:
+    """Read an operational certificate file without cardano-cli."""
+    with open(path, "r") as f:
+        cbor = bytes.fromhex(json.load(f)["cborHex"])
+    try:
+        (kes_vkey, counter, kes_period, _), cold_vkey = _cbor_item(cbor, 0)[0]
+    except (ValueError, TypeError, IndexError):
+        raise ValueError(f"{path} is not an operational certificate")
+    return OpCert(kes_vkey, counter, kes_period, cold_vkey)
+
+
+class KESClock:
+    """Computes KES periods and operational certificate expiry locally from the genesis
+    parameters and the wall clock, instead of reading the genesis file and querying the tip for
+    every pool.
+
+    reference is a slot and its start time in the current era (default: the first Shelley slot
+    on mainnet). For networks that started in the Shelley era this is (0, systemStart); for
+    networks with Byron epochs (slots of 20 seconds) before the Shelley era, it is the first
+    Shelley slot and its start time.
+    """
+
+    def __init__(
+        self,
+        slots_per_kes_period: int = 129600,
+        max_kes_evolutions: int = 62,
+        slot_length: float = 1.0,
+        reference: tuple = MAINNET_SHELLEY_START,
+    ):
+        self.slots_per_kes_period = slots_per_kes_period
+        self.max_kes_evolutions = max_kes_evolutions
+        self.slot_length = slot_length
+        self.reference_slot, self.reference_time = reference
+
+    @classmethod
+    def from_genesis(cls, genesis_file, reference: tuple = None) -> "KESClock":
+        """A clock from the parameters of a Shelley genesis file.
+
+        The reference slot is known for mainnet, preprod and preview. For other networks it must
+        be given, since the genesis file does not tell how many Byron slots preceded the Shelley
+        era; raises ValueError otherwise.
+        """
+        with open(genesis_file, "r") as f:
+            genesis = json.load(f)
+        if reference is None:
+            magic = genesis.get("networkMagic")
+            if magic in SHELLEY_START:
+                reference = SHELLEY_START[magic]
+            elif magic in _SHELLEY_FROM_GENESIS:
+                start = genesis["systemStart"].replace("Z", "+00:00")
+                reference = (0, datetime.fromisoformat(start))
+            else:
+                raise ValueError(
+                    f"Unknown network {magic}: pass the first Shelley slot and its start time "
+                    "as the reference"
+                )
+        return cls(
+            genesis["slotsPerKESPeriod"],
+            genesis["maxKESEvolutions"],
+            genesis.get("slotLength", 1.0),
+            reference,
+        )
+
+    def slot_at(self, when: datetime = None) -> int:
+        """The slot at a time (default: now)."""
+        when = when or datetime.now(timezone.utc)
+        elapsed = (when - self.reference_time).total_seconds()
+        return self.reference_slot + int(elapsed // self.slot_length)
+
+    def time_of(self, slot: int) -> datetime:
+        """The start time of a slot."""
+        return self.reference_time + timedelta(
+            seconds=(slot - self.reference_slot) * self.slot_length
+        )
+
+    def period(self, slot: int = None) -> int:
+        """The KES period of a slot (default: the current slot)."""
+        slot = self.slot_at() if slot is None else slot
+        return slot // self.slots_per_kes_period
+
+    def expiry_slot(self, kes_period: int) -> int:
+        """The first slot in which a certificate starting at kes_period is no longer valid."""
+        return (kes_period + self.max_kes_evolutions) * self.slots_per_kes_period
+
+    def expiry_time(self, kes_period: int) -> datetime:
+        return self.time_of(self.expiry_slot(kes_period))
+
+
+class KESPlanner:
+    """Tracks the operational certificates of several stake pools and rotates the KES keys of
+    the pools whose certificates are about to expire, in one run.
+
+    pools maps each pool name to a dict with the paths of its "cert" (operational certificate),
+    "cold_skey" and "cold_counter" and, optionally, the "folder" for the new KES keys and
+    certificate (default: the directory of the certificate).
+
+    Usage:
+
+        planner = KESPlanner(KESClock.from_genesis("shelley-genesis.json"), pools)
+        for name, cert in planner.report().items():
+            print(name, cert["expiry_time"], cert["days_left"])
+        results, errors = planner.rotate(cli, within=timedelta(days=14))
+    """
+
+    def __init__(self, clock: KESClock, pools: dict, max_workers: int = 4):
+        self.clock = clock
+        self.pools = pools
+        self.max_workers = max_workers
+        self.logger = logging.getLogger(__name__)
+
+    def _status(self, name: str, when: datetime) -> dict:
+        cert = read_op_cert(self.pools[name]["cert"])
+        current = self.clock.period(self.clock.slot_at(when))
+        expiry = self.clock.expiry_time(cert.kes_period)
+        return {
+            "counter": cert.counter,
+            "kes_period": cert.kes_period,
+            "current_period": current,
+            "periods_left": cert.kes_period + self.clock.max_kes_evolutions - current,
+            "expiry_slot": self.clock.expiry_slot(cert.kes_period),
+            "expiry_time": expiry,
+            "days_left": (expiry - when).total_seconds() / 86400,
+        }
+
+    def report(self, when: datetime = None) -> dict:
+        """The state of every pool's operational certificate at a time (default: now).
+
+        Returns
+        -------
+        dict
+            {
+                pool name: {
+                    "counter": int,  # certificate issue counter
+                    "kes_period": int,  # start KES period of the certificate
+                    "current_period": int,
+                    "periods_left": int,  # 0 or less when expired
+                    "expiry_slot": int,
+                    "expiry_time": datetime,
+                    "days_left": float,
+                }
+                # or {"error": str} if the certificate cannot be read
+            }
+        """
+        when = when or datetime.now(timezone.utc)
+        report = {}
+        for name in self.pools:
+            try:
+                report[name] = self._status(name, when)
+            except (OSError, ValueError, KeyError) as e:
+                report[name] = {"error": f"{type(e).__name__}: {e}"}
+        return report
+
+    @staticmethod
+    def _expiring(report: dict, within: timedelta, when: datetime) -> list:
+        return [
+            name
+            for name, status in report.items()
+            if "error" not in status and status["expiry_time"] - when <= within
+        ]
+
+    def due(self, within: timedelta = timedelta(days=14), when: datetime = None) -> list:
+        """The pools whose certificates expire within the given time. Pools whose certificate
+        cannot be read are not included, see report()."""
+        when = when or datetime.now(timezone.utc)
+        return self._expiring(self.report(when), within, when)
+
+    def rotate(self, cli, within: timedelta = timedelta(days=14), names: list = None) -> tuple:
+        """Generate new KES keys and operational certificates, starting at the current KES
+        period, for the pools that are due (or the given pools), concurrently. Pools whose
+        certificate cannot be read are not rotated but reported as errors.
+
+        The node of each pool must be restarted with the new KES key and certificate.
+
+        Returns
+        -------
+        (dict, dict)
+            The new certificate status (see report) and the error messages, each keyed by
+            pool name.
+        """
+        results, errors = {}, {}
+        if names is None:
+            when = datetime.now(timezone.utc)
+            report = self.report(when)
+            errors = {name: status["error"] for name, status in report.items() if "error" in status}
+            for name, error in errors.items():
+                self.logger.warning(f"Unable to read the certificate of {name}: {error}")
+            names = self._expiring(report, within, when)
+        kes_period = self.clock.period()
+
+        def rotate_pool(name):
+            pool = self.pools[name]
+            folder = Path(pool.get("folder") or Path(pool["cert"]).parent)
+            cli.update_kes_keys(
+                None,
+                pool["cold_skey"],
+                pool["cold_counter"],
+                pool_name=name,
+                folder=folder,
+                kes_period=kes_period,
+            )
+            self.pools[name] = dict(pool, cert=folder / f"{name}.cert")
+            return self._status(name, datetime.now(timezone.utc))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {name: executor.submit(rotate_pool, name) for name in names}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+                self.logger.info(f"Rotated the KES key of {name} at KES period {kes_period}")
+            except Exception as e:
+                self.logger.warning(f"KES key rotation failed for {name}: {e}")
+                errors[name] = f"{type(e).__name__}: {e}"
+        return results, errors
@@ -0,0 +1,304 @@
+import decimal
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from fractions import Fraction
+from pathlib import Path
+
+# Cardano-Tools components
+from .utils import vrf
+
+# A slot the pool is elected to forge a block in, with its start time (UTC)
+LeaderSlot = namedtuple("LeaderSlot", ["slot", "time"])
+
+# A row of the text output: "     4073     2021-12-29 17:26:54.998001755 UTC"
+_ROW = re.compile(r"^\s*(\d+)\s+(\d{4}-\d\d-\d\d[ T]\d\d:\d\d:\d\d)(\.\d+)?\s*(?:UTC|Z)?\s*$")
+
+
+def _parse_time(text: str) -> datetime:
+    """Parse a slot time, truncating the nanoseconds printed by cardano-cli to microseconds."""
+    match = re.match(r"(\d{4}-\d\d-\d\d)[ T](\d\d:\d\d:\d\d)(\.\d+)?", text)
+    date, time, fraction = match.groups()
+    micro = int((fraction or ".0")[1:7].ljust(6, "0"))
+    return datetime.fromisoformat(f"{date}T{time}").replace(microsecond=micro, tzinfo=timezone.utc)
+
+
+def parse_leadership_schedule(output: str) -> list:
+    """Parse the output of `cardano-cli query leadership-schedule` (the text table or the JSON
+    output) into a list of LeaderSlot, ordered by slot."""
+    output = output.strip()
+    if output.startswith("["):
+        rows = [(int(r["slotNumber"]), _parse_time(r["slotTime"])) for r in json.loads(output)]
+    else:
+        rows = []
+        for line in output.splitlines():
+            match = _ROW.match(line)
+            if match:
+                rows.append((int(match.group(1)), _parse_time(line[match.start(2) :])))
+    return sorted(LeaderSlot(slot, time) for slot, time in rows)
+
+
+# The first Shelley slot on mainnet (epoch 208) and its start time, see slot_clock
+MAINNET_SHELLEY_START = (4492800, datetime(2020, 7, 29, 21, 44, 51, tzinfo=timezone.utc))
+
+# The first Shelley slot on the preprod testnet (epoch 4, after four Byron epochs of 21600 slots
+# of 20 seconds) and its start time
+PREPROD_SHELLEY_START = (86400, datetime(2022, 6, 21, tzinfo=timezone.utc))
+
+# TPraos (Shelley to Alonzo) mixes this constant into the VRF input of the leader check
+_TPRAOS_SEED_L = hashlib.blake2b((1).to_bytes(8, "big"), digest_size=32).digest()
+
+
+def read_vrf_skey(path) -> bytes:
+    """The 64-byte secret key (seed || public key) of a pool VRF signing key file."""
+    with open(path, "r") as f:
+        cbor = bytes.fromhex(json.load(f)["cborHex"])
+    # A CBOR byte string of 64 bytes
+    if cbor[:2] != b"\x58\x40" or len(cbor) != 66:
+        raise ValueError(f"{path} is not a VRF signing key")
+    secret_key = cbor[2:]
+    if vrf.public_key(secret_key) != secret_key[32:]:
+        raise ValueError(f"{path} is not a valid VRF signing key")
+    return secret_key
+
+
+def _fraction(value) -> Fraction:
+    """An exact fraction of a number, taking floats by their decimal representation (0.05 is
+    1/20, not the nearest binary fraction) like the rationals of the genesis file."""
+    return Fraction(str(value)) if isinstance(value, float) else Fraction(value)
+
+
+def leader_threshold(sigma, active_slot_coeff=0.05, bits: int = 256) -> int:
+    """The leader values (integers of `bits` bits) below which a pool with relative stake sigma
+    leads a slot: 2^bits * (1 - (1 - f)^sigma), with f the active slot coefficient."""
+    sigma, f = _fraction(sigma), _fraction(active_slot_coeff)
+    if f >= 1:
+        return 1 << bits
+    with decimal.localcontext() as ctx:
+        ctx.prec = 80
+        sigma = decimal.Decimal(sigma.numerator) / sigma.denominator
+        ln = (1 - decimal.Decimal(f.numerator) / f.denominator).ln()
+        p = 1 - (ln * sigma).exp()
+        return int((p * (1 << bits)).to_integral_value(decimal.ROUND_CEILING))
+
+
+def leader_vrf_input(slot: int, epoch_nonce: bytes, tpraos: bool = False) -> bytes:
+    """The VRF input of the leader check of a slot: blake2b-256(slot || epoch nonce), XORed
+    with the leader seed constant for TPraos (Shelley to Alonzo)."""
+    seed = hashlib.blake2b(slot.to_bytes(8, "big") + epoch_nonce, digest_size=32).digest()
+    if tpraos:
+        seed = bytes(a ^ b for a, b in zip(seed, _TPRAOS_SEED_L))
+    return seed
+
+
+def leader_value(beta: bytes, tpraos: bool = False) -> int:
+    """The leader value of a VRF output: blake2b-256("L" || beta) for Praos (Babbage onwards,
+    256 bits), the output itself for TPraos (512 bits)."""
+    if tpraos:
+        return int.from_bytes(beta, "big")
+    return int.from_bytes(hashlib.blake2b(b"L" + beta, digest_size=32).digest(), "big")
+
+
+def _leader_slots_in(args) -> list:
+    secret_key, epoch_nonce, first, last, threshold, tpraos = args
+    expanded = vrf.expand(secret_key)
+    return [
+        slot
+        for slot in range(first, last)
+        if leader_value(
+            vrf.output(secret_key, leader_vrf_input(slot, epoch_nonce, tpraos), expanded), tpraos
+        )
+        < threshold
+    ]
+
+
+def slot_clock(reference_slot: int, reference_time: datetime, slot_length: float = 1.0):
+    """A function returning the start time of a slot, from a slot in the same era with a known
+    start time (e.g. MAINNET_SHELLEY_START)."""
+    return lambda slot: reference_time + timedelta(seconds=(slot - reference_slot) * slot_length)
+
+
+def compute_leader_slots(
+    vrf_skey,
+    epoch_nonce,
+    sigma,
+    first_slot: int,
+    epoch_length: int = 432000,
+    active_slot_coeff=0.05,
+    tpraos: bool = False,
+    slot_time=None,
+    processes: int = None,
+    chunk_size: int = 2000,
+) -> list:
+    """Compute the slots of an epoch a stake pool leads, without a node: the Praos leader check
+    (VRF of the epoch nonce and slot compared against the threshold for the pool's relative
+    stake) is evaluated for every slot, spread over a pool of processes.
+
+    Parameters
+    ----------
+    vrf_skey : str, Path or bytes
+        The pool's VRF signing key file or the 64-byte secret key.
+    epoch_nonce : str or bytes
+        The epoch nonce (hex), e.g. from `cardano-cli query protocol-state`.
+    sigma : float, str or Fraction
+        The pool's active stake divided by the total active stake of the epoch.
+    first_slot : int
+        The first slot of the epoch.
+    epoch_length : int, optional
+        Slots per epoch (genesis epochLength).
+    active_slot_coeff : float, optional
+        The active slot coefficient f (genesis activeSlotsCoeff).
+    tpraos : bool, optional
+        Use the TPraos leader check of the Shelley to Alonzo eras.
+    slot_time : callable, optional
+        A function returning the start time of a slot, see slot_clock.
+    processes : int, optional
+        Number of worker processes (default: the number of CPUs).
+    chunk_size : int, optional
+        Slots per task.
+
+    Returns
+    -------
+    list
+        LeaderSlot(slot, time) records, ordered by slot (time is None without slot_time).
+    """
+    secret_key = vrf_skey if isinstance(vrf_skey, bytes) else read_vrf_skey(vrf_skey)
+    if isinstance(epoch_nonce, str):
+        epoch_nonce = bytes.fromhex(epoch_nonce)
+    threshold = leader_threshold(sigma, active_slot_coeff, 512 if tpraos else 256)
+    end = first_slot + epoch_length
+    tasks = [
+        (secret_key, epoch_nonce, start, min(start + chunk_size, end), threshold, tpraos)
+        for start in range(first_slot, end, chunk_size)
+    ]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        slots = [slot for chunk in executor.map(_leader_slots_in, tasks) for slot in chunk]
+    return [LeaderSlot(slot, slot_time(slot) if slot_time else None) for slot in slots]
+
+
+class LeadershipSchedule:
+    """Computes the leadership schedules of a stake pool in the background and caches them on
+    disk per pool and epoch.
+
+    `cardano-cli query leadership-schedule` takes minutes, so the schedules of the current and
+    next epoch are computed by a small thread pool and returned as futures. Requests for an epoch
+    that is already being computed share its future, and a schedule is never computed again
+    once it is on disk: the next epoch's schedule becomes the current epoch's schedule after
+    the epoch boundary.
+
+    Usage:
+
+        schedule = LeadershipSchedule(cli, genesis, "vrf.skey", pool_id, cache_dir="schedules")
+        schedule.prefetch()  # start computing the current and next epoch
+        ...
+        for slot in schedule.get("current"):
+            print(slot.slot, slot.time)
+    """
+
+    def __init__(
+        self,
+        cli,
+        genesis_file,
+        pool_vrf_key,
+        pool_id: str,
+        cache_dir,
+        max_workers: int = 2,
+    ):
+        """cli is a NodeCLI (get_epoch and get_leadership_schedule are used)."""
+        self.cli = cli
+        self.genesis_file = genesis_file
+        self.pool_vrf_key = pool_vrf_key
+        self.pool_id = pool_id
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.logger = logging.getLogger(__name__)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def _cache_file(self, epoch: int) -> Path:
+        return self.cache_dir / f"{self.pool_id}-{epoch}.json"
+
+    def cached(self, epoch: int):
+        """The schedule of an epoch from the disk cache, or None."""
+        try:
+            rows = json.loads(self._cache_file(epoch).read_text())
+        except (OSError, ValueError):
+            return None
+        return [LeaderSlot(row["slot"], _parse_time(row["time"])) for row in rows]
+
+    def _store(self, epoch: int, slots: list) -> None:
+        rows = [{"slot": s.slot, "time": s.time.isoformat()} for s in slots]
+        path = self._cache_file(epoch)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(rows))
+        os.replace(tmp, path)
+
+    def _compute(self, which: str, epoch: int) -> list:
+        self.logger.info(f"Computing the leadership schedule of pool {self.pool_id}, epoch {epoch}")
+        output = self.cli.get_leadership_schedule(
+            self.genesis_file,
+            self.pool_vrf_key,
+            self.pool_id,
+            current_epoch=which == "current",
+            next_epoch=which == "next",
+        )
+        slots = parse_leadership_schedule(output)
+        # The node moved to another epoch meanwhile, so it is unclear which epoch was computed
+        now = self.cli.get_epoch()
+        expected = epoch if which == "current" else epoch - 1
+        if now != expected:
+            self.logger.warning(
+                f"Epoch changed from {expected} to {now} while computing the schedule, "
+                "not caching it"
+            )
+        else:
+            self._store(epoch, slots)
+        return slots
+
+    def submit(self, which: str = "current") -> Future:
+        """Start computing the schedule of the "current" or "next" epoch, unless it is cached or
+        already being computed. Returns a future resolving to a list of LeaderSlot."""
+        if which not in ("current", "next"):
+            raise ValueError('which must be "current" or "next"')
+        current = self.cli.get_epoch()
+        epoch = current + (1 if which == "next" else 0)
+        with self._lock:
+            for old in [e for e in self._futures if e < current]:
+                del self._futures[old]
+            future = self._futures.get(epoch)
+            if future is not None and not (future.done() and future.exception()):
+                return future
+            slots = self.cached(epoch)
+            if slots is not None:
+                future = Future()
+                future.set_result(slots)
+            else:
+                future = self._executor.submit(self._compute, which, epoch)
+            self._futures[epoch] = future
+        return future
+
+    def prefetch(self) -> dict:
+        """Start computing the schedules of the current and next epoch concurrently.
+
+        Returns
+        -------
+        dict
+            {"current": Future, "next": Future}
+        """
+        return {which: self.submit(which) for which in ("current", "next")}
+
+    def get(self, which: str = "current", timeout: float = None) -> list:
+        """The schedule of the "current" or "next" epoch, waiting up to timeout seconds for it
+        to be computed (see submit)."""
+        return self.submit(which).result(timeout)
+
+    def close(self) -> None:
+        """Wait for running computations and shut the thread pool down."""
+        self._executor.shutdown()
@@ -0,0 +1,151 @@
+import errno
+import fcntl
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# ioctl request cloning a whole file (copy-on-write) on Btrfs, XFS and other filesystems
+_FICLONE = 0x40049409
+
+# Errors meaning that the filesystem (or the pair of filesystems) cannot reflink
+_NO_REFLINK = (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS)
+
+METHODS = ("auto", "reflink", "hardlink", "copy")
+
+
+class DatabaseCloneError(Exception):
+    pass
+
+
+def database_in_use(path) -> bool:
+    """True if a cardano-node holds the lock of the database directory."""
+    lock = Path(path) / "lock"
+    if not lock.exists():
+        return False
+    with open(lock, "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return True
+        fcntl.flock(f, fcntl.LOCK_UN)
+    return False
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+    shutil.copystat(src, dst)
+
+
+def _immutable_files(source: Path) -> set:
+    """The files of the immutable database that the node never writes to again: every chunk
+    (with its indices) except the newest one, which is still being appended to."""
+    immutable = source / "immutable"
+    if not immutable.is_dir():
+        return set()
+    files = [f for f in immutable.iterdir() if f.is_file() and f.stem.isdigit()]
+    newest = max((int(f.stem) for f in files), default=None)
+    return {f for f in files if int(f.stem) != newest}
+
+
+def clone_database(source, destination, method: str = "auto", max_workers: int = 8) -> dict:
+    """Clone the database directory of a stopped cardano-node, e.g. to start another node from
+    a synced state.
+
+    Parameters
+    ----------
+    source : str or Path
+        The database directory to clone. No node may be using it.
+    destination : str or Path
+        The new database directory. It must not exist or be empty.
+    method : str, optional
+        "reflink" clones every file copy-on-write (Btrfs, XFS, ...) so the clone takes no extra
+        space until either database changes. "hardlink" hard links the completed chunks of the
+        immutable database, which the node never modifies, and copies everything else. "copy"
+        copies everything. "auto" (default) uses reflinks where the filesystem supports them
+        and otherwise falls back to hardlink. If the source was not shut down cleanly, nothing
+        is hard linked: revalidating the database may truncate immutable chunks in place, which
+        would then corrupt both databases.
+    max_workers : int, optional
+        Number of files cloned concurrently.
+
+    Returns
+    -------
+    dict
+        The number of files reflinked, hard linked and copied and the bytes copied.
+
+    Raises DatabaseCloneError if the source is in use, the destination is not empty, or the
+    clone does not match the source.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown clone method {method}, expected one of {METHODS}")
+    source, destination = Path(source), Path(destination)
+    if not (source / "protocolMagicId").is_file():
+        raise DatabaseCloneError(f"{source} is not a cardano-node database")
+    if database_in_use(source):
+        raise DatabaseCloneError(f"{source} is in use by a running node")
+    if destination.exists() and any(destination.iterdir()):
+        raise DatabaseCloneError(f"{destination} is not empty")
+    clean = (source / "clean").exists()
+    if not clean:
+        logger.warning(
+            f"{source} was not shut down cleanly, the clone will be revalidated; "
+            "copying instead of hard linking"
+        )
+
+    files = [f for f in source.rglob("*") if f.is_file() and f.relative_to(source) != Path("lock")]
+    for directory in {f.parent for f in files} | {source}:
+        (destination / directory.relative_to(source)).mkdir(parents=True, exist_ok=True)
+    linkable = _immutable_files(source) if clean and method in ("auto", "hardlink") else set()
+    use_reflink = method in ("auto", "reflink")
+    counts = {"reflinked": 0, "linked": 0, "copied": 0, "bytes_copied": 0}
+
+    def clone(src: Path) -> str:
+        nonlocal use_reflink
+        dst = destination / src.relative_to(source)
+        if use_reflink:
+            try:
+                _reflink(src, dst)
+                return "reflinked"
+            except OSError as e:
+                if method == "reflink" or e.errno not in _NO_REFLINK:
+                    raise
+                logger.info(f"Reflinks not supported ({e.strerror}), falling back to links")
+                use_reflink = False
+                dst.unlink(missing_ok=True)
+        if src in linkable:
+            os.link(src, dst)
+            return "linked"
+        shutil.copy2(src, dst)
+        return "copied"
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for src, kind in zip(files, executor.map(clone, files)):
+            counts[kind] += 1
+            if kind == "copied":
+                counts["bytes_copied"] += src.stat().st_size
+
+    validate_clone(source, destination)
+    logger.info(f"Cloned {source} to {destination}: {counts}")
+    return counts
+
+
+def validate_clone(source, destination) -> None:
+    """Check that a clone has every file of the source database with the same size and the
+    same network (protocol magic). Raises DatabaseCloneError otherwise."""
+    source, destination = Path(source), Path(destination)
+    for src in source.rglob("*"):
+        if not src.is_file() or src.relative_to(source) == Path("lock"):
+            continue
+        dst = destination / src.relative_to(source)
+        if not dst.is_file():
+            raise DatabaseCloneError(f"{dst} is missing from the clone")
+        if dst.stat().st_size != src.stat().st_size:
+            raise DatabaseCloneError(f"{dst} differs in size from {src}")
+    magic = (source / "protocolMagicId").read_bytes()
+    if (destination / "protocolMagicId").read_bytes() != magic:
+        raise DatabaseCloneError(f"The protocol magic of {destination} does not match")
@@ -0,0 +1,179 @@
+import logging
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Cardano-Tools components
+from .node_tools import CardanoNode, CardanoNodeError
+
+
+def _port_free(host: str, port: int) -> bool:
+    """True if nothing on this host is listening on the TCP port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        try:
+            sock.bind((host, port))
+        except OSError:
+            return False
+    return True
+
+
+class NodeFleet:
+    """Runs several cardano-node processes on one host, e.g. a few relays and a block producer,
+    from a declarative spec.
+
+    Each entry of the spec is a dict with a unique "name", a "mode" ("relay", the default, or
+    "pool") and any CardanoNode arguments (binary, topology, config, kes_key, ...); the values in
+    defaults apply to every node. Arguments that are left out are allocated: the database and
+    socket live in base_dir/<name>/, ports are assigned from base_port upwards (skipping ports
+    in use) and, with metrics_base_port, each node gets its own Prometheus port.
+
+    Usage:
+
+        fleet = NodeFleet(
+            [
+                {"name": "relay-1"},
+                {"name": "relay-2"},
+                {"name": "bp", "mode": "pool", "topology": "bp-topology.json",
+                 "kes_key": "kes.skey", "vrf_key": "vrf.skey", "cert": "node.cert"},
+            ],
+            base_dir="/opt/cardano",
+            defaults={"binary": "cardano-node", "topology": "topology.json",
+                      "config": "config.json"},
+        )
+        fleet.start()
+        fleet.restart()  # rolling restart, e.g. after a configuration change
+        fleet.stop()
+    """
+
+    def __init__(
+        self,
+        spec: list,
+        base_dir,
+        defaults: dict = None,
+        base_port: int = 3001,
+        metrics_base_port: int = None,
+        host: str = "0.0.0.0",
+        ready_timeout: float = 600,
+        stop_timeout: float = 60.0,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.base_dir = Path(base_dir)
+        self.ready_timeout = ready_timeout
+        self.stop_timeout = stop_timeout
+        self.modes = {}
+        self.nodes = {}
+
+        names = [entry.get("name") for entry in spec]
+        if None in names or len(set(names)) != len(names):
+            raise ValueError("Every node in the spec needs a unique name")
+        taken = {entry["port"] for entry in spec if "port" in entry}
+        taken |= {entry["prometheus_port"] for entry in spec if "prometheus_port" in entry}
+        next_port = {"port": base_port, "prometheus_port": metrics_base_port}
+
+        def allocate(key):
+            port = next_port[key]
+            while port in taken or not _port_free(host, port):
+                port += 1
+            taken.add(port)
+            next_port[key] = port + 1
+            return port
+
+        for entry in spec:
+            kwargs = dict(defaults or {}, **entry)
+            name, mode = kwargs.pop("name"), kwargs.pop("mode", "relay").lower()
+            if mode == "pool" and not all(kwargs.get(k) for k in ("kes_key", "vrf_key", "cert")):
+                raise ValueError(f"Block producer {name} needs kes_key, vrf_key and cert")
+            node_dir = self.base_dir / name
+            kwargs.setdefault("database_path", node_dir / "db")
+            kwargs.setdefault("socket_path", node_dir / "node.socket")
+            if "port" not in kwargs:
+                kwargs["port"] = allocate("port")
+            if metrics_base_port is not None and "prometheus_port" not in kwargs:
+                kwargs["prometheus_port"] = allocate("prometheus_port")
+            Path(kwargs["database_path"]).mkdir(parents=True, exist_ok=True)
+            Path(kwargs["socket_path"]).parent.mkdir(parents=True, exist_ok=True)
+            self.modes[name] = mode
+            self.nodes[name] = CardanoNode(**kwargs)
+
+    @property
+    def relays(self) -> list:
+        return [name for name, mode in self.modes.items() if mode != "pool"]
+
+    @property
+    def producers(self) -> list:
+        return [name for name, mode in self.modes.items() if mode == "pool"]
+
+    def _start_node(self, name: str) -> None:
+        node = self.nodes[name]
+        self.logger.info(f"Starting node {name} on port {node.port}")
+        node.start(self.modes[name])
+        node.wait_until_ready(timeout=self.ready_timeout)
+
+    def start(self, names: list = None) -> None:
+        """Start the nodes (default: all) in parallel and wait until they are ready.
+
+        Raises CardanoNodeError naming the nodes that did not become ready.
+        """
+        names = list(self.nodes) if names is None else names
+        with ThreadPoolExecutor(max_workers=max(len(names), 1)) as executor:
+            futures = {name: executor.submit(self._start_node, name) for name in names}
+        errors = {name: f.exception() for name, f in futures.items() if f.exception()}
+        if errors:
+            raise CardanoNodeError(
+                "Nodes failed to start: " + ", ".join(f"{n} ({e})" for n, e in errors.items())
+            )
+
+    def stop(self) -> dict:
+        """Shut the nodes down one after the other: block producers first, then the relays.
+
+        Returns
+        -------
+        dict
+            The exit code of each node, in the order they were stopped.
+        """
+        codes = {}
+        for name in self.producers + self.relays:
+            self.logger.info(f"Stopping node {name}")
+            codes[name] = self.nodes[name].stop(self.stop_timeout)
+        return codes
+
+    def restart(self, names: list = None, stagger: float = 10.0) -> None:
+        """Rolling restart of the nodes (default: all, relays before block producers): each node
+        is stopped, started and waited for before the next one, with stagger seconds in between.
+
+        A relay is only taken down while another relay is up, so the block producer never loses
+        its connection to the network. Raises CardanoNodeError if that is not possible or a
+        node does not come back.
+        """
+        names = list(self.nodes) if names is None else names
+        order = [n for n in self.relays if n in names] + [n for n in self.producers if n in names]
+        for i, name in enumerate(order):
+            node = self.nodes[name]
+            if self.modes[name] != "pool" and len(self.relays) > 1:
+                others = [self.nodes[n] for n in self.relays if n != name]
+                if not any(other.is_ready() for other in others):
+                    raise CardanoNodeError(f"Not restarting relay {name}: no other relay is up")
+            elif self.modes[name] != "pool":
+                self.logger.warning(f"Restarting {name}, the only relay")
+            self.logger.info(f"Restarting node {name}")
+            node.stop(self.stop_timeout)
+            self._start_node(name)
+            if i < len(order) - 1:
+                time.sleep(stagger)
+
+    def status(self) -> dict:
+        """Per node: mode, port, socket path, process ID, whether it is running and ready and
+        the latest resource usage sample (if the node samples it)."""
+        return {
+            name: {
+                "mode": self.modes[name],
+                "port": node.port,
+                "socket_path": str(node.socket_path),
+                "pid": node.process.pid if node.is_running() else None,
+                "running": node.is_running(),
+                "ready": node.is_running() and node.is_ready(),
+                "resources": node.resources.stats()["last"] if node.resources else None,
+            }
+            for name, node in self.nodes.items()
+        }
@@ -0,0 +1,130 @@
+import logging
+import re
+import threading
+import time
+
+import requests
+
+# Prometheus text format sample: name{labels} value [timestamp]
+_SAMPLE = re.compile(r"^([A-Za-z_:][\w:]*)(\{[^}]*\})?\s+(\S+)")
+
+# Python name of each gauge: (type, metric names in order of preference). The legacy logging
+# system and the new tracing system name some metrics differently.
+GAUGES = {
+    "slot": (int, ("cardano_node_metrics_slotNum_int",)),
+    "block": (int, ("cardano_node_metrics_blockNum_int",)),
+    "epoch": (int, ("cardano_node_metrics_epoch_int",)),
+    "slot_in_epoch": (int, ("cardano_node_metrics_slotInEpoch_int",)),
+    "density": (float, ("cardano_node_metrics_density_real",)),
+    "mempool_bytes": (int, ("cardano_node_metrics_mempoolBytes_int",)),
+    "mempool_txs": (int, ("cardano_node_metrics_txsInMempool_int",)),
+    "peers": (
+        int,
+        ("cardano_node_metrics_connectedPeers_int", "cardano_node_metrics_peerSelection_hot_int"),
+    ),
+    "forged": (int, ("cardano_node_metrics_Forge_forged_int", "cardano_node_metrics_forged_int")),
+}
+
+
+def parse_prometheus(text: str) -> dict:
+    """Parse metrics in the Prometheus text format into {name: float}. Samples with labels are
+    keyed by name and labels, e.g. 'name{label="x"}'."""
+    metrics = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        match = _SAMPLE.match(line)
+        if match is None:
+            continue
+        name, labels, value = match.groups()
+        try:
+            metrics[f"{name}{labels or ''}"] = float(value)
+        except ValueError:
+            continue
+    return metrics
+
+
+class NodeMetrics:
+    """Reads the metrics of a cardano-node from its Prometheus endpoint (the hasPrometheus
+    setting of the node configuration) without spawning cardano-cli processes.
+
+    Scrapes are cached for max_age seconds, so the getters are cheap to call often.
+
+    Usage:
+
+        metrics = NodeMetrics(port=12798)
+        print(metrics.slot, metrics.block, metrics.peers)
+    """
+
+    def __init__(
+        self, host: str = "127.0.0.1", port: int = 12798, max_age: float = 1.0, timeout=2.0
+    ):
+        self.url = f"http://{host}:{port}/metrics"
+        self.max_age = max_age
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+        self._metrics = {}
+        self._scraped = None
+        self._lock = threading.Lock()
+
+    def scrape(self) -> dict:
+        """Fetch and parse all metrics. Returns {} if the endpoint is not reachable."""
+        try:
+            r = requests.get(self.url, timeout=self.timeout)
+        except requests.RequestException as e:
+            self.logger.warning(f"Unable to scrape node metrics from {self.url}: {e}")
+            return {}
+        if not r.ok:
+            self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
+            return {}
+        metrics = parse_prometheus(r.text)
+        with self._lock:
+            self._metrics, self._scraped = metrics, time.monotonic()
+        return metrics
+
+    def get(self, max_age: float = None) -> dict:
+        """All metrics, scraped again if the cached ones are older than max_age seconds
+        (default: the max_age of the reader)."""
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            fresh = self._scraped is not None and time.monotonic() - self._scraped <= max_age
+            metrics = self._metrics
+        return metrics if fresh else self.scrape()
+
+    def gauge(self, name: str, max_age: float = None):
+        """A gauge by its Python name (see GAUGES), or None if the node does not report it."""
+        kind, metric_names = GAUGES[name]
+        metrics = self.get(max_age)
+        for metric_name in metric_names:
+            if metric_name in metrics:
+                return kind(metrics[metric_name])
+        return None
+
+    def summary(self, max_age: float = None) -> dict:
+        """All gauges (see GAUGES) from a single scrape."""
+        self.get(max_age)
+        return {name: self.gauge(name, float("inf")) for name in GAUGES}
+
+    @property
+    def slot(self) -> int:
+        return self.gauge("slot")
+
+    @property
+    def block(self) -> int:
+        return self.gauge("block")
+
+    @property
+    def epoch(self) -> int:
+        return self.gauge("epoch")
+
+    @property
+    def density(self) -> float:
+        return self.gauge("density")
+
+    @property
+    def mempool_bytes(self) -> int:
+        return self.gauge("mempool_bytes")
+
+    @property
+    def peers(self) -> int:
+        return self.gauge("peers")
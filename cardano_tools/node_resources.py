@@ -0,0 +1,141 @@
+import logging
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+# Cardano-Tools components
+from .utils import summarize
+
+# Resource usage of a process at one point in time. cpu_percent (100 = one core) and the disk
+# I/O rates (bytes/s) are averages since the previous sample and None for the first one; values
+# that cannot be read (e.g. /proc/<pid>/io of another user's process) are None.
+ResourceSample = namedtuple(
+    "ResourceSample",
+    ["at", "cpu_percent", "rss", "peak_rss", "read_rate", "write_rate", "threads", "open_files"],
+)
+
+
+class ProcessSampler:
+    """Samples the CPU, memory, disk I/O, thread and file descriptor usage of a process from
+    /proc/<pid> (Linux) every interval seconds in a background thread, keeping the samples of
+    the last `window` intervals for rolling statistics.
+
+    Each sample reads a few small files, so the overhead is negligible even at short intervals.
+
+    Usage:
+
+        sampler = ProcessSampler(interval=5).start(node.process.pid)
+        ...
+        print(sampler.stats()["rss"]["max"])
+    """
+
+    FIELDS = ("cpu_percent", "rss", "read_rate", "write_rate", "threads", "open_files")
+
+    def __init__(self, interval: float = 5.0, window: int = 720, proc: str = "/proc"):
+        self.interval = interval
+        self.proc = proc
+        self.pid = None
+        self.buffer = deque(maxlen=window)
+        self.logger = logging.getLogger(__name__)
+        self._ticks = os.sysconf("SC_CLK_TCK")
+        self._previous = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, pid: int) -> "ProcessSampler":
+        """Start sampling a process, e.g. after the node was (re)started. The samples of earlier
+        processes are kept."""
+        with self._lock:
+            self.pid, self._previous = pid, None
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the sampling thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _read(self, name: str) -> str:
+        with open(os.path.join(self.proc, str(self.pid), name)) as f:
+            return f.read()
+
+    def sample(self):
+        """Take a sample of the process now and add it to the buffer. Returns None if the
+        process does not exist (anymore)."""
+        now = time.monotonic()
+        try:
+            # The command name in parentheses may contain spaces, the fields follow it
+            stat = self._read("stat").rsplit(")", 1)[1].split()
+            status = dict(
+                line.split(":", 1) for line in self._read("status").splitlines() if ":" in line
+            )
+        except (OSError, IndexError):
+            return None
+        cpu = (int(stat[11]) + int(stat[12])) / self._ticks
+        rss = int(status.get("VmRSS", "0 kB").split()[0]) * 1024
+        peak_rss = int(status.get("VmHWM", "0 kB").split()[0]) * 1024
+        try:
+            io = dict(line.split(": ") for line in self._read("io").splitlines())
+            read_bytes, write_bytes = int(io["read_bytes"]), int(io["write_bytes"])
+        except (OSError, KeyError, ValueError):
+            read_bytes = write_bytes = None
+        try:
+            open_files = len(os.listdir(os.path.join(self.proc, str(self.pid), "fd")))
+        except OSError:
+            open_files = None
+
+        cpu_percent = read_rate = write_rate = None
+        previous = self._previous
+        if previous is not None and now > previous[0]:
+            elapsed = now - previous[0]
+            cpu_percent = (cpu - previous[1]) / elapsed * 100
+            if read_bytes is not None and previous[2] is not None:
+                read_rate = (read_bytes - previous[2]) / elapsed
+                write_rate = (write_bytes - previous[3]) / elapsed
+        self._previous = (now, cpu, read_bytes, write_bytes)
+
+        sample = ResourceSample(
+            time.time(),
+            cpu_percent,
+            rss,
+            peak_rss,
+            read_rate,
+            write_rate,
+            int(stat[17]),
+            open_files,
+        )
+        with self._lock:
+            self.buffer.append(sample)
+        return sample
+
+    def samples(self) -> list:
+        """The buffered samples, oldest first."""
+        with self._lock:
+            return list(self.buffer)
+
+    def stats(self) -> dict:
+        """Rolling statistics (count, mean, p50, p90, p99, max) of each field over the buffered
+        samples, plus the peak RSS reported by the kernel and the latest sample."""
+        samples = self.samples()
+        stats = {
+            field: summarize([getattr(s, field) for s in samples if getattr(s, field) is not None])
+            for field in self.FIELDS
+        }
+        stats["peak_rss"] = max((s.peak_rss for s in samples), default=None)
+        stats["last"] = samples[-1]._asdict() if samples else None
+        return stats
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                pid = self.pid
+            if pid is not None:
+                self.sample()
+            if self._stop.wait(self.interval):
+                return
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import time
+
+# Cardano-Tools components
+from .utils.progress import ProgressEstimator
+
+
+class NodeSyncTracker:
+    """Tracks the sync progress of a node over time, estimating how fast it advances through
+    the chain and when it will be fully synced.
+
+    tip_query is a function returning the tip of the node as reported by `cardano-cli query
+    tip` (e.g. NodeCLI.cli_tip_query). Errors raised by it (e.g. while the node is still
+    opening its database) are treated as "no tip yet".
+
+    The slot rate and the ETA are estimated from the tips of the last `window` polls (see
+    utils.progress.ProgressEstimator, which also spaces out the polls). While the node is not
+    answering yet, e.g. during the database replay after a restart, the tip is polled less and
+    less often.
+
+    Usage:
+
+        tracker = NodeSyncTracker(cli.cli_tip_query)
+        tracker.wait_until_synced(99.9, callback=lambda s: print(s["progress"], s["eta"]))
+    """
+
+    def __init__(
+        self,
+        tip_query,
+        window: int = 20,
+        min_interval: float = 1.0,
+        max_interval: float = 60.0,
+    ):
+        self.tip_query = tip_query
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.logger = logging.getLogger(__name__)
+        self.estimator = ProgressEstimator(min_interval, max_interval, window)
+        self.tip = None
+
+    @property
+    def interval(self) -> float:
+        """Seconds until the next poll."""
+        return self.estimator.interval
+
+    def sample(self) -> dict:
+        """Query the tip once and update the estimates.
+
+        Returns
+        -------
+        dict
+            The current status, see status().
+        """
+        try:
+            tip = self.tip_query()
+            slot, progress = int(tip["slot"]), float(tip["syncProgress"])
+        except Exception as e:
+            self.logger.debug(f"Tip not available: {e}")
+            self.estimator.backoff()
+            return self.status()
+        self.tip = tip
+        self.estimator.add(progress, slot)
+        return self.status()
+
+    def status(self) -> dict:
+        """The sync status from the samples taken so far.
+
+        Returns
+        -------
+        dict
+            {
+                "slot": int,  # None until the node reports a tip
+                "epoch": int,
+                "progress": float,  # percent
+                "slot_rate": float,  # slots per second, None with fewer than two samples
+                "progress_rate": float,  # percent per second
+                "eta": float,  # seconds until fully synced, None if unknown
+            }
+        """
+        if not self.estimator.samples:
+            return dict.fromkeys(("slot", "epoch", "progress", "slot_rate", "progress_rate", "eta"))
+        _, progress, slot = self.estimator.samples[-1]
+        progress_rate, slot_rate = self.estimator.rates()
+        return {
+            "slot": slot,
+            "epoch": self.tip.get("epoch"),
+            "progress": progress,
+            "slot_rate": slot_rate,
+            "progress_rate": progress_rate,
+            "eta": self.estimator.eta(),
+        }
+
+    def wait_until_synced(
+        self, threshold: float = 99.9, timeout: float = None, callback=None
+    ) -> bool:
+        """Block until the node reports at least threshold percent sync progress.
+
+        Parameters
+        ----------
+        threshold : float, optional
+            The sync progress (percent) to wait for.
+        timeout : float, optional
+            Give up after this many seconds (default: wait indefinitely).
+        callback : callable, optional
+            Called with the status (see status()) after every poll.
+
+        Returns
+        -------
+        bool
+            False if the node was not synced before the timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status = self.sample()
+            if callback is not None:
+                callback(status)
+            if status["progress"] is not None and status["progress"] >= threshold:
+                return True
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                self.logger.warning(f"Node not synced after {timeout} s: {status['progress']}%")
+                return False
+            wait = self.interval
+            until_threshold = self.estimator.time_to(threshold)
+            if until_threshold is not None:
+                # Do not sleep past the time the threshold is expected to be reached
+                wait = min(wait, until_threshold)
+                self.logger.info(
+                    f"Node {status['progress']:.2f}% synced at {status['slot_rate']:.1f} slots/s,"
+                    f" ETA {status['eta']:.0f} s"
+                )
+            wait = max(wait, self.min_interval)
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+            time.sleep(wait)
+
+    async def wait_until_synced_async(
+        self, threshold: float = 99.9, timeout: float = None, callback=None
+    ) -> bool:
+        """Awaitable version of wait_until_synced(), run in the event loop's default executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self.wait_until_synced, threshold, timeout, callback
+        )
@@ -1,12 +1,155 @@
+import json
 import signal
 import logging
+import socket
 import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque, namedtuple
+from pathlib import Path
+
+# Cardano-Tools components
+from .node_db import clone_database
+from .node_metrics import NodeMetrics
+from .node_resources import ProcessSampler
+from .utils import json_codec
+from .utils.progress import ProgressEstimator
+
+# A parsed line of node log output. kind is one of the NodeLogStream.KINDS values, "other" for
+# other JSON log messages or "text" for lines that are not JSON.
+NodeEvent = namedtuple("NodeEvent", ["at", "kind", "severity", "namespace", "slot", "data", "raw"])
 
 
 class CardanoNodeError(Exception):
     pass
 
 
+class NodeLogStream:
+    """Reads the (JSON) log output of cardano-node processes in a background thread and parses
+    each line into a NodeEvent, kept in a bounded ring buffer and passed to subscribers.
+
+    The node logs JSON to stdout when its configuration sets the stdout scribe format to ScJson
+    (legacy logging) or uses the new tracing system with a machine-readable stdout backend.
+    Both formats are recognised.
+    """
+
+    # Event kinds, matched against the end of the trace kind or namespace in order.
+    KINDS = (
+        ("block_adopted", ("AdoptedBlock",)),
+        ("block_forged", ("ForgedBlock",)),
+        ("leader", ("NodeIsLeader",)),
+        ("not_leader", ("NodeNotLeader",)),
+        ("forge_attempt", ("StartLeadershipCheck",)),
+        ("forge_error", ("CouldNotForge", "ForgeStateUpdateError", "BlockFromFuture")),
+        ("chain_extended", ("AddedToCurrentChain",)),
+        ("fork_switched", ("SwitchedToAFork",)),
+        ("peers", ("PeerSelection", "ConnectionManager", "PeerStatusChanged", "PeersFetch")),
+    )
+
+    def __init__(self, buffer_size: int = 10_000, echo: bool = False):
+        self.echo = echo
+        self.buffer = deque(maxlen=buffer_size)
+        self.logger = logging.getLogger(__name__)
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def attach(self, stream) -> threading.Thread:
+        """Start reading lines (bytes) from a stream, e.g. the stdout of a node process, until
+        it is closed."""
+        thread = threading.Thread(target=self._read, args=(stream,), daemon=True)
+        thread.start()
+        self._threads = [t for t in self._threads if t.is_alive()] + [thread]
+        return thread
+
+    def subscribe(self, callback, kinds=None):
+        """Call callback(event) for every new event (of the given kinds, if any) from the
+        reading thread. Returns a function that cancels the subscription."""
+        subscriber = (callback, frozenset(kinds) if kinds else None)
+        with self._lock:
+            self._subscribers.append(subscriber)
+
+        def unsubscribe():
+            with self._lock:
+                if subscriber in self._subscribers:
+                    self._subscribers.remove(subscriber)
+
+        return unsubscribe
+
+    def events(self, kind: str = None) -> list:
+        """The buffered events (of one kind), oldest first."""
+        with self._lock:
+            return [e for e in self.buffer if kind is None or e.kind == kind]
+
+    def join(self, timeout: float = None) -> None:
+        """Wait for the reading threads to reach the end of their streams."""
+        for thread in self._threads:
+            thread.join(timeout)
+
+    @classmethod
+    def parse(cls, line: str) -> NodeEvent:
+        """Parse a line of node output."""
+        try:
+            msg = json_codec.loads(line)
+        except ValueError:
+            msg = None
+        if not isinstance(msg, dict):
+            return NodeEvent(None, "text", None, None, None, {}, line)
+        ns = msg.get("ns", "")
+        namespace = ".".join(ns) if isinstance(ns, list) else ns
+        data = msg.get("data") if isinstance(msg.get("data"), dict) else {}
+        trace = f"{namespace}.{data.get('kind', '')}"
+        kind = "other"
+        for name, markers in cls.KINDS:
+            if any(marker in trace for marker in markers):
+                kind = name
+                break
+        return NodeEvent(
+            msg.get("at"),
+            kind,
+            msg.get("sev"),
+            namespace,
+            cls._slot(data),
+            data,
+            line,
+        )
+
+    @staticmethod
+    def _slot(data: dict):
+        """The slot an event refers to, if any."""
+        for key in ("slot", "slotNo"):
+            if isinstance(data.get(key), int):
+                return data[key]
+        tip = data.get("newtip") or data.get("tip") or ""
+        if isinstance(tip, str) and "@" in tip:
+            try:
+                return int(tip.rsplit("@", 1)[1])
+            except ValueError:
+                return None
+        return None
+
+    def _read(self, stream) -> None:
+        for raw in iter(stream.readline, b""):
+            line = raw.decode("utf-8", errors="replace").rstrip("\n")
+            if not line:
+                continue
+            if self.echo:
+                sys.stdout.write(f"{line}\n")
+            event = self.parse(line)
+            with self._lock:
+                self.buffer.append(event)
+                subscribers = list(self._subscribers)
+            for callback, kinds in subscribers:
+                if kinds is None or event.kind in kinds:
+                    try:
+                        callback(event)
+                    except Exception:
+                        self.logger.exception("Node log subscriber failed")
+        stream.close()
+
+
 class CardanoNode:
     """Provides an interface for starting up and shutting down a Cardano node."""
 
@@ -23,7 +166,28 @@ class CardanoNode:
         vrf_key=None,
         cert=None,
         show_output=False,
+        capture_logs=False,
+        log_buffer_size=10_000,
+        prometheus_port=None,
+        prometheus_host="127.0.0.1",
+        metrics_max_age=1.0,
+        resource_interval=None,
+        resource_window=720,
+        run_dir=None,
     ):
+        """With capture_logs, the node output is parsed into events available from self.logs
+        (a NodeLogStream), and also printed if show_output is set.
+
+        With prometheus_port, the node is started with its Prometheus endpoint enabled on that
+        port and its metrics are available from self.metrics (a NodeMetrics), cached for
+        metrics_max_age seconds.
+
+        With resource_interval, the CPU, memory and disk I/O usage of the node process is
+        sampled every resource_interval seconds into self.resources (a ProcessSampler), keeping
+        the last resource_window samples.
+
+        Files generated for the node (e.g. its configuration with Prometheus enabled) are written
+        to run_dir, by default a new temporary directory, and never to the database directory."""
         self.logger = logging.getLogger(__name__)
         self.binary = binary
         self.topology = topology
@@ -37,25 +201,65 @@ class CardanoNode:
         self.cert = cert
         self.process = None
         self.show_output = show_output
+        self.logs = NodeLogStream(log_buffer_size, echo=show_output) if capture_logs else None
+        self.prometheus_port = prometheus_port
+        self.prometheus_host = prometheus_host
+        self.metrics = None
+        if prometheus_port is not None:
+            self.metrics = NodeMetrics(prometheus_host, prometheus_port, max_age=metrics_max_age)
+        self.resources = None
+        if resource_interval is not None:
+            self.resources = ProcessSampler(resource_interval, window=resource_window)
+        self.run_dir = Path(run_dir) if run_dir is not None else None
+
+    def _prometheus_config(self):
+        """Write a copy of the node configuration with the Prometheus endpoint enabled (to the
+        run directory) and return its path. Relative paths of genesis files are made
+        absolute so that they still resolve from the copy."""
+        config_path = Path(self.config)
+        try:
+            config = json.loads(config_path.read_text())
+        except (OSError, ValueError) as e:
+            # e.g. a YAML configuration: use it as it is, it may enable Prometheus already
+            self.logger.warning(f"Unable to enable Prometheus in {config_path}: {e}")
+            return self.config
+        config["hasPrometheus"] = [self.prometheus_host, self.prometheus_port]
+        for key, value in config.items():
+            if key.endswith("File") and isinstance(value, str) and not Path(value).is_absolute():
+                config[key] = str((config_path.parent / value).resolve())
+        if self.run_dir is None:
+            self.run_dir = Path(tempfile.mkdtemp(prefix="cardano-node-"))
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        path = self.run_dir / "prometheus-config.json"
+        path.write_text(json.dumps(config, indent=4))
+        return path
 
     def __exec(self, args):
         self.logger.debug(f'CMD: "{args}"')
-        if self.show_output:
+        if self.logs is not None:
+            self.process = subprocess.Popen(
+                args.split(), stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+            )
+            self.logs.attach(self.process.stdout)
+        elif self.show_output:
             self.process = subprocess.Popen(args.split())
         else:
             self.process = subprocess.Popen(
                 args.split(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
             )
+        if self.resources is not None:
+            self.resources.start(self.process.pid)
 
     def start(self, mode="relay"):
         """Start the cardano-node (default relay mode)."""
+        config = self._prometheus_config() if self.prometheus_port is not None else self.config
         cmd = (
             f"{self.binary} run "
             f"--topology {self.topology} "
             f"--database-path {self.db_path} "
             f"--socket-path {self.socket_path} "
             f"--port {self.port} "
-            f"--config {self.config} "
+            f"--config {config} "
         )
         if self.host_addr is not None:
             cmd += f"--host-addr {self.host_addr} "
@@ -67,6 +271,215 @@ class CardanoNode:
             )
         self.__exec(cmd)
 
-    def stop(self):
-        """Stop the cardano-node (send SIGINT)."""
+    def clone_database(self, source, method: str = "auto") -> dict:
+        """Initialize the database of this node from the database of a stopped node (a
+        CardanoNode or a database directory), so that it starts from a synced state. Completed
+        immutable chunks are reflinked or hard linked rather than copied; see
+        node_db.clone_database for the methods.
+
+        Returns the number of files reflinked, linked and copied and the bytes copied.
+        """
+        if isinstance(source, CardanoNode):
+            if source.is_running():
+                raise CardanoNodeError("Stop the source node before cloning its database")
+            source = source.db_path
+        if self.is_running():
+            raise CardanoNodeError("Stop the node before replacing its database")
+        return clone_database(source, self.db_path, method)
+
+    def is_running(self) -> bool:
+        """True if the node process has been started and has not exited."""
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self, timeout: float = 60.0):
+        """Stop the cardano-node (send SIGINT) and wait up to timeout seconds for it to shut
+        down gracefully (closing the database files), then escalate to SIGTERM and finally
+        SIGKILL. With timeout=None the signal is sent without waiting.
+
+        Returns the exit code of the node (None if not waited for).
+        """
+        if self.resources is not None:
+            self.resources.stop()
+        if not self.is_running():
+            return self.process.returncode if self.process is not None else None
         self.process.send_signal(signal.SIGINT)
+        if timeout is None:
+            return None
+        for escalation, wait in ((signal.SIGTERM, timeout), (signal.SIGKILL, 10.0)):
+            try:
+                return self.process.wait(timeout=wait)
+            except subprocess.TimeoutExpired:
+                self.logger.warning(
+                    f"cardano-node did not exit after {wait} s, sending {escalation.name}"
+                )
+                self.process.send_signal(escalation)
+        return self.process.wait()
+
+    def socket_ready(self) -> bool:
+        """True if the node socket is accepting connections."""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(str(self.socket_path))
+            except OSError:
+                return False
+        return True
+
+    def is_ready(self, sync_progress=None, sync_threshold: float = 99.9) -> bool:
+        """True if the node socket accepts connections and, if a sync_progress function (e.g.
+        NodeCLI.get_sync_progress) is given, it reports at least sync_threshold percent."""
+        if not self.socket_ready():
+            return False
+        if sync_progress is None:
+            return True
+        try:
+            return sync_progress() >= sync_threshold
+        except Exception as e:
+            self.logger.debug(f"Sync progress not available yet: {e}")
+            return False
+
+    def wait_until_ready(
+        self,
+        timeout: float = 600,
+        sync_progress=None,
+        sync_threshold: float = 99.9,
+        pause: float = 0.5,
+    ) -> None:
+        """Wait until the node is ready (see is_ready).
+
+        Raises CardanoNodeError if the node exits or is not ready within timeout seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while not self.is_ready(sync_progress, sync_threshold):
+            if not self.is_running():
+                raise CardanoNodeError("cardano-node exited before becoming ready")
+            if time.monotonic() > deadline:
+                raise CardanoNodeError(f"cardano-node not ready after {timeout} s")
+            time.sleep(pause)
+
+
+class NodeSupervisor:
+    """Keeps a CardanoNode running: starts it, detects when it is ready and restarts it with
+    exponential backoff when it exits unexpectedly.
+
+    The backoff starts at backoff_initial seconds, doubles with every crash up to backoff_max and
+    is reset once the node has stayed up for stable_time seconds. Readiness is the node socket
+    accepting connections and, if a sync_progress function is given (e.g.
+    NodeCLI.get_sync_progress), the chain being synced to at least sync_threshold percent.
+
+    The process and its socket are checked every poll_interval seconds. Since sync_progress may
+    be expensive (a cardano-cli query), it is only called once the socket is up, spaced out by
+    the estimated time until the threshold is reached (at most sync_max_interval seconds apart).
+
+    Usage:
+
+        supervisor = NodeSupervisor(node, sync_progress=cli.get_sync_progress).start()
+        supervisor.wait_ready(timeout=3600)
+        ...
+        supervisor.stop()
+    """
+
+    def __init__(
+        self,
+        node: CardanoNode,
+        mode: str = "relay",
+        sync_progress=None,
+        sync_threshold: float = 99.9,
+        backoff_initial: float = 1.0,
+        backoff_max: float = 60.0,
+        stable_time: float = 300.0,
+        poll_interval: float = 0.5,
+        sync_max_interval: float = 60.0,
+    ):
+        self.node = node
+        self.mode = mode
+        self.sync_progress = sync_progress
+        self.sync_threshold = sync_threshold
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.stable_time = stable_time
+        self.poll_interval = poll_interval
+        self.sync_max_interval = sync_max_interval
+        self.restarts = 0
+        self.exit_codes = []
+        self.ready = threading.Event()
+        self.logger = logging.getLogger(__name__)
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self) -> "NodeSupervisor":
+        """Start the node and the supervising thread."""
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._supervise, daemon=True)
+        self._thread.start()
+        return self
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        """Block until the node is ready. Returns False on timeout."""
+        return self.ready.wait(timeout)
+
+    def stop(self, timeout: float = 60.0):
+        """Stop supervising and shut the node down gracefully (see CardanoNode.stop).
+        Returns the exit code of the node."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.ready.clear()
+        return self.node.stop(timeout)
+
+    def _synced(self, estimator: ProgressEstimator) -> bool:
+        """Query the sync progress (if there is a sync_progress function) and record it."""
+        if self.sync_progress is None:
+            return True
+        try:
+            progress = self.sync_progress()
+        except Exception as e:
+            self.logger.debug(f"Sync progress not available yet: {e}")
+            estimator.backoff()
+            return False
+        estimator.add(progress)
+        return progress >= self.sync_threshold
+
+    def _sync_wait(self, estimator: ProgressEstimator) -> float:
+        """Seconds until the sync progress is queried again: the adaptive interval, but not past
+        the time the threshold is expected to be reached."""
+        wait = estimator.interval
+        until_synced = estimator.time_to(self.sync_threshold)
+        if until_synced is not None:
+            wait = min(wait, until_synced)
+        return max(wait, self.poll_interval)
+
+    def _supervise(self) -> None:
+        backoff = self.backoff_initial
+        while not self._stopping.is_set():
+            self.logger.info("Starting cardano-node")
+            self.node.start(self.mode)
+            started = time.monotonic()
+            estimator = ProgressEstimator(self.poll_interval, self.sync_max_interval)
+            next_sync_check = started
+            while not self._stopping.is_set() and self.node.is_running():
+                if (
+                    not self.ready.is_set()
+                    and time.monotonic() >= next_sync_check
+                    and self.node.socket_ready()
+                ):
+                    if self._synced(estimator):
+                        self.logger.info(
+                            f"cardano-node ready after {time.monotonic() - started:.1f} s"
+                        )
+                        self.ready.set()
+                    else:
+                        next_sync_check = time.monotonic() + self._sync_wait(estimator)
+                self._stopping.wait(self.poll_interval)
+            if self._stopping.is_set():
+                return
+
+            self.ready.clear()
+            code = self.node.process.returncode
+            self.exit_codes.append(code)
+            if time.monotonic() - started >= self.stable_time:
+                backoff = self.backoff_initial
+            self.logger.error(f"cardano-node exited with code {code}, restarting in {backoff} s")
+            if self._stopping.wait(backoff):
+                return
+            self.restarts += 1
+            backoff = min(backoff * 2, self.backoff_max)
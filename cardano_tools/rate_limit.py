@@ -0,0 +1,139 @@
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Cardano-Tools components
+from .utils import summarize
+
+# Wallet API paths (POST) that build, sign or inspect transactions without changing any state
+_CONSTRUCT_PATHS = re.compile(
+    r"/(transactions-construct|transactions-sign|transactions-decode|transactions-balance"
+    r"|payment-fees|migrations/plan|delegation-fees)$"
+)
+
+
+class TokenBucket:
+    """A token bucket refilled at `rate` tokens per second up to `burst` tokens."""
+
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take a token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class _EndpointClass:
+    def __init__(self, rate: float = None, burst: float = None, concurrency: int = None):
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.semaphore = threading.BoundedSemaphore(concurrency) if concurrency else None
+        self.requests = 0
+        self.waiting = 0
+        self.in_flight = 0
+        self.queue_times = deque(maxlen=10_000)
+
+
+class RequestLimiter:
+    """Token-bucket rate limits and concurrency caps for the requests of one or more WalletHTTP
+    clients, per endpoint class:
+
+      "read":      GET requests
+      "construct": requests that build, sign, decode or estimate transactions
+      "submit":    all other requests (submitting and sending transactions, wallet changes)
+
+    A request first waits for a free concurrency slot and then for a token, so callers are
+    slowed down (backpressure) instead of overloading the wallet server. The time spent waiting
+    is recorded per class; see metrics().
+
+    Usage:
+
+        limiter = RequestLimiter(
+            read={"rate": 200, "concurrency": 32},
+            construct={"rate": 20, "concurrency": 4},
+            submit={"rate": 10, "burst": 20, "concurrency": 2},
+        )
+        wallet = WalletHTTP(limiter=limiter)
+    """
+
+    CLASSES = ("read", "construct", "submit")
+
+    def __init__(self, read: dict = None, construct: dict = None, submit: dict = None):
+        """Each class takes a dict with the optional keys "rate" (requests per second),
+        "burst" (bucket size, default max(rate, 1)) and "concurrency" (maximum requests in
+        flight). Classes without limits are only measured."""
+        self.logger = logging.getLogger(__name__)
+        self._classes = {
+            "read": _EndpointClass(**(read or {})),
+            "construct": _EndpointClass(**(construct or {})),
+            "submit": _EndpointClass(**(submit or {})),
+        }
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def classify(method: str, url: str) -> str:
+        """The endpoint class of a request."""
+        if method.upper() == "GET":
+            return "read"
+        if _CONSTRUCT_PATHS.search(url.split("?", 1)[0]):
+            return "construct"
+        return "submit"
+
+    @contextmanager
+    def slot(self, endpoint_class: str):
+        """Wait until a request of the given class may be made and hold a concurrency slot
+        while it is in flight."""
+        limits = self._classes[endpoint_class]
+        start = time.monotonic()
+        with self._lock:
+            limits.waiting += 1
+        if limits.semaphore is not None:
+            limits.semaphore.acquire()
+        try:
+            if limits.bucket is not None:
+                limits.bucket.acquire()
+            queue_time = time.monotonic() - start
+            with self._lock:
+                limits.waiting -= 1
+                limits.in_flight += 1
+                limits.requests += 1
+                limits.queue_times.append(queue_time)
+            if queue_time > 1.0:
+                self.logger.debug(f"{endpoint_class} request queued for {queue_time:.2f} s")
+            try:
+                yield
+            finally:
+                with self._lock:
+                    limits.in_flight -= 1
+        finally:
+            if limits.semaphore is not None:
+                limits.semaphore.release()
+
+    def metrics(self) -> dict:
+        """Per endpoint class: the number of requests made, waiting and in flight, and the
+        statistics of the queue time (seconds) of the last 10,000 requests."""
+        with self._lock:
+            return {
+                name: {
+                    "requests": limits.requests,
+                    "waiting": limits.waiting,
+                    "in_flight": limits.in_flight,
+                    "queue_time": summarize(list(limits.queue_times)),
+                }
+                for name, limits in self._classes.items()
+            }
@@ -0,0 +1,5 @@
+"""Tools for exercising Cardano-Tools without a running node or wallet."""
+from .wallet_server import StandInWalletServer
+from .load import run_load_test
+
+__all__ = ["StandInWalletServer", "run_load_test"]
@@ -0,0 +1,139 @@
+"""Load-test harness measuring WalletHTTP throughput and latency.
+
+By default a StandInWalletServer is started in-process; pass --server/--port to
+target a real cardano-wallet instead.
+
+    python -m cardano_tools.testing --concurrency 32 --requests 5000 --latency 0.005
+"""
+import argparse
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Cardano-Tools components
+from ..utils import summarize
+from ..wallet_tools import WalletHTTP
+from .wallet_server import StandInWalletServer
+
+# Default request mix: (name, weight, function(wallet, wallet_id))
+DEFAULT_OPERATIONS = [
+    ("get_wallet", 4, lambda wallet, wallet_id: wallet.get_wallet(wallet_id)),
+    ("get_transactions", 2, lambda wallet, wallet_id: wallet.get_transactions(wallet_id)),
+    ("get_assets", 2, lambda wallet, wallet_id: wallet.get_assets(wallet_id)),
+    ("get_addresses", 2, lambda wallet, wallet_id: wallet.get_addresses(wallet_id)),
+    ("get_all_wallets", 1, lambda wallet, wallet_id: wallet.get_all_wallets()),
+    ("list_stake_pools", 1, lambda wallet, wallet_id: wallet.list_stake_pools(1_000_000_000)),
+]
+
+
+def run_load_test(
+    wallet: WalletHTTP,
+    n_requests: int = 1000,
+    concurrency: int = 16,
+    operations: list = None,
+    wallet_ids: list = None,
+    seed: int = 0,
+) -> dict:
+    """Issue a mix of WalletHTTP calls from concurrent workers and measure them.
+
+    Parameters
+    ----------
+    wallet : WalletHTTP
+        The client under test.
+    n_requests : int
+        The total number of calls to make.
+    concurrency : int
+        The number of worker threads issuing calls.
+    operations : list, optional
+        (name, weight, function(wallet, wallet_id)) tuples; defaults to a
+        read-heavy mix of wallet, transaction, asset, address and pool calls.
+    wallet_ids : list, optional
+        Wallets to target; defaults to all wallets on the server.
+    seed : int
+        Seed for choosing the operations.
+
+    Returns
+    -------
+    dict
+        Overall throughput (calls per second), error count and latency
+        percentiles, in total and per operation.
+    """
+    operations = operations or DEFAULT_OPERATIONS
+    if wallet_ids is None:
+        wallet_ids = [w.get("id") for w in wallet.get_all_wallets()]
+    rng = random.Random(seed)
+    plan = [
+        (rng.choices(operations, weights=[op[1] for op in operations])[0], rng.choice(wallet_ids))
+        for _ in range(n_requests)
+    ]
+    latencies = {name: [] for name, _, _ in operations}
+    errors = {name: 0 for name, _, _ in operations}
+    lock = threading.Lock()
+
+    def call(item):
+        (name, _, func), wallet_id = item
+        start = time.perf_counter()
+        try:
+            ok = bool(func(wallet, wallet_id))
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies[name].append(elapsed)
+            errors[name] += not ok
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, plan))
+    duration = time.perf_counter() - start_time
+
+    all_latencies = [lat for values in latencies.values() for lat in values]
+    return {
+        "requests": n_requests,
+        "concurrency": concurrency,
+        "duration": duration,
+        "throughput": n_requests / duration,
+        "errors": sum(errors.values()),
+        "latency": summarize(all_latencies),
+        "operations": {
+            name: dict(summarize(latencies[name]), errors=errors[name])
+            for name, _, _ in operations
+            if latencies[name]
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--server", help="wallet server address (default: in-process stand-in)")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--wallets", type=int, default=50, help="stand-in wallets")
+    parser.add_argument("--transactions", type=int, default=100, help="stand-in txs per wallet")
+    parser.add_argument("--latency", type=float, default=0.0, help="stand-in latency (s)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    stand_in = None
+    if args.server:
+        wallet = WalletHTTP(args.server, args.port)
+    else:
+        stand_in = StandInWalletServer(
+            n_wallets=args.wallets, n_transactions=args.transactions, latency=args.latency
+        ).start()
+        wallet = stand_in.client()
+    try:
+        for concurrency in args.concurrency:
+            result = run_load_test(wallet, args.requests, concurrency)
+            lat = result["latency"]
+            print(
+                f"concurrency {concurrency:4d}: {result['throughput']:8.1f} req/s, "
+                f"p50 {lat['p50'] * 1e3:7.1f} ms, p90 {lat['p90'] * 1e3:7.1f} ms, "
+                f"p99 {lat['p99'] * 1e3:7.1f} ms, errors {result['errors']}"
+            )
+    finally:
+        if stand_in is not None:
+            stand_in.stop()
@@ -0,0 +1,738 @@
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Cardano-Tools components
+from ..utils import bech32_encode, cbor, estimate_output_size
+from ..wallet_tools import WalletHTTP
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class StandInWalletServer:
+    """A lightweight, in-process stand-in for the cardano-wallet HTTP server.
+
+    Serves synthetic but correctly shaped data for the wallet, transaction, asset, address,
+    UTxO, network and stake pool endpoints so that WalletHTTP (and the tools built on it) can be
+    exercised without a node or wallet. Latency, failure rate and data volume are configurable.
+
+    Usage:
+
+        with StandInWalletServer(n_wallets=100, latency=0.01) as server:
+            wallet = server.client()
+            wallet.get_all_wallets()
+    """
+
+    def __init__(
+        self,
+        n_wallets: int = 10,
+        n_transactions: int = 100,
+        n_assets: int = 20,
+        n_addresses: int = 50,
+        n_utxos: int = 100,
+        n_pools: int = 200,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        restore_time: float = 0.0,
+        max_tx_size: int = None,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.n_transactions = n_transactions
+        self.n_assets = n_assets
+        self.n_addresses = n_addresses
+        self.n_utxos = n_utxos
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.restore_time = restore_time
+        self.max_tx_size = max_tx_size
+        self.seed = seed
+        self.host = host
+        self.port = port
+        self.tip_slot = 50_000_000
+        self.request_counts = Counter()
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._server = None
+        self._thread = None
+        self._wallets = {}
+        self._details = {}
+        for i in range(n_wallets):
+            self._add_wallet(f"Wallet{i:05d}")
+        self._pools = [self._make_pool(i) for i in range(n_pools)]
+        self._routes = [
+            ("GET", r"v2/wallets", self._list_wallets),
+            ("POST", r"v2/wallets", self._create_wallet),
+            ("GET", r"v2/wallets/(?P<wid>\w+)", self._get_wallet),
+            ("PUT", r"v2/wallets/(?P<wid>\w+)", self._rename_wallet),
+            ("DELETE", r"v2/wallets/(?P<wid>\w+)", self._delete_wallet),
+            ("GET", r"v2/wallets/(?P<wid>\w+)/transactions", self._list_transactions),
+            ("GET", r"v2/wallets/(?P<wid>\w+)/transactions/(?P<tid>\w+)", self._get_transaction),
+            ("POST", r"v2/wallets/(?P<wid>\w+)/transactions", self._send_transaction),
+            ("POST", r"v2/wallets/(?P<wid>\w+)/payment-fees", self._payment_fees),
+            ("POST", r"v2/wallets/(?P<wid>\w+)/transactions-construct", self._construct_tx),
+            ("POST", r"v2/wallets/(?P<wid>\w+)/transactions-balance", self._balance_tx),
+            ("POST", r"v2/wallets/(?P<wid>\w+)/transactions-sign", self._sign_tx),
+            ("POST", r"v2/wallets/(?P<wid>\w+)/transactions-decode", self._decode_tx_route),
+            ("POST", r"v2/wallets/(?P<wid>\w+)/transactions-submit", self._submit_tx),
+            ("POST", r"v2/wallets/(?P<wid>\w+)/migrations/plan", self._migration_plan),
+            ("POST", r"v2/wallets/(?P<wid>\w+)/migrations", self._migrate),
+            ("GET", r"v2/wallets/(?P<wid>\w+)/assets", self._list_assets),
+            (
+                "GET",
+                r"v2/wallets/(?P<wid>\w+)/assets/(?P<pid>\w+)(/(?P<name>\w*))?",
+                self._get_asset,
+            ),
+            ("GET", r"v2/wallets/(?P<wid>\w+)/addresses", self._list_addresses),
+            ("GET", r"v2/wallets/(?P<wid>\w+)/statistics/utxos", self._utxo_stats),
+            ("GET", r"v2/wallets/(?P<wid>\w+)/utxo", self._utxo_snapshot),
+            ("GET", r"v2/stake-pools", self._list_stake_pools),
+            ("GET", r"v2/network/information", self._network_info),
+            ("GET", r"v2/network/parameters", self._network_params),
+        ]
+
+    # Server lifecycle
+
+    @property
+    def url(self) -> str:
+        """The server address without the port (the WalletHTTP wallet_server argument)."""
+        return f"http://{self.host}"
+
+    def client(self, **kwargs) -> WalletHTTP:
+        """Returns a WalletHTTP instance pointed at this server."""
+        return WalletHTTP(wallet_server=self.url, wallet_server_port=self.port, **kwargs)
+
+    def start(self) -> "StandInWalletServer":
+        """Start serving requests in a background thread."""
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _handle(self):
+                stand_in._dispatch(self)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+            def log_message(self, format, *args):
+                stand_in.logger.debug(format, *args)
+
+        self._server = _Server((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        self.logger.info(f"Stand-in wallet server listening on {self.url}:{self.port}")
+        return self
+
+    def stop(self) -> None:
+        """Stop the server and wait for the serving thread to exit."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def advance_tip(self, slots: int = 20) -> None:
+        """Move the chain tip forward (e.g. to simulate a new block)."""
+        with self._lock:
+            self.tip_slot += slots
+
+    def wallet_ids(self) -> list:
+        """IDs of all wallets currently known to the server."""
+        with self._lock:
+            return list(self._wallets)
+
+    # Request handling
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler) -> None:
+        parsed = urlparse(handler.path)
+        path = parsed.path.strip("/")
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = json.loads(handler.rfile.read(length)) if length else None
+
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self.jitter * self._random.random())
+
+        status, payload = 404, {"code": "not_found", "message": f"No route for {path}"}
+        for method, pattern, route in self._routes:
+            if method != handler.command:
+                continue
+            match = re.fullmatch(pattern, path)
+            if match is None:
+                continue
+            with self._lock:
+                self.request_counts[route.__name__.lstrip("_")] += 1
+                failed = bool(self.error_rate) and self._random.random() < self.error_rate
+            if failed:
+                status, payload = 503, {"code": "unavailable", "message": "Injected failure"}
+            else:
+                try:
+                    status, payload = route(body=body, query=query, **match.groupdict())
+                except KeyError:
+                    status, payload = 404, {"code": "no_such_wallet", "message": path}
+            break
+
+        data = json.dumps(payload).encode() if payload is not None else b""
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json;charset=utf-8")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    # Synthetic data
+
+    def _hex(self, rng: random.Random, n_bytes: int) -> str:
+        return rng.getrandbits(8 * n_bytes).to_bytes(n_bytes, "big").hex()
+
+    def _address(self, rng: random.Random) -> str:
+        return bech32_encode("addr_test", bytes([0]) + rng.getrandbits(448).to_bytes(56, "big"))
+
+    def _quantity(self, quantity, unit="lovelace") -> dict:
+        return {"quantity": quantity, "unit": unit}
+
+    def _tip(self) -> dict:
+        return {
+            "absolute_slot_number": self.tip_slot,
+            "slot_number": self.tip_slot % 432000,
+            "epoch_number": self.tip_slot // 432000,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "height": self._quantity(self.tip_slot // 20, "block"),
+        }
+
+    def _add_wallet(self, name: str, wallet_id: str = None) -> dict:
+        index = len(self._wallets)
+        rng = random.Random(f"{self.seed}-{index}")
+        wallet_id = wallet_id or self._hex(rng, 20)
+        assets = [
+            {
+                "policy_id": self._hex(rng, 28),
+                "asset_name": f"NFT{i:04d}".encode().hex(),
+                "quantity": rng.randint(1, 1000),
+            }
+            for i in range(self.n_assets)
+        ]
+        total = rng.randint(1, 10_000) * 1_000_000
+        self._wallets[wallet_id] = {
+            "id": wallet_id,
+            "name": name,
+            "address_pool_gap": 20,
+            "balance": {
+                "available": self._quantity(total),
+                "reward": self._quantity(0),
+                "total": self._quantity(total),
+            },
+            "assets": {"available": assets, "total": assets},
+            "delegation": {"active": {"status": "not_delegating"}, "next": []},
+            "passphrase": {"last_updated_at": "2022-01-01T00:00:00Z"},
+            "_restored_at": time.time() - self.restore_time,
+        }
+        return self._wallets[wallet_id]
+
+    def _wallet(self, wid: str) -> dict:
+        wallet = {k: v for k, v in self._wallets[wid].items() if not k.startswith("_")}
+        elapsed = time.time() - self._wallets[wid]["_restored_at"]
+        if self.restore_time and elapsed < self.restore_time:
+            progress = round(100 * elapsed / self.restore_time, 2)
+            wallet["state"] = {"status": "syncing", "progress": self._quantity(progress, "percent")}
+        else:
+            wallet["state"] = {"status": "ready"}
+        wallet["tip"] = self._tip()
+        return wallet
+
+    def _wallet_details(self, wid: str) -> dict:
+        """Lazily generated bulk data (transactions, addresses, UTxOs) for a wallet."""
+        if wid not in self._details:
+            self._wallets[wid]  # Raise KeyError for unknown wallets
+            rng = random.Random(f"{self.seed}-{wid}")
+            addresses = [self._address(rng) for _ in range(self.n_addresses)]
+            transactions = [
+                {
+                    "id": self._hex(rng, 32),
+                    "amount": self._quantity(rng.randint(1, 1000) * 1_000_000),
+                    "fee": self._quantity(rng.randint(168_000, 200_000)),
+                    "deposit_taken": self._quantity(0),
+                    "deposit_returned": self._quantity(0),
+                    "inserted_at": {"absolute_slot_number": self.tip_slot - i * 20},
+                    "direction": rng.choice(["incoming", "outgoing"]),
+                    "inputs": [{"id": self._hex(rng, 32), "index": 0}],
+                    "outputs": [
+                        {"address": rng.choice(addresses), "amount": self._quantity(1_000_000)}
+                    ],
+                    "withdrawals": [],
+                    "mint": {"tokens": []},
+                    "burn": {"tokens": []},
+                    "status": "in_ledger",
+                    "metadata": None,
+                }
+                for i in range(self.n_transactions)
+            ]
+            assets = self._wallets[wid]["assets"]["total"]
+            utxos = [
+                {
+                    "ada": self._quantity(int(10 ** rng.uniform(5.5, 10))),
+                    "ada_minimum": self._quantity(999_978),
+                    "assets": [rng.choice(assets)] if assets and rng.random() < 0.3 else [],
+                }
+                for _ in range(self.n_utxos)
+            ]
+            self._details[wid] = {
+                "addresses": [
+                    {
+                        "id": address,
+                        "state": "used" if i < len(addresses) // 2 else "unused",
+                        "derivation_path": ["1852H", "1815H", "0H", "0", str(i)],
+                    }
+                    for i, address in enumerate(addresses)
+                ],
+                "transactions": transactions,
+                "utxos": utxos,
+                "inputs": [
+                    {"id": self._hex(rng, 32), "index": i % 4, "amount": utxo["ada"]}
+                    for i, utxo in enumerate(utxos)
+                ],
+                "spent": set(),
+            }
+        return self._details[wid]
+
+    def _encode_tx(self, tx: dict) -> str:
+        return json.dumps(tx, sort_keys=True).encode().hex()
+
+    def _decode_tx(self, tx: str) -> dict:
+        return json.loads(bytes.fromhex(tx))
+
+    def _make_pool(self, i: int) -> dict:
+        rng = random.Random(f"{self.seed}-pool-{i}")
+        live_stake = rng.randint(1, 80_000_000) * 1_000_000
+        return {
+            "id": bech32_encode("pool", rng.getrandbits(224).to_bytes(28, "big")),
+            "metrics": {
+                "non_myopic_member_rewards": self._quantity(0),
+                "relative_stake": self._quantity(round(live_stake / 25e15 * 100, 6), "percent"),
+                "saturation": round(live_stake / 68e12, 6),
+                "produced_blocks": self._quantity(rng.randint(0, 50_000), "block"),
+            },
+            "cost": self._quantity(rng.choice([170, 340, 500]) * 1_000_000),
+            "margin": self._quantity(round(rng.uniform(0, 10), 2), "percent"),
+            "pledge": self._quantity(rng.randint(0, 2_000_000) * 1_000_000),
+            "metadata": {
+                "ticker": f"P{i:04d}",
+                "name": f"Stand-in pool {i}",
+                "homepage": "https://example.com",
+            },
+            "flags": [],
+            "_live_stake": live_stake,
+            "_performance": rng.uniform(0.9, 1.0),
+        }
+
+    # Routes
+
+    def _list_wallets(self, body, query):
+        with self._lock:
+            return 200, [self._wallet(wid) for wid in self._wallets]
+
+    def _create_wallet(self, body, query):
+        secret = body.get("account_public_key") or " ".join(body.get("mnemonic_sentence") or [])
+        if not secret or not body.get("name"):
+            return 400, {"code": "bad_request", "message": "Missing wallet name or key material"}
+        wallet_id = hashlib.blake2b(secret.encode(), digest_size=20).hexdigest()
+        with self._lock:
+            if wallet_id in self._wallets:
+                return 409, {"code": "wallet_already_exists", "message": wallet_id}
+            self._add_wallet(body.get("name"), wallet_id)
+            self._wallets[wallet_id]["_restored_at"] = time.time()
+            return 201, self._wallet(wallet_id)
+
+    def _get_wallet(self, body, query, wid):
+        with self._lock:
+            return 200, self._wallet(wid)
+
+    def _rename_wallet(self, body, query, wid):
+        with self._lock:
+            self._wallets[wid]["name"] = body.get("name")
+            return 200, self._wallet(wid)
+
+    def _delete_wallet(self, body, query, wid):
+        with self._lock:
+            del self._wallets[wid]
+            self._details.pop(wid, None)
+        return 204, None
+
+    def _list_transactions(self, body, query, wid):
+        with self._lock:
+            return 200, self._wallet_details(wid)["transactions"]
+
+    def _get_transaction(self, body, query, wid, tid):
+        with self._lock:
+            for tx in self._wallet_details(wid)["transactions"]:
+                if tx["id"] == tid:
+                    return 200, tx
+        return 404, {"code": "no_such_transaction", "message": tid}
+
+    def _send_transaction(self, body, query, wid):
+        with self._lock:
+            rng = random.Random(f"{self.seed}-{wid}-{self.request_counts['send_transaction']}")
+            outputs = [
+                {"address": payment["address"], "amount": payment["amount"]}
+                for payment in body.get("payments", [])
+            ]
+            tx = {
+                "id": self._hex(rng, 32),
+                "amount": self._quantity(sum(o["amount"]["quantity"] for o in outputs)),
+                "fee": self._quantity(170_000 + 44 * 100 * len(outputs)),
+                "direction": "outgoing",
+                "inputs": [{"id": self._hex(rng, 32), "index": 0}],
+                "outputs": outputs,
+                "status": "pending",
+            }
+            self._wallet_details(wid)["transactions"].insert(0, tx)
+        return 202, tx
+
+    def _payment_fees(self, body, query, wid):
+        # A linear fee on an estimate of the transaction size: the outputs, a change output and
+        # the (largest first) inputs needed to cover the payments, with their witnesses.
+        payments = body.get("payments", [])
+        target = sum(p["amount"]["quantity"] for p in payments)
+        with self._lock:
+            details = self._wallet_details(wid)
+            available = sorted(
+                (
+                    i["amount"]["quantity"]
+                    for i in details["inputs"]
+                    if (i["id"], i["index"]) not in details["spent"]
+                ),
+                reverse=True,
+            )
+        n_inputs, total = 0, 0
+        while total < target + 200_000 and n_inputs < len(available):
+            total += available[n_inputs]
+            n_inputs += 1
+        if total < target + 200_000:
+            return 403, {"code": "not_enough_money", "message": "Insufficient balance"}
+        size = 150 + 70 + sum(estimate_output_size(p) for p in payments) + 140 * n_inputs
+        fee = 155_381 + 44 * size
+        return 202, {
+            "estimated_min": self._quantity(fee),
+            "estimated_max": self._quantity(fee + 44 * 100),
+            "minimum_coins": [self._quantity(999_978) for _ in payments],
+            "deposit": self._quantity(0),
+        }
+
+    def _construct_tx(self, body, query, wid):
+        outputs = [
+            {"address": p["address"], "amount": p["amount"], "assets": p.get("assets", [])}
+            for p in body.get("payments", [])
+        ]
+        fee = 170_000 + 5_000 * len(outputs)
+        target = sum(o["amount"]["quantity"] for o in outputs) + fee
+        with self._lock:
+            details = self._wallet_details(wid)
+            # Like cardano-wallet, unsubmitted transactions do not reserve their inputs and the
+            # selection is randomized.
+            available = [
+                i for i in details["inputs"] if (i["id"], i["index"]) not in details["spent"]
+            ]
+            self._random.shuffle(available)
+        selected, total = [], 0
+        for tx_in in available:
+            if total >= target:
+                break
+            selected.append(tx_in)
+            total += tx_in["amount"]["quantity"]
+        if total < target:
+            return 403, {"code": "not_enough_money", "message": "Insufficient balance"}
+        change = [self._quantity(total - target)] if total > target else []
+        tx = {
+            "wallet": wid,
+            "inputs": [[i["id"], i["index"]] for i in selected],
+            "outputs": outputs,
+            "change": change,
+            "fee": fee,
+            "witnesses": 0,
+        }
+        encoded = self._encode_tx(tx)
+        if self.max_tx_size is not None and len(encoded) // 2 > self.max_tx_size:
+            return 403, {"code": "transaction_is_too_big", "message": "Transaction too big"}
+        return 202, {
+            "transaction": encoded,
+            "coin_selection": {
+                "inputs": selected,
+                "outputs": outputs,
+                "change": [{"amount": amount} for amount in change],
+                "collateral": [],
+                "withdrawals": [],
+            },
+            "fee": self._quantity(fee),
+        }
+
+    def _balance_tx(self, body, query, wid):
+        # A partial transaction as base16 CBOR [body, witnesses, is_valid, auxiliary data]. Its
+        # inputs must be the wallet's. Like cardano-wallet, inputs and a change output are only
+        # added when the inputs do not cover the outputs and the fee.
+        try:
+            tx_body = cbor.loads(bytes.fromhex(body["transaction"]))[0]
+            inputs = [(tx_id.hex(), index) for tx_id, index in tx_body[0]]
+            outputs = [
+                {
+                    "address": bech32_encode("addr_test", address),
+                    "amount": self._quantity(value if isinstance(value, int) else value[0]),
+                }
+                for address, value in tx_body[1]
+            ]
+        except (ValueError, TypeError, KeyError, IndexError):
+            return 400, {"code": "malformed_tx", "message": "Cannot decode the transaction"}
+        with self._lock:
+            details = self._wallet_details(wid)
+            utxo = {
+                (i["id"], i["index"]): i
+                for i in details["inputs"]
+                if (i["id"], i["index"]) not in details["spent"]
+            }
+            if any(i not in utxo for i in inputs):
+                return 403, {"code": "unknown_inputs", "message": "Inputs are not the wallet's"}
+            available = [i for key, i in utxo.items() if key not in inputs]
+            self._random.shuffle(available)
+        selected = [utxo[i] for i in inputs]
+        total = sum(i["amount"]["quantity"] for i in selected)
+        paid = sum(o["amount"]["quantity"] for o in outputs)
+        fee = 170_000 + 5_000 * len(selected)
+        while total < paid + fee and available:
+            selected.append(available.pop())
+            total += selected[-1]["amount"]["quantity"]
+            fee = 170_000 + 5_000 * len(selected)
+        if total < paid + fee:
+            return 403, {"code": "not_enough_money", "message": "Insufficient balance"}
+        surplus = total - paid - fee
+        # A surplus too small for an output is left to the fee
+        change = [self._quantity(surplus)] if surplus >= 1_000_000 else []
+        tx = {
+            "wallet": wid,
+            "inputs": [[i["id"], i["index"]] for i in selected],
+            "outputs": outputs,
+            "change": change,
+            "fee": fee + (surplus if not change else 0),
+            "witnesses": 0,
+        }
+        return 202, {"transaction": self._encode_tx(tx)}
+
+    def _sign_tx(self, body, query, wid):
+        tx = self._decode_tx(body["transaction"])
+        tx["witnesses"] = len(tx["inputs"])
+        return 202, {"transaction": self._encode_tx(tx)}
+
+    def _decode_tx_route(self, body, query, wid):
+        tx = self._decode_tx(body["transaction"])
+        tx_id = hashlib.blake2b(body["transaction"].encode(), digest_size=32).hexdigest()
+        return 202, {
+            "id": tx_id,
+            "inputs": [{"id": i, "index": ix} for i, ix in tx["inputs"]],
+            "outputs": tx["outputs"],
+            "fee": self._quantity(tx["fee"]),
+        }
+
+    def _submit_tx(self, body, query, wid):
+        tx = self._decode_tx(body["transaction"])
+        if not tx["witnesses"]:
+            return 400, {"code": "missing_witnesses", "message": "Transaction is not signed"}
+        tx_id = hashlib.blake2b(body["transaction"].encode(), digest_size=32).hexdigest()
+        with self._lock:
+            details = self._wallet_details(wid)
+            inputs = {tuple(i) for i in tx["inputs"]}
+            if inputs & details["spent"]:
+                return 403, {"code": "created_invalid_transaction", "message": "BadInputsUTxO"}
+            details["spent"] |= inputs
+            # The change outputs (paid to the wallet's first address) become spendable
+            change = [
+                {"address": details["addresses"][0]["id"], "amount": amount}
+                for amount in tx.get("change", [])
+            ]
+            details["inputs"].extend(
+                {"id": tx_id, "index": len(tx["outputs"]) + n, "amount": output["amount"]}
+                for n, output in enumerate(change)
+            )
+            details["transactions"].insert(
+                0,
+                {
+                    "id": tx_id,
+                    "amount": self._quantity(sum(o["amount"]["quantity"] for o in tx["outputs"])),
+                    "fee": self._quantity(tx["fee"]),
+                    "direction": "outgoing",
+                    "inputs": [{"id": i, "index": ix} for i, ix in tx["inputs"]],
+                    "outputs": tx["outputs"] + change,
+                    "status": "pending",
+                },
+            )
+        return 202, {"id": tx_id}
+
+    def _plan(self, details: dict, addresses: list) -> dict:
+        """A migration plan of the unspent inputs, in selections of up to 10 inputs. Must be
+        called with the lock held."""
+        available = [i for i in details["inputs"] if (i["id"], i["index"]) not in details["spent"]]
+        selections, leftover = [], 0
+        for n in range(0, len(available), 10):
+            inputs = available[n : n + 10]
+            total = sum(i["amount"]["quantity"] for i in inputs)
+            fee = 170_000 + 5_000 * len(inputs)
+            if total - fee < 1_000_000:
+                leftover += total
+                continue
+            address = addresses[len(selections) % len(addresses)]
+            selections.append(
+                {
+                    "inputs": inputs,
+                    "outputs": [
+                        {"address": address, "amount": self._quantity(total - fee), "assets": []}
+                    ],
+                    "change": [],
+                    "fee": self._quantity(fee),
+                    "withdrawals": [],
+                }
+            )
+        return {
+            "selections": selections,
+            "total_fee": self._quantity(sum(s["fee"]["quantity"] for s in selections)),
+            "balance_selected": {
+                "ada": self._quantity(
+                    sum(i["amount"]["quantity"] for s in selections for i in s["inputs"])
+                ),
+                "assets": [],
+            },
+            "balance_leftover": {"ada": self._quantity(leftover), "assets": []},
+        }
+
+    def _migration_plan(self, body, query, wid):
+        with self._lock:
+            plan = self._plan(self._wallet_details(wid), body["addresses"])
+        if not plan["selections"]:
+            return 403, {"code": "nothing_to_migrate", "message": "Nothing to migrate"}
+        return 202, plan
+
+    def _migrate(self, body, query, wid):
+        with self._lock:
+            details = self._wallet_details(wid)
+            plan = self._plan(details, body["addresses"])
+            if not plan["selections"]:
+                return 403, {"code": "nothing_to_migrate", "message": "Nothing to migrate"}
+            txs = []
+            for selection in plan["selections"]:
+                inputs = [{"id": i["id"], "index": i["index"]} for i in selection["inputs"]]
+                details["spent"] |= {(i["id"], i["index"]) for i in inputs}
+                tx = {
+                    "id": hashlib.blake2b(json.dumps(inputs).encode(), digest_size=32).hexdigest(),
+                    "amount": selection["outputs"][0]["amount"],
+                    "fee": selection["fee"],
+                    "direction": "outgoing",
+                    "inputs": inputs,
+                    "outputs": selection["outputs"],
+                    "status": "pending",
+                }
+                details["transactions"].insert(0, tx)
+                txs.append(tx)
+        return 202, txs
+
+    def _list_assets(self, body, query, wid):
+        with self._lock:
+            return 200, [
+                dict(asset, fingerprint=f"asset1{asset['policy_id'][:38]}")
+                for asset in self._wallets[wid]["assets"]["total"]
+            ]
+
+    def _get_asset(self, body, query, wid, pid, name=None):
+        with self._lock:
+            for asset in self._wallets[wid]["assets"]["total"]:
+                if asset["policy_id"] == pid and asset["asset_name"] == (name or ""):
+                    return 200, dict(asset, fingerprint=f"asset1{pid[:38]}")
+        return 404, {"code": "no_such_asset", "message": pid}
+
+    def _list_addresses(self, body, query, wid):
+        with self._lock:
+            addresses = self._wallet_details(wid)["addresses"]
+            if "state" in query:
+                addresses = [a for a in addresses if a["state"] == query["state"]]
+            return 200, addresses
+
+    def _utxo_stats(self, body, query, wid):
+        with self._lock:
+            utxos = self._wallet_details(wid)["utxos"]
+        distribution = {str(10**i): 0 for i in range(1, 17)}
+        for utxo in utxos:
+            bound = 10
+            while bound < utxo["ada"]["quantity"]:
+                bound *= 10
+            distribution[str(bound)] += 1
+        total = sum(utxo["ada"]["quantity"] for utxo in utxos)
+        return 200, {"total": self._quantity(total), "scale": "log10", "distribution": distribution}
+
+    def _utxo_snapshot(self, body, query, wid):
+        with self._lock:
+            return 200, {"entries": self._wallet_details(wid)["utxos"]}
+
+    def _list_stake_pools(self, body, query):
+        stake = int(query.get("stake", 0))
+        pools = []
+        for pool in self._pools:
+            # A simple model of the non-myopic member rewards: the pool earns in proportion to
+            # its (capped at saturation) stake, the operator takes the cost and margin and the
+            # delegator gets their share of the remainder.
+            total_stake = pool["_live_stake"] + stake
+            pool_rewards = min(total_stake, 68e12) * 0.0003 * pool["_performance"]
+            member_share = stake / total_stake if total_stake else 0
+            member_rewards = max(
+                0.0,
+                (pool_rewards - pool["cost"]["quantity"])
+                * (1 - pool["margin"]["quantity"] / 100)
+                * member_share,
+            )
+            public = {k: v for k, v in pool.items() if not k.startswith("_")}
+            public["metrics"] = dict(
+                pool["metrics"], non_myopic_member_rewards=self._quantity(int(member_rewards))
+            )
+            pools.append(public)
+        pools.sort(key=lambda p: -p["metrics"]["non_myopic_member_rewards"]["quantity"])
+        return 200, pools
+
+    def _network_info(self, body, query):
+        return 200, {
+            "network_tip": self._tip(),
+            "node_tip": self._tip(),
+            "sync_progress": {"status": "ready"},
+            "node_era": "babbage",
+            "network_info": {"protocol_magic": 2, "network_id": "testnet"},
+            "wallet_mode": "node",
+        }
+
+    def _network_params(self, body, query):
+        return 200, {
+            "genesis_block_hash": "00" * 32,
+            "blockchain_start_time": "2022-10-25T00:00:00Z",
+            "slot_length": self._quantity(1, "second"),
+            "epoch_length": self._quantity(432000, "slot"),
+            "security_parameter": self._quantity(2160, "block"),
+            "active_slot_coefficient": self._quantity(5.0, "percent"),
+            "decentralization_level": self._quantity(100.0, "percent"),
+            "desired_pool_number": 500,
+            "minimum_utxo_value": self._quantity(999_978),
+            "maximum_collateral_input_count": 3,
+            "minimum_collateral_percentage": 150,
+            "maximum_token_bundle_size": self._quantity(5000, "byte"),
+        }
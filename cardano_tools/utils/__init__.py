@@ -1,4 +1,37 @@
+import json
+
 from .bech32 import bech32_decode, bech32_encode
+from . import cbor, json_codec, progress, vrf
+from .utxo_columns import UtxoColumns, iter_snapshot_entries
+
+
+class LogText:
+    """Wraps a (possibly large) payload for a log message so that it is only
+    converted to a string, and truncated, if the message is actually emitted.
+
+    Usage: logger.debug("%s", LogText(response.content))
+    """
+
+    def __init__(self, text, limit: int = 2048):
+        self.text = text
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = self.text
+        if isinstance(text, bytes):
+            total = len(text)
+            text = text[: self.limit + 1].decode("utf-8", errors="replace")
+        else:
+            if not isinstance(text, str):
+                # Decoded payloads (dicts, lists) are logged as JSON
+                try:
+                    text = json.dumps(text, default=str)
+                except (TypeError, ValueError):
+                    text = str(text)
+            total = len(text)
+        if len(text) > self.limit:
+            return f"{text[:self.limit]}... ({total:,} total)"
+        return text
 
 
 def minimum_utxo(params, assets=[]) -> int:
@@ -64,4 +97,133 @@ def minimum_utxo(params, assets=[]) -> int:
     )
 
 
-__all__ = ["minimum_utxo", "bech32_decode", "bech32_encode"]
+def _cbor_head_size(n: int) -> int:
+    """Number of bytes used by a CBOR major-type header (or unsigned int) with argument n."""
+    if n < 24:
+        return 1
+    if n < 2**8:
+        return 2
+    if n < 2**16:
+        return 3
+    if n < 2**32:
+        return 5
+    return 9
+
+
+def estimate_output_size(payment: dict) -> int:
+    """Estimate the serialized (CBOR) size of a payment once it becomes a
+    transaction output.
+
+    Parameters
+    ----------
+    payment : dict
+        A payment in the cardano-wallet format, i.e. a dict with the keys
+        "address", "amount" and optionally "assets" (asset names hex
+        encoded).
+
+    Returns
+    -------
+    int
+        The estimated size of the output (bytes).
+    """
+
+    # Shelley addresses are bech32 encoded bytes, Byron addresses are base58
+    # which is always longer than the raw bytes so it is a safe upper bound.
+    address = payment.get("address")
+    _, addr_bytes = bech32_decode(address)
+    addr_len = len(addr_bytes) if addr_bytes is not None else len(address)
+    size = 1 + _cbor_head_size(addr_len) + addr_len
+
+    lovelace = int(payment.get("amount").get("quantity"))
+    assets = payment.get("assets") or []
+    if len(assets) == 0:
+        return size + _cbor_head_size(lovelace)
+
+    # Multi-asset values are [coin, {policy_id: {asset_name: quantity}}]
+    policies = {}
+    for asset in assets:
+        policies.setdefault(asset.get("policy_id"), []).append(asset)
+    size += 1 + _cbor_head_size(lovelace) + _cbor_head_size(len(policies))
+    for policy_assets in policies.values():
+        size += _cbor_head_size(28) + 28 + _cbor_head_size(len(policy_assets))
+        for asset in policy_assets:
+            name_len = len(asset.get("asset_name", "")) // 2
+            size += _cbor_head_size(name_len) + name_len
+            size += _cbor_head_size(int(asset.get("quantity")))
+    return size
+
+
+def pack_payments(payments: list, max_size: int) -> list:
+    """Split a list of payments into consecutive batches whose estimated
+    output sizes fit within the given budget.
+
+    The payment order is preserved. A payment that is larger than the budget
+    on its own is placed in a batch by itself.
+
+    Parameters
+    ----------
+    payments : list
+        A list of payments in the cardano-wallet format.
+    max_size : int
+        The maximum number of bytes the outputs of a single transaction may
+        occupy.
+
+    Returns
+    -------
+    list
+        A list of batches, each a list of indices into payments.
+    """
+    batches = []
+    batch = []
+    batch_size = 0
+    for i, payment in enumerate(payments):
+        size = estimate_output_size(payment)
+        if batch and batch_size + size > max_size:
+            batches.append(batch)
+            batch = []
+            batch_size = 0
+        batch.append(i)
+        batch_size += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list of values."""
+    if not sorted_values:
+        return float("nan")
+    rank = int(round(pct / 100 * len(sorted_values))) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, rank))]
+
+
+def summarize(values: list) -> dict:
+    """Count, mean, p50, p90, p99 and max of a list of numbers (e.g. latencies or resource
+    usage samples)."""
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else float("nan"),
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": values[-1] if values else float("nan"),
+    }
+
+
+__all__ = [
+    "LogText",
+    "cbor",
+    "json_codec",
+    "progress",
+    "vrf",
+    "minimum_utxo",
+    "estimate_output_size",
+    "pack_payments",
+    "percentile",
+    "summarize",
+    "UtxoColumns",
+    "iter_snapshot_entries",
+    "bech32_decode",
+    "bech32_encode",
+]
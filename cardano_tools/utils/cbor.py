@@ -0,0 +1,91 @@
+"""A minimal CBOR (RFC 8949) encoder and decoder for the data model of Cardano transactions and
+key files: integers, byte and text strings, arrays, maps, booleans and null.
+
+Tags, floats and indefinite-length items are not supported.
+"""
+from typing import Any, Tuple
+
+
+def _head(major: int, value: int) -> bytes:
+    if value < 24:
+        return bytes([major << 5 | value])
+    for info, size in ((24, 1), (25, 2), (26, 4), (27, 8)):
+        if value < 1 << (8 * size):
+            return bytes([major << 5 | info]) + value.to_bytes(size, "big")
+    raise ValueError(f"Integer too large for CBOR: {value}")
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode a value as CBOR. Dict keys are encoded in insertion order."""
+    if obj is None:
+        return b"\xf6"
+    if obj is True or obj is False:
+        return b"\xf5" if obj else b"\xf4"
+    if isinstance(obj, int):
+        return _head(0, obj) if obj >= 0 else _head(1, -1 - obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return _head(2, len(obj)) + bytes(obj)
+    if isinstance(obj, str):
+        data = obj.encode()
+        return _head(3, len(data)) + data
+    if isinstance(obj, (list, tuple)):
+        return _head(4, len(obj)) + b"".join(dumps(item) for item in obj)
+    if isinstance(obj, dict):
+        return _head(5, len(obj)) + b"".join(dumps(k) + dumps(v) for k, v in obj.items())
+    raise TypeError(f"Cannot encode {type(obj).__name__} as CBOR")
+
+
+def _item(data: bytes, i: int) -> Tuple[Any, int]:
+    """Decode the item at data[i:]. Returns (item, index of the next item)."""
+    major, info = data[i] >> 5, data[i] & 31
+    i += 1
+    if major == 7:
+        simple = {20: False, 21: True, 22: None}
+        if info not in simple:
+            raise ValueError("Unsupported CBOR item")
+        return simple[info], i
+    if info < 24:
+        value = info
+    elif info <= 27:
+        size = 1 << (info - 24)
+        value = int.from_bytes(data[i : i + size], "big")
+        i += size
+    else:
+        raise ValueError("Unsupported CBOR item")
+    if major == 0:
+        return value, i
+    if major == 1:
+        return -1 - value, i
+    if major in (2, 3):
+        if i + value > len(data):
+            raise ValueError("Truncated CBOR item")
+        raw = data[i : i + value]
+        return (raw if major == 2 else raw.decode()), i + value
+    if major == 4:
+        items = []
+        for _ in range(value):
+            item, i = _item(data, i)
+            items.append(item)
+        return items, i
+    if major == 5:
+        items = {}
+        for _ in range(value):
+            key, i = _item(data, i)
+            entry, i = _item(data, i)
+            items[tuple(key) if isinstance(key, list) else key] = entry
+        return items, i
+    raise ValueError("Unsupported CBOR item")
+
+
+def loads(data: bytes) -> Any:
+    """Decode a CBOR item. Raises ValueError for malformed or unsupported data."""
+    try:
+        item, end = _item(data, 0)
+    except IndexError:
+        raise ValueError("Truncated CBOR item")
+    if end != len(data):
+        raise ValueError("Trailing data after CBOR item")
+    return item
+
+
+__all__ = ["dumps", "loads"]
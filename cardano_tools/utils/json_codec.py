@@ -0,0 +1,64 @@
+# Copyright (c) 2022 Viper Science LLC
+
+"""JSON decoding backed by the fastest library available.
+
+orjson or ujson are used when installed, otherwise the standard library json
+module. All backends accept bytes so response bodies may be decoded without
+first building an intermediate str.
+"""
+
+import json
+from typing import Any, Optional, Union
+
+BACKENDS = ("orjson", "ujson", "json")
+
+backend = None
+_loads = None
+
+
+def set_backend(name: Optional[str] = None) -> str:
+    """Select the JSON backend.
+
+    Parameters
+    ----------
+    name : str, optional
+        One of "orjson", "ujson" or "json". If not supplied, the first
+        installed backend (in that order) is used.
+
+    Returns
+    -------
+    str
+        The name of the selected backend.
+
+    Raises
+    ------
+    ValueError
+        If the requested backend is not supported.
+    ImportError
+        If the requested backend is not installed.
+    """
+    global backend, _loads
+    if name is not None and name not in BACKENDS:
+        raise ValueError(f"Unknown JSON backend: {name}")
+    for candidate in BACKENDS if name is None else (name,):
+        if candidate == "json":
+            backend, _loads = "json", json.loads
+            return backend
+        try:
+            module = __import__(candidate)
+        except ImportError:
+            if name is not None:
+                raise
+            continue
+        backend, _loads = candidate, module.loads
+        return backend
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode a JSON document from bytes or str."""
+    return _loads(data)
+
+
+set_backend()
+
+__all__ = ["BACKENDS", "backend", "set_backend", "loads"]
@@ -0,0 +1,62 @@
+"""Rate and ETA estimation for something that syncs towards 100 % progress, and the adaptive
+interval at which to poll it."""
+import time
+from collections import deque
+
+
+class ProgressEstimator:
+    """Estimates how fast a sync advances from a window of (time, progress, position) samples,
+    where position is an optional absolute measure of the same progress (e.g. a slot number).
+
+    The polling interval adapts to the estimates: a quarter of the ETA (within min_interval and
+    max_interval) while progress is being made, max_interval once done, and exponential backoff
+    while there is no progress or no data.
+    """
+
+    def __init__(self, min_interval: float, max_interval: float, window: int = 10):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.samples = deque(maxlen=window)
+        self.interval = min_interval
+
+    def add(self, progress: float, position: float = None, now: float = None) -> None:
+        """Record a sample (progress in percent) and adapt the polling interval."""
+        now = time.monotonic() if now is None else now
+        self.samples.append((now, progress, position))
+        eta = self.eta()
+        if progress >= 100.0:
+            interval = self.max_interval
+        elif eta is not None:
+            interval = eta / 4
+        else:
+            interval = self.interval * 2
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+
+    def backoff(self) -> None:
+        """Double the polling interval after a poll that returned no data."""
+        self.interval = min(self.interval * 2, self.max_interval)
+
+    def rates(self) -> tuple:
+        """(progress rate in percent per second, position rate per second) over the window, each
+        None with fewer than two samples (or no positions)."""
+        if len(self.samples) < 2:
+            return None, None
+        (t0, p0, x0), (t1, p1, x1) = self.samples[0], self.samples[-1]
+        if t1 <= t0:
+            return None, None
+        position_rate = (x1 - x0) / (t1 - t0) if None not in (x0, x1) else None
+        return (p1 - p0) / (t1 - t0), position_rate
+
+    def eta(self) -> float:
+        """Seconds until progress reaches 100 %, 0 once done, None if unknown."""
+        return self.time_to(100.0)
+
+    def time_to(self, threshold: float) -> float:
+        """Seconds until progress reaches threshold percent, None if unknown."""
+        if not self.samples:
+            return None
+        progress = self.samples[-1][1]
+        if progress >= threshold:
+            return 0.0
+        rate = self.rates()[0]
+        return (threshold - progress) / rate if rate is not None and rate > 0 else None
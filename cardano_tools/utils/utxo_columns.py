@@ -0,0 +1,128 @@
+"""Compact, columnar representation of a wallet UTxO snapshot.
+
+A snapshot of a large wallet is parsed incrementally, one entry at a time, from the chunks of the
+response body (or CLI output) into typed arrays holding the lovelace value, the minimum ADA and
+the number of assets of each UTxO, so that at most one entry exists as Python objects at any time.
+"""
+import codecs
+import json
+from array import array
+
+_WHITESPACE = " \t\n\r,"
+
+
+def iter_snapshot_entries(chunks):
+    """Yield the entries of a UTxO snapshot ({"entries": [...]}) one by one from an iterable of
+    bytes or str chunks, without decoding the whole document. Raises ValueError if the chunks end
+    before the list of entries does (a truncated or malformed snapshot)."""
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    in_entries = False
+    for chunk in chunks:
+        buffer += utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+        pos = 0
+        if not in_entries:
+            start = buffer.find("[")
+            if start < 0:
+                continue
+            pos, in_entries = start + 1, True
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == "]":
+                return
+            try:
+                entry, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The entry is incomplete, wait for the next chunk
+                break
+            yield entry
+        buffer = buffer[pos:]
+    buffer += utf8.decode(b"", final=True)
+    raise ValueError(f"Truncated or malformed UTxO snapshot near {buffer[:80]!r}")
+
+
+class UtxoColumns:
+    """The lovelace value, minimum ADA and asset count of every UTxO in a wallet, stored in
+    typed arrays (8 + 8 + 4 bytes per UTxO).
+
+    Usage:
+
+        utxos = UtxoColumns.from_chunks(response.iter_content(65536))
+        print(utxos.summary())
+    """
+
+    def __init__(self):
+        self.lovelace = array("Q")
+        self.ada_minimum = array("Q")
+        self.asset_count = array("I")
+
+    def __len__(self) -> int:
+        return len(self.lovelace)
+
+    def append(self, entry: dict) -> None:
+        """Add a snapshot entry."""
+        self.lovelace.append(entry.get("ada", {}).get("quantity", 0))
+        self.ada_minimum.append(entry.get("ada_minimum", {}).get("quantity", 0))
+        self.asset_count.append(len(entry.get("assets") or []))
+
+    @classmethod
+    def from_chunks(cls, chunks) -> "UtxoColumns":
+        """Parse a snapshot from an iterable of bytes or str chunks."""
+        columns = cls()
+        for entry in iter_snapshot_entries(chunks):
+            columns.append(entry)
+        return columns
+
+    @classmethod
+    def from_json(cls, text) -> "UtxoColumns":
+        """Parse a snapshot from a complete JSON document (bytes or str)."""
+        return cls.from_chunks([text])
+
+    def total(self) -> int:
+        """Total lovelace held in the UTxOs."""
+        return sum(self.lovelace)
+
+    def min_ada_overhead(self) -> int:
+        """Total lovelace locked as minimum ADA of the UTxOs."""
+        return sum(self.ada_minimum)
+
+    def token_utxo_count(self) -> int:
+        """Number of UTxOs holding native assets."""
+        return len(self.asset_count) - self.asset_count.count(0)
+
+    def distribution(self) -> dict:
+        """UTxO count per power of ten (the log10 scale of the wallet's UTxO statistics: a UTxO
+        is counted under the smallest power of ten at or above its value)."""
+        counts = {str(10**i): 0 for i in range(1, 17)}
+        for quantity in self.lovelace:
+            digits = min(len(str(quantity - 1)), 16) if quantity > 10 else 1
+            counts[str(10**digits)] += 1
+        return counts
+
+    def dust_count(self, threshold: int = 1_000_000) -> int:
+        """Number of UTxOs worth at most threshold lovelace."""
+        return sum(1 for quantity in self.lovelace if quantity <= threshold)
+
+    def fragmentation(self) -> float:
+        """How evenly the value is spread across UTxOs: 1 - sum(v_i^2) / (sum v_i)^2.
+        0.0 when all value is in a single UTxO, approaching 1.0 for many UTxOs of similar value."""
+        total = self.total()
+        if not total:
+            return 0.0
+        return 1.0 - sum(quantity * quantity for quantity in self.lovelace) / (total * total)
+
+    def summary(self, dust_threshold: int = 1_000_000) -> dict:
+        """All of the above in one dict."""
+        return {
+            "utxo_count": len(self),
+            "total_lovelace": self.total(),
+            "min_ada_overhead": self.min_ada_overhead(),
+            "token_utxo_count": self.token_utxo_count(),
+            "dust_count": self.dust_count(dust_threshold),
+            "fragmentation": self.fragmentation(),
+            "distribution": self.distribution(),
+        }
@@ -0,0 +1,216 @@
+"""ECVRF-ED25519-SHA512-Elligator2 (draft-irtf-cfrg-vrf-03), the VRF of the Cardano
+consensus protocols, in pure Python.
+
+Implements proving, verifying and the VRF output (beta) as computed by the libsodium fork used
+by cardano-node. Intended for computing leader schedules, not for signing blocks: the
+arithmetic is not constant time.
+"""
+import hashlib
+from typing import Optional, Tuple
+
+P = 2**255 - 19
+Q = 2**252 + 27742317777372353535851937790883648493  # order of the base point
+D = -121665 * pow(121666, P - 2, P) % P
+SQRT_M1 = pow(2, (P - 1) // 4, P)
+A = 486662  # Montgomery curve25519 coefficient
+SUITE = b"\x04"
+
+Point = Tuple[int, int, int, int]  # extended coordinates (X, Y, Z, T)
+IDENTITY = (0, 1, 1, 0)
+
+
+def _add(p1: Point, p2: Point) -> Point:
+    x1, y1, z1, t1 = p1
+    x2, y2, z2, t2 = p2
+    a = (y1 - x1) * (y2 - x2) % P
+    b = (y1 + x1) * (y2 + x2) % P
+    c = 2 * t1 * t2 * D % P
+    d = 2 * z1 * z2 % P
+    e, f, g, h = b - a, d - c, d + c, b + a
+    return (e * f % P, g * h % P, f * g % P, e * h % P)
+
+
+def _double(p1: Point) -> Point:
+    x1, y1, z1, _ = p1
+    a = x1 * x1 % P
+    b = y1 * y1 % P
+    c = 2 * z1 * z1 % P
+    h = a + b
+    e = h - (x1 + y1) * (x1 + y1)
+    g = a - b
+    f = c + g
+    return (e * f % P, g * h % P, f * g % P, e * h % P)
+
+
+def _negate(p1: Point) -> Point:
+    x1, y1, z1, t1 = p1
+    return (-x1 % P, y1, z1, -t1 % P)
+
+
+def _cached(p1: Point) -> Tuple[int, int, int, int]:
+    """A point in the form used as the second operand of _add_cached."""
+    x1, y1, z1, t1 = p1
+    return ((y1 + x1) % P, (y1 - x1) % P, 2 * z1 % P, 2 * D * t1 % P)
+
+
+def _add_cached(p1: Point, cached) -> Point:
+    x1, y1, z1, t1 = p1
+    yp, ym, z2, t2d = cached
+    a = (y1 - x1) * ym % P
+    b = (y1 + x1) * yp % P
+    c = t1 * t2d % P
+    d = z1 * z2 % P
+    e, f, g, h = b - a, d - c, d + c, b + a
+    return (e * f % P, g * h % P, f * g % P, e * h % P)
+
+
+def scalar_mult(k: int, point: Point) -> Point:
+    """k * point with a fixed 4-bit window."""
+    table = [point]
+    for _ in range(14):
+        table.append(_add(table[-1], point))
+    table = [None] + [_cached(p) for p in table]
+    result = IDENTITY
+    for shift in range(((k.bit_length() + 3) // 4 - 1) * 4, -1, -4):
+        # Four doublings, only the last one computes T (which is not an input of doubling)
+        x, y, z, _ = result
+        for _ in range(4):
+            a = x * x % P
+            b = y * y % P
+            c = 2 * z * z % P
+            h = a + b
+            e = h - (x + y) * (x + y)
+            g = a - b
+            f = c + g
+            x, y, z = e * f % P, g * h % P, f * g % P
+        result = (x, y, z, e * h % P)
+        digit = (k >> shift) & 15
+        if digit:
+            result = _add_cached(result, table[digit])
+    return result
+
+
+def _recover_x(y: int, sign: int) -> Optional[int]:
+    if y >= P:
+        return None
+    x2 = (y * y - 1) * pow(D * y * y + 1, P - 2, P) % P
+    if x2 == 0:
+        return None if sign else 0
+    x = pow(x2, (P + 3) // 8, P)
+    if (x * x - x2) % P != 0:
+        x = x * SQRT_M1 % P
+    if (x * x - x2) % P != 0:
+        return None
+    if (x & 1) != sign:
+        x = P - x
+    return x
+
+
+def decode_point(data: bytes) -> Optional[Point]:
+    """Decode a 32-byte point encoding (None if it is not a point on the curve)."""
+    if len(data) != 32:
+        return None
+    y = int.from_bytes(data, "little")
+    sign, y = y >> 255, y & ((1 << 255) - 1)
+    x = _recover_x(y, sign)
+    if x is None:
+        return None
+    return (x, y, 1, x * y % P)
+
+
+def encode_point(point: Point) -> bytes:
+    x, y, z, _ = point
+    zinv = pow(z, P - 2, P)
+    x, y = x * zinv % P, y * zinv % P
+    return (y | ((x & 1) << 255)).to_bytes(32, "little")
+
+
+BASE = decode_point((4 * pow(5, P - 2, P) % P).to_bytes(32, "little"))
+
+
+def _expand_secret(secret_key: bytes) -> Tuple[int, bytes, bytes]:
+    """The secret scalar, nonce prefix and public key of a 32-byte seed or a 64-byte
+    seed || public key secret key."""
+    h = hashlib.sha512(secret_key[:32]).digest()
+    x = int.from_bytes(h[:32], "little")
+    x = (x & ((1 << 254) - 8)) | (1 << 254)
+    return x, h[32:], encode_point(scalar_mult(x, BASE))
+
+
+def public_key(secret_key: bytes) -> bytes:
+    """The public (verification) key of a secret key."""
+    return _expand_secret(secret_key)[2]
+
+
+def hash_to_curve(pk: bytes, alpha: bytes) -> Point:
+    """ECVRF_hash_to_curve_elligator2_25519: map the public key and input to a point in the
+    prime order subgroup."""
+    r_string = bytearray(hashlib.sha512(SUITE + b"\x01" + pk + alpha).digest()[:32])
+    r_string[31] &= 0x7F
+    r = int.from_bytes(r_string, "little")
+    u = -A * pow(1 + 2 * r * r, P - 2, P) % P
+    w = u * (u * u + A * u + 1) % P
+    if pow(w, (P - 1) // 2, P) == P - 1:
+        u = (-u - A) % P
+    y = (u - 1) * pow(u + 1, P - 2, P) % P
+    point = decode_point(y.to_bytes(32, "little"))
+    return _double(_double(_double(point)))
+
+
+def _hash_points(*points: Point) -> int:
+    data = SUITE + b"\x02" + b"".join(encode_point(p) for p in points)
+    return int.from_bytes(hashlib.sha512(data).digest()[:16], "little")
+
+
+def _gamma_to_hash(gamma: Point) -> bytes:
+    return hashlib.sha512(SUITE + b"\x03" + encode_point(_double(_double(_double(gamma))))).digest()
+
+
+def prove(secret_key: bytes, alpha: bytes) -> bytes:
+    """The 80-byte VRF proof (pi) of alpha."""
+    x, prefix, pk = _expand_secret(secret_key)
+    h = hash_to_curve(pk, alpha)
+    gamma = scalar_mult(x, h)
+    k = int.from_bytes(hashlib.sha512(prefix + encode_point(h)).digest(), "little") % Q
+    c = _hash_points(h, gamma, scalar_mult(k, BASE), scalar_mult(k, h))
+    s = (k + c * x) % Q
+    return encode_point(gamma) + c.to_bytes(16, "little") + s.to_bytes(32, "little")
+
+
+def proof_to_hash(proof: bytes) -> bytes:
+    """The 64-byte VRF output (beta) of a proof."""
+    gamma = decode_point(proof[:32])
+    if gamma is None:
+        raise ValueError("Invalid VRF proof")
+    return _gamma_to_hash(gamma)
+
+
+def verify(pk: bytes, proof: bytes, alpha: bytes) -> Optional[bytes]:
+    """The VRF output (beta) if the proof of alpha is valid for the public key, else None."""
+    y = decode_point(pk)
+    gamma = decode_point(proof[:32])
+    if y is None or gamma is None or len(proof) != 80:
+        return None
+    c = int.from_bytes(proof[32:48], "little")
+    s = int.from_bytes(proof[48:], "little")
+    if s >= Q:
+        return None
+    h = hash_to_curve(pk, alpha)
+    u = _add(scalar_mult(s, BASE), _negate(scalar_mult(c, y)))
+    v = _add(scalar_mult(s, h), _negate(scalar_mult(c, gamma)))
+    if _hash_points(h, gamma, u, v) != c:
+        return None
+    return _gamma_to_hash(gamma)
+
+
+def output(secret_key: bytes, alpha: bytes, expanded=None) -> bytes:
+    """The VRF output (beta) of alpha, without computing the rest of the proof. expanded may
+    be the (scalar, public key) pair of the secret key from expand() to skip deriving it."""
+    x, pk = expanded if expanded is not None else expand(secret_key)
+    return _gamma_to_hash(scalar_mult(x, hash_to_curve(pk, alpha)))
+
+
+def expand(secret_key: bytes) -> Tuple[int, bytes]:
+    """The secret scalar and public key of a secret key, see output()."""
+    x, _, pk = _expand_secret(secret_key)
+    return x, pk
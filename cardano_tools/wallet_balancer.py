@@ -0,0 +1,235 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+# Cardano-Tools components
+from .wallet_tools import WalletHTTP
+
+_WALLET_ID = re.compile(r"v2/(?:wallets|byron-wallets|shared-wallets)/(\w+)")
+_SUBMIT = re.compile(r"v2/(?:wallets|byron-wallets|shared-wallets)/\w+/transactions(?:-submit)?$")
+_TX_ID = re.compile(r"v2/(?:wallets|byron-wallets|shared-wallets)/\w+/transactions/(\w+)")
+_RETRY_STATUS = (502, 503, 504)
+
+
+def _not_sent(error: requests.RequestException) -> bool:
+    """True if the request failed before it reached the server (no connection was made)."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class _Replica:
+    def __init__(self, url: str):
+        self.url = url
+        self.healthy = True
+        self.down_until = 0.0
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+
+
+class BalancedWalletHTTP(WalletHTTP):
+    """A WalletHTTP client spreading requests over several cardano-wallet replicas that serve
+    the same wallets (e.g. each restored from the same keys, against the same node).
+
+    Reads (GET requests) go to the healthy replica with the fewest outstanding requests and fail
+    over to the next one on connection errors and 502/503/504 responses. Writes for a wallet
+    (constructing, signing and submitting transactions, wallet changes) are pinned to one replica
+    chosen by rendezvous hashing of the wallet ID, so that the wallet's pending transactions live
+    on a single replica; they only fail over if the request could not be sent at all. Writes not
+    specific to a wallet go to the first healthy replica.
+
+    Replicas see a submitted transaction at different times, so for read_pin_time seconds after a
+    transaction is submitted, reads of that transaction go to the replica that accepted it
+    (read-your-writes) while it is available.
+
+    A replica that fails is taken out of rotation for down_time seconds. check_health() (run
+    every health_interval seconds in the background if given) queries every replica's network
+    information and marks the ones that are not synced as unhealthy.
+
+    Usage:
+
+        cw_http = BalancedWalletHTTP(
+            ["http://wallet-1:8090", "http://wallet-2:8090", "http://wallet-3:8090"]
+        )
+    """
+
+    def __init__(
+        self,
+        replicas: list,
+        cache=None,
+        limiter=None,
+        down_time: float = 10.0,
+        health_interval: float = None,
+        timeout: float = None,
+        read_pin_time: float = 60.0,
+    ):
+        """replicas are the base URLs (scheme, host and port) of the wallet servers."""
+        if not replicas:
+            raise ValueError("At least one wallet server replica is required")
+        super().__init__(cache=cache, limiter=limiter)
+        self.replicas = [_Replica(f"{url.rstrip('/')}/") for url in replicas]
+        self.wallet_url = self.replicas[0].url
+        self.down_time = down_time
+        self.timeout = timeout
+        self.read_pin_time = read_pin_time
+        self._pins = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_thread = None
+        if health_interval is not None:
+            self._health_thread = threading.Thread(
+                target=self._health_loop, args=(health_interval,), daemon=True
+            )
+            self._health_thread.start()
+
+    def replica_clients(self) -> list:
+        """A plain WalletHTTP client for each replica, e.g. to create a wallet on all of them."""
+        clients = []
+        for replica in self.replicas:
+            parts = urlsplit(replica.url)
+            host = f"[{parts.hostname}]" if ":" in parts.hostname else parts.hostname
+            port = parts.port or (443 if parts.scheme == "https" else 80)
+            client = WalletHTTP(f"{parts.scheme}://{host}", port, limiter=self.limiter)
+            # Keep any path prefix of the replica URL (e.g. behind a reverse proxy)
+            client.wallet_url = replica.url
+            clients.append(client)
+        return clients
+
+    def close(self) -> None:
+        """Stop the background health checks."""
+        self._stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join()
+
+    def _available(self, replica: _Replica, now: float) -> bool:
+        return replica.healthy and replica.down_until <= now
+
+    def _candidates(self, method: str, path: str) -> list:
+        """Replicas to try for a request, in order of preference."""
+        now = time.monotonic()
+        with self._lock:
+            if method.upper() == "GET":
+                ordered = sorted(
+                    self.replicas, key=lambda r: (not self._available(r, now), r.outstanding)
+                )
+                match = _TX_ID.match(path)
+                pinned, until = self._pins.get(match.group(1) if match else None, (None, 0.0))
+                if until > now and self._available(pinned, now):
+                    ordered.remove(pinned)
+                    ordered.insert(0, pinned)
+            else:
+                match = _WALLET_ID.match(path)
+                if match:
+                    wallet_id = match.group(1)
+                    ordered = sorted(
+                        self.replicas,
+                        key=lambda r: hashlib.blake2b(f"{r.url}{wallet_id}".encode()).digest(),
+                        reverse=True,
+                    )
+                else:
+                    ordered = list(self.replicas)
+                ordered.sort(key=lambda r: not self._available(r, now))
+        return ordered
+
+    def _pin(self, replica: _Replica, r: requests.Response) -> None:
+        """Pin reads of a just submitted transaction to the replica that accepted it."""
+        try:
+            tx_id = r.json().get("id")
+        except (ValueError, AttributeError):
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._pins = {k: v for k, v in self._pins.items() if v[1] > now}
+            if tx_id:
+                self._pins[tx_id] = (replica, now + self.read_pin_time)
+
+    def _mark_down(self, replica: _Replica, reason: str) -> None:
+        self.logger.warning(f"Wallet server {replica.url} failed ({reason}), taking it out")
+        with self._lock:
+            replica.failures += 1
+            replica.down_until = time.monotonic() + self.down_time
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        path = url[len(self.wallet_url) :] if url.startswith(self.wallet_url) else url
+        if self.timeout is not None:
+            kwargs.setdefault("timeout", self.timeout)
+        is_read = method.upper() == "GET"
+        error = None
+        for replica in self._candidates(method, path):
+            with self._lock:
+                replica.outstanding += 1
+                replica.requests += 1
+            try:
+                r = requests.request(method, f"{replica.url}{path}", **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # A write that reached the server may have been applied, so it is not retried
+                if not is_read and not _not_sent(e):
+                    raise
+                self._mark_down(replica, type(e).__name__)
+                error = e
+                continue
+            finally:
+                with self._lock:
+                    replica.outstanding -= 1
+            if is_read and r.status_code in _RETRY_STATUS:
+                self._mark_down(replica, f"status {r.status_code}")
+                error = r
+                continue
+            if not is_read and r.ok and _SUBMIT.match(path.split("?")[0]):
+                self._pin(replica, r)
+            return r
+        if isinstance(error, requests.Response):
+            return error
+        raise error
+
+    def check_health(self) -> dict:
+        """Query every replica's network information and mark replicas that do not respond or
+        are not synced with the node as unhealthy.
+
+        Returns
+        -------
+        dict
+            {replica URL: bool}
+        """
+        health = {}
+        for replica in self.replicas:
+            try:
+                r = requests.get(f"{replica.url}v2/network/information", timeout=5)
+                healthy = r.ok and r.json().get("sync_progress", {}).get("status") == "ready"
+            except (requests.RequestException, ValueError):
+                healthy = False
+            with self._lock:
+                if healthy and not self._available(replica, time.monotonic()):
+                    self.logger.info(f"Wallet server {replica.url} is healthy again")
+                if healthy:
+                    replica.down_until = 0.0
+                replica.healthy = healthy
+            health[replica.url] = healthy
+        return health
+
+    def _health_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.check_health()
+
+    def metrics(self) -> list:
+        """Per replica: URL, health, outstanding requests, total requests and failures."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "url": r.url,
+                    "healthy": self._available(r, now),
+                    "outstanding": r.outstanding,
+                    "requests": r.requests,
+                    "failures": r.failures,
+                }
+                for r in self.replicas
+            ]
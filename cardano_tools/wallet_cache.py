@@ -0,0 +1,316 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class WalletResponseCache:
+    """An LRU cache of wallet server responses for listings that only change when the wallet's
+    tip moves (assets, addresses).
+
+    Entries are keyed by wallet ID and endpoint URL and hold the raw response body, so that
+    every lookup decodes a fresh object and the memory budget is exact. All entries of a wallet
+    are dropped when the wallet reports a new tip. Since checking the tip is itself a request,
+    a wallet's tip is re-checked at most once every tip_ttl seconds (and whenever the wallet is
+    fetched through WalletHTTP.get_wallet). A response fetched before its wallet's entries were
+    dropped is not stored, see generation.
+
+    Usage:
+
+        wallet = WalletHTTP(cache=WalletResponseCache(max_bytes=256 * 2**20))
+    """
+
+    def __init__(self, max_bytes: int = 64 * 2**20, tip_ttl: float = 5.0):
+        self.max_bytes = max_bytes
+        self.tip_ttl = tip_ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._tips = {}
+        self._counter = 0
+        self._dropped = {}
+        self._dropped_all = 0
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, wallet_id: str, key: str) -> bytes:
+        """Returns the cached response body, or None."""
+        with self._lock:
+            content = self._entries.get((wallet_id, key))
+            if content is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((wallet_id, key))
+            self.hits += 1
+            return content
+
+    def generation(self, wallet_id: str) -> int:
+        """A number that changes whenever the wallet's entries are dropped. Take it before
+        requesting a response and pass it to put, so that a response fetched before the tip
+        moved is not stored as fresh."""
+        with self._lock:
+            return max(self._dropped.get(wallet_id, 0), self._dropped_all)
+
+    def put(self, wallet_id: str, key: str, content: bytes, generation: int = None) -> None:
+        """Store a response body, evicting the least recently used entries to stay within
+        the memory budget. Bodies larger than the whole budget are not stored, nor are bodies
+        requested in an earlier generation of the wallet's entries."""
+        if len(content) > self.max_bytes:
+            return
+        with self._lock:
+            current = max(self._dropped.get(wallet_id, 0), self._dropped_all)
+            if generation is not None and generation != current:
+                self.logger.debug(f"Not caching a stale response for wallet {wallet_id}")
+                return
+            old = self._entries.pop((wallet_id, key), None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[(wallet_id, key)] = content
+            self.size += len(content)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def invalidate(self, wallet_id: str = None) -> None:
+        """Drop the entries of one wallet, or of all wallets."""
+        with self._lock:
+            for cache_key in list(self._entries):
+                if wallet_id is None or cache_key[0] == wallet_id:
+                    self.size -= len(self._entries.pop(cache_key))
+            self._counter += 1
+            if wallet_id is None:
+                self._tips.clear()
+                self._dropped_all = self._counter
+            else:
+                self._tips.pop(wallet_id, None)
+                self._dropped[wallet_id] = self._counter
+
+    def tip_is_stale(self, wallet_id: str) -> bool:
+        """True if the wallet's tip has not been checked within tip_ttl seconds."""
+        with self._lock:
+            checked = self._tips.get(wallet_id)
+        return checked is None or time.monotonic() - checked[1] > self.tip_ttl
+
+    def update_tip(self, wallet_id: str, tip: int) -> None:
+        """Record the wallet's current tip (absolute slot), dropping the wallet's entries if
+        the tip has moved since they were cached."""
+        with self._lock:
+            previous = self._tips.get(wallet_id)
+            self._tips[wallet_id] = (tip, time.monotonic())
+        if previous is not None and previous[0] != tip:
+            self.logger.debug(f"Tip of wallet {wallet_id} moved to {tip}, invalidating cache")
+            with self._lock:
+                for cache_key in [k for k in self._entries if k[0] == wallet_id]:
+                    self.size -= len(self._entries.pop(cache_key))
+                self._counter += 1
+                self._dropped[wallet_id] = self._counter
+
+    def stats(self) -> dict:
+        """Cache hit/miss counters and memory use."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class StakePoolCache:
+    """Epoch-scoped cache of the stake pool ranking returned by WalletHTTP.list_stake_pools.
+
+    The ranking only changes once per epoch, so the pool list is fetched at most once per epoch
+    for each point of a logarithmic stake grid (buckets_per_decade points per power of ten).
+    For a stake between two grid points, every pool's reward per delegated lovelace is
+    interpolated (in log stake) between the listings of the two points and the pools are
+    re-ranked, so that pools approaching saturation drop in the ranking as the stake grows. The
+    ranking is exact on the grid and an estimate in between. Filters on saturation, margin,
+    pledge and cost are served from an in-memory index of the pools.
+
+    Usage:
+
+        pools = StakePoolCache(WalletHTTP())
+        best = pools.list_stake_pools(2_500_000_000, max_saturation=0.9, max_margin=2.0)
+    """
+
+    def __init__(self, wallet, buckets_per_decade: int = 4, epoch_check_interval: float = 60.0):
+        self.wallet = wallet
+        self.buckets_per_decade = buckets_per_decade
+        self.epoch_check_interval = epoch_check_interval
+        self.epoch = None
+        self._epoch_checked = None
+        self._rankings = {}
+        self._index = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def _check_epoch(self) -> None:
+        """Drop all cached rankings when a new epoch starts (checked at most once per
+        epoch_check_interval seconds)."""
+        now = time.monotonic()
+        with self._lock:
+            if (
+                self._epoch_checked is not None
+                and now - self._epoch_checked < self.epoch_check_interval
+            ):
+                return
+            self._epoch_checked = now
+        info = self.wallet.get_network_info()
+        epoch = info.get("network_tip", {}).get("epoch_number") if info else None
+        if epoch is None:
+            self.logger.warning("Unable to determine the current epoch.")
+            return
+        with self._lock:
+            if epoch != self.epoch:
+                self.logger.info(f"Epoch {epoch} started, clearing the stake pool cache")
+                self.epoch = epoch
+                self._rankings.clear()
+                self._index.clear()
+
+    def _grid(self, lovelace_to_stake: int) -> tuple:
+        """The grid points (lovelace) at or below and above the given stake (the same point
+        twice if the stake is on the grid)."""
+        if lovelace_to_stake <= 0:
+            return 0, 0
+
+        def point(i):
+            return int(round(10 ** (i / self.buckets_per_decade)))
+
+        n = math.floor(math.log10(lovelace_to_stake) * self.buckets_per_decade)
+        while point(n) > lovelace_to_stake:
+            n -= 1
+        while point(n + 1) <= lovelace_to_stake:
+            n += 1
+        low = point(n)
+        return low, low if low == lovelace_to_stake else point(n + 1)
+
+    def _ranking(self, stake: int) -> list:
+        """The ranked pool list for a grid point, fetched if needed. The network request is
+        made without holding the lock, so lookups are not blocked by a fetch."""
+        with self._lock:
+            epoch = self.epoch
+            if stake in self._rankings:
+                return self._rankings[stake]
+        pools = self.wallet.list_stake_pools(stake)
+        if not pools:
+            return []
+        with self._lock:
+            if self.epoch != epoch:  # A new epoch started during the fetch
+                return pools
+            ranking = self._rankings.setdefault(stake, pools)
+            for pool in ranking:
+                self._index.setdefault(pool.get("id"), pool)
+            return ranking
+
+    @staticmethod
+    def _rewards(pool: dict) -> int:
+        return pool.get("metrics", {}).get("non_myopic_member_rewards", {}).get("quantity", 0)
+
+    def list_stake_pools(
+        self,
+        lovelace_to_stake: int,
+        max_saturation: float = None,
+        max_margin: float = None,
+        min_pledge: int = None,
+        max_cost: int = None,
+        limit: int = None,
+    ) -> list:
+        """List stake pools ordered by descending non_myopic_member_rewards for the given stake.
+
+        The rewards are exact for stakes on the grid and interpolated from the listings of the
+        grid points around the stake otherwise.
+
+        Parameters
+        ----------
+        lovelace_to_stake : int
+            The stake to be delegated (lovelace).
+        max_saturation : float, optional
+            Exclude pools whose saturation (1.0 = saturated) is above this.
+        max_margin : float, optional
+            Exclude pools whose margin (percent) is above this.
+        min_pledge : int, optional
+            Exclude pools pledging less than this (lovelace).
+        max_cost : int, optional
+            Exclude pools whose fixed cost is above this (lovelace).
+        limit : int, optional
+            Return at most this many pools.
+
+        Returns
+        -------
+        list
+            Pool dicts in the WalletHTTP.list_stake_pools format.
+        """
+        self._check_epoch()
+        low, high = self._grid(lovelace_to_stake)
+        lower = self._ranking(low)
+        upper = {p.get("id"): p for p in self._ranking(high)} if high != low else {}
+        weight = math.log(lovelace_to_stake / low) / math.log(high / low) if high != low else 0.0
+        pools = []
+        for pool in lower:
+            if not self._matches(pool, max_saturation, max_margin, min_pledge, max_cost):
+                continue
+            rewards = self._rewards(pool)
+            if pool.get("id") in upper:
+                # Reward per lovelace, which only changes as the pool approaches saturation
+                low_yield = rewards / low
+                high_yield = self._rewards(upper[pool.get("id")]) / high
+                rewards = (low_yield + (high_yield - low_yield) * weight) * lovelace_to_stake
+            metrics = pool.get("metrics", {})
+            pools.append(
+                dict(
+                    pool,
+                    metrics=dict(
+                        metrics,
+                        non_myopic_member_rewards={"quantity": int(rewards), "unit": "lovelace"},
+                    ),
+                )
+            )
+        pools.sort(key=lambda p: -p["metrics"]["non_myopic_member_rewards"]["quantity"])
+        return pools[:limit] if limit is not None else pools
+
+    def filter_pools(
+        self,
+        max_saturation: float = None,
+        max_margin: float = None,
+        min_pledge: int = None,
+        max_cost: int = None,
+    ) -> list:
+        """Pools (from any cached ranking of this epoch) matching the filters, unranked."""
+        with self._lock:
+            pools = list(self._index.values())
+        return [
+            p for p in pools if self._matches(p, max_saturation, max_margin, min_pledge, max_cost)
+        ]
+
+    def get_pool(self, pool_id: str) -> dict:
+        """Look up a pool in the cached listings of this epoch."""
+        with self._lock:
+            return self._index.get(pool_id, {})
+
+    def invalidate(self) -> None:
+        """Drop all cached rankings."""
+        with self._lock:
+            self._rankings.clear()
+            self._index.clear()
+            self._epoch_checked = None
+
+    @staticmethod
+    def _matches(pool, max_saturation, max_margin, min_pledge, max_cost) -> bool:
+        if max_saturation is not None and pool["metrics"]["saturation"] > max_saturation:
+            return False
+        if max_margin is not None and pool["margin"]["quantity"] > max_margin:
+            return False
+        if min_pledge is not None and pool["pledge"]["quantity"] < min_pledge:
+            return False
+        if max_cost is not None and pool["cost"]["quantity"] > max_cost:
+            return False
+        return True
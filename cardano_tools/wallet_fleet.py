@@ -0,0 +1,266 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Cardano-Tools components
+from .wallet_sync import WalletSyncWaiter
+from .wallet_tools import WalletHTTP
+
+
+class WalletFleet:
+    """Operations spanning every wallet known to a cardano-wallet server. Per-wallet requests are
+    issued concurrently (bounded by max_workers) and a failure for one wallet is reported alongside
+    the results for the others rather than aborting the whole operation.
+    """
+
+    def __init__(self, wallet: WalletHTTP, max_workers: int = 16):
+        self.wallet = wallet
+        self.max_workers = max_workers
+        self.logger = logging.getLogger(__name__)
+
+    def map(self, func, wallet_ids: list) -> tuple:
+        """Call func(wallet_id) for each wallet ID concurrently.
+
+        Parameters
+        ----------
+        func : callable
+            Function taking a wallet ID. A falsy return value (the WalletHTTP
+            convention for a bad response) is treated as a failure.
+        wallet_ids : list
+            The wallet IDs.
+
+        Returns
+        -------
+        (dict, dict)
+            The results and the error messages, each keyed by wallet ID.
+        """
+
+        def call(wallet_id):
+            try:
+                result = func(wallet_id)
+            except Exception as e:
+                return wallet_id, None, f"{type(e).__name__}: {e}"
+            if not result:
+                return wallet_id, None, "No data returned by the wallet server"
+            return wallet_id, result, None
+
+        results, errors = {}, {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for wallet_id, result, error in executor.map(call, wallet_ids):
+                if error is None:
+                    results[wallet_id] = result
+                else:
+                    self.logger.warning(f"Wallet {wallet_id} failed: {error}")
+                    errors[wallet_id] = error
+        return results, errors
+
+    def snapshot(self, dust_threshold: int = 1_000_000) -> dict:
+        """Gather the balances, sync state, assets and UTxO statistics of all wallets and
+        aggregate them.
+
+        The wallet listing already carries balances, assets and sync state, so only the UTxO
+        statistics require a request per wallet.
+
+        Parameters
+        ----------
+        dust_threshold : int, optional
+            UTxOs in distribution buckets at or below this value (lovelace)
+            are counted as dust.
+
+        Returns
+        -------
+        dict
+            {
+                "wallets": {wallet_id: {...}},  # per-wallet summary
+                "total_lovelace": int,
+                "available_lovelace": int,
+                "reward_lovelace": int,
+                "tokens": {policy_id: {asset_name: int}},
+                "utxo_count": int,
+                "dust_count": int,
+                "not_ready": [wallet_id, ...],
+                "errors": {wallet_id: str},
+                "elapsed": float,  # seconds
+            }
+        """
+        start_time = time.time()
+        wallets = self.wallet.get_all_wallets() or []
+        stats, errors = self.map(self.wallet.get_utxo_stats, [w.get("id") for w in wallets])
+
+        snapshot = {
+            "wallets": {},
+            "total_lovelace": 0,
+            "available_lovelace": 0,
+            "reward_lovelace": 0,
+            "tokens": {},
+            "utxo_count": 0,
+            "dust_count": 0,
+            "not_ready": [],
+            "errors": errors,
+        }
+        for wallet in wallets:
+            wallet_id = wallet.get("id")
+            balance = wallet.get("balance", {})
+            state = wallet.get("state", {})
+            summary = {
+                "name": wallet.get("name"),
+                "total_lovelace": balance.get("total", {}).get("quantity", 0),
+                "available_lovelace": balance.get("available", {}).get("quantity", 0),
+                "reward_lovelace": balance.get("reward", {}).get("quantity", 0),
+                "status": state.get("status"),
+                "progress": state.get("progress", {}).get("quantity", 100.0),
+                "tokens": {},
+                "utxo_count": None,
+                "dust_count": None,
+            }
+            for asset in wallet.get("assets", {}).get("total", []):
+                policy = summary["tokens"].setdefault(asset.get("policy_id"), {})
+                policy[asset.get("asset_name")] = asset.get("quantity")
+                totals = snapshot["tokens"].setdefault(asset.get("policy_id"), {})
+                totals[asset.get("asset_name")] = totals.get(
+                    asset.get("asset_name"), 0
+                ) + asset.get("quantity")
+            if wallet_id in stats:
+                distribution = stats[wallet_id].get("distribution", {})
+                summary["utxo_count"] = sum(distribution.values())
+                summary["dust_count"] = sum(
+                    count for bound, count in distribution.items() if int(bound) <= dust_threshold
+                )
+                snapshot["utxo_count"] += summary["utxo_count"]
+                snapshot["dust_count"] += summary["dust_count"]
+            if summary["status"] != "ready":
+                snapshot["not_ready"].append(wallet_id)
+            snapshot["total_lovelace"] += summary["total_lovelace"]
+            snapshot["available_lovelace"] += summary["available_lovelace"]
+            snapshot["reward_lovelace"] += summary["reward_lovelace"]
+            snapshot["wallets"][wallet_id] = summary
+
+        snapshot["elapsed"] = time.time() - start_time
+        self.logger.info(
+            f"Fleet snapshot of {len(wallets)} wallets in {snapshot['elapsed']:.2f} s "
+            f"({len(errors)} errors)"
+        )
+        return snapshot
+
+    def wait_until_ready(self, wallet_ids: list, timeout: float = 3600, pause: float = 5) -> dict:
+        """Wait until all of the given wallets report the "ready" state.
+
+        The wallets are polled by a WalletSyncWaiter, which adapts the time between checks of
+        each wallet to its sync progress, up to pause seconds.
+
+        Returns
+        -------
+        dict
+            The last known state status of each wallet ID ("ready", "syncing",
+            "not_responding" or "missing"). Wallets other than "ready" did not
+            finish syncing before the timeout.
+        """
+        waiter = WalletSyncWaiter(
+            self.wallet, wallet_ids, min_interval=min(1.0, pause), max_interval=pause
+        )
+        return waiter.wait(timeout)
+
+    def provision_iter(self, specs: list):
+        """Create or restore wallets concurrently, yielding a progress record as each wallet
+        creation request completes (in completion order).
+
+        Each spec is a dict holding either
+          {"name": str, "recovery_phrase": list[str], "passphrase": str,
+           "secondary_phrase": list[str] (optional)}
+        or
+          {"name": str, "xpub_key": str}
+        and optionally "address_pool_gap".
+
+        Yields
+        ------
+        dict
+            {"index": int, "name": str, "wallet_id": str or None,
+             "error": str or None, "completed": int, "total": int}
+        """
+
+        def create(spec):
+            gap = spec.get("address_pool_gap", 20)
+            if spec.get("xpub_key"):
+                return self.wallet.create_wallet_from_key(spec["name"], spec["xpub_key"], gap)
+            return self.wallet.create_wallet(
+                spec["name"],
+                spec["recovery_phrase"],
+                spec["passphrase"],
+                spec.get("secondary_phrase"),
+                gap,
+            )
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(create, spec): i for i, spec in enumerate(specs)}
+            for completed, future in enumerate(as_completed(futures), 1):
+                index = futures[future]
+                record = {
+                    "index": index,
+                    "name": specs[index].get("name"),
+                    "wallet_id": None,
+                    "error": None,
+                    "completed": completed,
+                    "total": len(specs),
+                }
+                try:
+                    wallet = future.result()
+                except Exception as e:
+                    record["error"] = f"{type(e).__name__}: {e}"
+                else:
+                    if wallet:
+                        record["wallet_id"] = wallet.get("id")
+                    else:
+                        record["error"] = "Wallet creation rejected by the wallet server"
+                yield record
+
+    def provision(
+        self,
+        specs: list,
+        wait: bool = True,
+        timeout: float = 3600,
+        pause: float = 5,
+        progress=None,
+    ) -> list:
+        """Create or restore many wallets concurrently and optionally wait for them to sync.
+
+        Parameters
+        ----------
+        specs : list
+            Wallet specifications, see provision_iter.
+        wait : bool, optional
+            Wait for the created wallets to report the "ready" state.
+        timeout : float, optional
+            Maximum time to wait for the wallets to sync (seconds).
+        pause : float, optional
+            Time between sync checks (seconds).
+        progress : callable, optional
+            Called with each progress record from provision_iter.
+
+        Returns
+        -------
+        list
+            One record per spec, in the order of specs, with the keys "name",
+            "wallet_id", "status" and "error". A wallet that was created but
+            did not sync before the timeout has a status other than "ready".
+        """
+        results = [None] * len(specs)
+        for record in self.provision_iter(specs):
+            if progress is not None:
+                progress(record)
+            results[record["index"]] = {
+                "name": record["name"],
+                "wallet_id": record["wallet_id"],
+                "status": "created" if record["wallet_id"] else "failed",
+                "error": record["error"],
+            }
+        created = [r["wallet_id"] for r in results if r["wallet_id"]]
+        self.logger.info(f"Created {len(created)} of {len(specs)} wallets")
+
+        if wait and created:
+            statuses = self.wait_until_ready(created, timeout, pause)
+            for result in results:
+                if result["wallet_id"]:
+                    result["status"] = statuses[result["wallet_id"]]
+                    if result["status"] != "ready":
+                        result["error"] = "Wallet did not finish syncing before the timeout"
+        return results
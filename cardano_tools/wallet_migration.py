@@ -0,0 +1,236 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Cardano-Tools components
+from .utils import bech32_decode, cbor
+from .wallet_tools import WalletHTTP
+
+
+class WalletMigration:
+    """Migrates the full balance of a wallet to other addresses in chunks, with progress reporting,
+    checkpoints on disk and resumption after a crash.
+
+    cardano-wallet executes a whole migration plan in a single blocking request. Here the plan is
+    executed a chunk (chunk_size selections of the plan) at a time instead. Each selection becomes
+    a transaction spending exactly the selection's inputs and paying exactly its outputs and fee,
+    which the wallet balances (a no-op unless its fee estimate changed), signs and submits. The
+    selections of a plan never share inputs, so the transactions of a chunk are processed
+    concurrently, and every submitted transaction is recorded in the checkpoint file. The plan is
+    re-created before each chunk from the wallet's remaining UTxO, so a migration restarted with
+    the same checkpoint file continues where it stopped.
+
+    The last chunk (or the rest of the migration, if a chunk fails) is left to the wallet's own
+    migration endpoint, as is the whole migration if the plan pays addresses that cannot be
+    encoded here (e.g. Byron addresses), which is checked before anything is submitted.
+
+    Usage:
+
+        migration = WalletMigration(WalletHTTP(), wallet_id, [dest_address], passphrase,
+                                    checkpoint_path="migration.json")
+        result = migration.run(progress=print)
+    """
+
+    def __init__(
+        self,
+        wallet: WalletHTTP,
+        wallet_id: str,
+        dest_addresses: list,
+        passphrase: str,
+        checkpoint_path: str = None,
+        chunk_size: int = 4,
+        max_workers: int = 4,
+    ):
+        self.wallet = wallet
+        self.wallet_id = wallet_id
+        self.dest_addresses = dest_addresses
+        self.passphrase = passphrase
+        self.checkpoint_path = checkpoint_path
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.logger = logging.getLogger(__name__)
+        self.state = self._load_checkpoint()
+        self._lock = threading.Lock()
+
+    def _load_checkpoint(self) -> dict:
+        state = {
+            "wallet_id": self.wallet_id,
+            "addresses": self.dest_addresses,
+            "transactions": [],
+            "status": "pending",
+        }
+        if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+            return state
+        with open(self.checkpoint_path, "r") as checkpoint:
+            saved = json.load(checkpoint)
+        if saved.get("wallet_id") != self.wallet_id or saved.get("addresses") != list(
+            self.dest_addresses
+        ):
+            raise ValueError(
+                f"Checkpoint {self.checkpoint_path} belongs to a different migration "
+                f"(wallet {saved.get('wallet_id')})"
+            )
+        self.logger.info(
+            f"Resuming migration of wallet {self.wallet_id} after "
+            f"{len(saved.get('transactions', []))} transactions"
+        )
+        return saved
+
+    def _save_checkpoint(self) -> None:
+        """Write the state atomically so that a crash never leaves a partial checkpoint."""
+        if self.checkpoint_path is None:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as checkpoint:
+            json.dump(self.state, checkpoint, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    @staticmethod
+    def _partial_tx(selection: dict) -> str:
+        """The transaction of a plan selection (inputs, outputs and fee), unsigned, as base16
+        CBOR."""
+        inputs = [[bytes.fromhex(i["id"]), i["index"]] for i in selection["inputs"]]
+        outputs = []
+        for output in selection["outputs"]:
+            hrp, data = bech32_decode(output["address"])
+            if hrp is None:
+                raise ValueError(f"Not a Shelley address: {output['address']}")
+            assets = {}
+            for asset in output.get("assets", []):
+                policy = assets.setdefault(bytes.fromhex(asset["policy_id"]), {})
+                policy[bytes.fromhex(asset["asset_name"])] = asset["quantity"]
+            lovelace = output["amount"]["quantity"]
+            outputs.append([bytes(data), [lovelace, assets] if assets else lovelace])
+        body = {0: inputs, 1: outputs, 2: selection["fee"]["quantity"]}
+        return cbor.dumps([body, {}, True, None]).hex()
+
+    @staticmethod
+    def _encodable(selections: list) -> bool:
+        """True if every output address of the selections is a bech32 (Shelley) address, which
+        _partial_tx can encode."""
+        return all(
+            bech32_decode(output["address"])[0] is not None
+            for selection in selections
+            for output in selection["outputs"]
+        )
+
+    def _execute(self, selection: dict) -> str:
+        """Balance, sign and submit the transaction of a plan selection. Returns its ID, or None
+        if any step failed."""
+        balanced = self.wallet.balance_transaction(self.wallet_id, self._partial_tx(selection))
+        if not balanced:
+            return None
+        signed = self.wallet.sign_transaction(
+            self.wallet_id, self.passphrase, balanced.get("transaction")
+        )
+        if not signed:
+            return None
+        submitted = self.wallet.submit_transaction(self.wallet_id, signed.get("transaction"))
+        return submitted.get("id") if submitted else None
+
+    def _record(self, tx_id: str, lovelace: int, method: str, remaining: int, progress) -> None:
+        with self._lock:
+            self.state["transactions"].append(
+                {"tx_id": tx_id, "lovelace": lovelace, "method": method}
+            )
+            self._save_checkpoint()
+            completed = len(self.state["transactions"])
+        if progress is not None:
+            progress(
+                {
+                    "tx_id": tx_id,
+                    "lovelace": lovelace,
+                    "completed": completed,
+                    "remaining": remaining,
+                }
+            )
+
+    def _run_chunk(self, selections: list, remaining: int, progress) -> bool:
+        """Execute the selections of one chunk concurrently. Returns False if any of them could
+        not be submitted."""
+        pending = [remaining]
+
+        def execute(selection):
+            try:
+                tx_id = self._execute(selection)
+            except ValueError as e:
+                self.logger.error(f"Unable to build the transaction of a selection: {e}")
+                return False
+            if tx_id is None:
+                return False
+            lovelace = sum(o.get("amount", {}).get("quantity", 0) for o in selection["outputs"])
+            with self._lock:
+                pending[0] -= 1
+                left = pending[0]
+            self._record(tx_id, lovelace, "chunk", left, progress)
+            return True
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return all(list(executor.map(execute, selections)))
+
+    def _sweep(self, remaining: int, progress) -> bool:
+        """Migrate whatever is left with the wallet's own migration endpoint."""
+        txs = self.wallet.migrate_wallet(self.wallet_id, self.passphrase, self.dest_addresses)
+        if not txs:
+            return False
+        for n, tx in enumerate(txs):
+            lovelace = tx.get("amount", {}).get("quantity", 0)
+            self._record(tx.get("id"), lovelace, "sweep", max(remaining - n - 1, 0), progress)
+        return True
+
+    def run(self, progress=None) -> dict:
+        """Run (or resume) the migration until the wallet has nothing left to migrate.
+
+        Parameters
+        ----------
+        progress : callable, optional
+            Called after every submitted transaction with {"tx_id": str, "lovelace": int,
+            "completed": int, "remaining": int}, where remaining is the number of
+            transactions the current plan still expects.
+
+        Returns
+        -------
+        dict
+            The checkpoint state: {"wallet_id", "addresses", "transactions": [{"tx_id",
+            "lovelace", "method"}], "status": "complete" or "failed", "balance_leftover": int}.
+        """
+        if self.state["status"] == "complete":
+            self.logger.info(f"Migration of wallet {self.wallet_id} already complete")
+            return self.state
+        while True:
+            plan = self.wallet.create_migration_plan(self.wallet_id, self.dest_addresses)
+            selections = plan.get("selections", []) if plan else []
+            self.state["balance_leftover"] = (
+                plan.get("balance_leftover", {}).get("ada", {}).get("quantity", 0) if plan else 0
+            )
+            if not selections:
+                # An empty (or refused) plan means there is nothing left that can be migrated
+                self.state["status"] = "complete" if self.state["transactions"] else "failed"
+                break
+            self.logger.info(
+                f"Migrating wallet {self.wallet_id}: {len(selections)} transactions remaining"
+            )
+            if len(selections) <= self.chunk_size or not self._encodable(selections):
+                if len(selections) > self.chunk_size:
+                    self.logger.warning(
+                        "The plan pays addresses other than Shelley addresses, migrating with "
+                        "the wallet's migration endpoint at once"
+                    )
+                ok = self._sweep(len(selections), progress)
+                self.state["status"] = "complete" if ok else "failed"
+                break
+            if not self._run_chunk(selections[: self.chunk_size], len(selections), progress):
+                self.logger.warning("Chunk could not be completed, migrating the remainder at once")
+                plan = self.wallet.create_migration_plan(self.wallet_id, self.dest_addresses)
+                remaining = len(plan.get("selections", [])) if plan else 0
+                ok = remaining == 0 or self._sweep(remaining, progress)
+                self.state["status"] = "complete" if ok else "failed"
+                break
+        self._save_checkpoint()
+        self.logger.info(
+            f"Migration of wallet {self.wallet_id} {self.state['status']} after "
+            f"{len(self.state['transactions'])} transactions"
+        )
+        return self.state
@@ -0,0 +1,283 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import requests
+
+# Cardano-Tools components
+from .utils import summarize
+from .wallet_tools import WalletHTTP
+
+_STOP = object()
+
+# Status codes of responses worth retrying: rate limited or a server-side failure
+_RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class _Job:
+    """A transaction moving through the pipeline."""
+
+    def __init__(self, wallet_id, payload, passphrase, seq):
+        self.wallet_id = wallet_id
+        self.payload = payload
+        self.passphrase = passphrase
+        self.seq = seq
+        self.future = Future()
+        self.enqueued = time.monotonic()
+        self.constructed = None
+        self.inputs = set()
+        self.signed = None
+        self.error = None
+        self.stage = None
+        self.attempts = 0
+
+
+class TransactionPipeline:
+    """Overlaps the construct, sign and submit round trips of many transactions.
+
+    Each stage has its own pool of worker threads connected by bounded queues, so while one
+    transaction is being submitted others are being signed and constructed. Adding work blocks
+    once the queues are full (backpressure).
+
+    Transactions of the same wallet are submitted in the order they were added. Since
+    cardano-wallet does not reserve the inputs of constructed (but not yet submitted)
+    transactions, a transaction whose inputs overlap one already submitted by the pipeline is
+    constructed and signed again before it is submitted.
+
+    Calls that fail to connect or time out, or that are answered with 429 or a 5xx status, are
+    retried up to `retries` times with exponential backoff. Other failures (e.g. a rejected
+    payload or insufficient funds) fail the transaction at once. Latency statistics cover the
+    last `latency_window` transactions of each stage.
+
+    Usage:
+
+        with TransactionPipeline(WalletHTTP()) as pipeline:
+            futures = [pipeline.add(wallet_id, payload, passphrase) for payload in payloads]
+        results = [f.result() for f in futures]
+    """
+
+    STAGES = ("construct", "sign", "submit")
+
+    def __init__(
+        self,
+        wallet: WalletHTTP,
+        construct_workers: int = 8,
+        sign_workers: int = 4,
+        submit_workers: int = 4,
+        queue_size: int = 64,
+        retries: int = 3,
+        backoff: float = 0.5,
+        latency_window: int = 10_000,
+    ):
+        self.wallet = wallet
+        self.retries = retries
+        self.backoff = backoff
+        self.logger = logging.getLogger(__name__)
+        self._construct_queue = queue.Queue(queue_size)
+        self._sign_queue = queue.Queue(queue_size)
+        self._submit_queues = [queue.Queue(queue_size) for _ in range(submit_workers)]
+        self._n_construct = construct_workers
+        self._n_sign = sign_workers
+        self._threads = []
+        self._seq = {}
+        self._seq_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._latencies = {
+            stage: deque(maxlen=latency_window) for stage in self.STAGES + ("total",)
+        }
+        self._counts = {"submitted": 0, "failed": 0, "rebuilt": 0, "retried": 0}
+
+    def start(self) -> "TransactionPipeline":
+        """Start the worker threads."""
+        workers = (
+            [(self._construct_worker, ())] * self._n_construct
+            + [(self._sign_worker, ())] * self._n_sign
+            + [(self._submit_worker, (q,)) for q in self._submit_queues]
+        )
+        for target, args in workers:
+            thread = threading.Thread(target=target, args=args, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def add(self, wallet_id: str, payload: dict, passphrase: str) -> Future:
+        """Queue a transaction (a construct_transaction payload) for the given wallet.
+
+        Blocks while the pipeline is full.
+
+        Returns
+        -------
+        Future
+            Resolves to {"wallet_id": str, "tx_id": str or None, "status": "submitted" or
+            "failed", "stage": failing stage or None, "error": str or None, "attempts": int}.
+        """
+        with self._seq_lock:
+            seq = self._seq.get(wallet_id, 0)
+            self._seq[wallet_id] = seq + 1
+        job = _Job(wallet_id, payload, passphrase, seq)
+        self._construct_queue.put(job)
+        return job.future
+
+    def close(self) -> None:
+        """Wait for all queued transactions to finish and stop the workers."""
+        for _ in range(self._n_construct):
+            self._construct_queue.put(_STOP)
+        for thread in self._threads[: self._n_construct]:
+            thread.join()
+        for _ in range(self._n_sign):
+            self._sign_queue.put(_STOP)
+        for thread in self._threads[self._n_construct : self._n_construct + self._n_sign]:
+            thread.join()
+        for q in self._submit_queues:
+            q.put(_STOP)
+        for thread in self._threads[self._n_construct + self._n_sign :]:
+            thread.join()
+        self._threads = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def metrics(self) -> dict:
+        """Latency statistics (seconds) per stage (including retries and queueing of the
+        stage itself) and end to end, plus outcome counters."""
+        with self._metrics_lock:
+            metrics = {stage: summarize(v) for stage, v in self._latencies.items()}
+            metrics.update(self._counts)
+        return metrics
+
+    # Workers
+
+    def _call(self, job: _Job, stage: str, func, *args) -> dict:
+        """Run a WalletHTTP call with retries, recording the stage latency."""
+        start = time.monotonic()
+        result = {}
+        for attempt in range(self.retries + 1):
+            job.attempts += 1
+            try:
+                result = func(*args)
+                status = self.wallet.last_status()
+                error = None if result else f"Wallet server returned status {status}"
+                transient = not result and status in _RETRY_STATUS
+            except (requests.ConnectionError, requests.Timeout) as e:
+                result, error, transient = {}, f"{type(e).__name__}: {e}", True
+            except requests.RequestException as e:
+                result, error, transient = {}, f"{type(e).__name__}: {e}", False
+            if not transient or attempt == self.retries:
+                break
+            with self._metrics_lock:
+                self._counts["retried"] += 1
+            time.sleep(self.backoff * 2**attempt)
+        with self._metrics_lock:
+            self._latencies[stage].append(time.monotonic() - start)
+        if error:
+            job.error, job.stage = error, stage
+        return result
+
+    def _construct(self, job: _Job) -> None:
+        tx = self._call(
+            job, "construct", self.wallet.construct_transaction, job.wallet_id, job.payload
+        )
+        if tx:
+            job.constructed = tx.get("transaction")
+            job.inputs = {
+                (tx_in.get("id"), tx_in.get("index"))
+                for tx_in in tx.get("coin_selection", {}).get("inputs", [])
+            }
+
+    def _sign(self, job: _Job) -> None:
+        signed = self._call(
+            job,
+            "sign",
+            self.wallet.sign_transaction,
+            job.wallet_id,
+            job.passphrase,
+            job.constructed,
+        )
+        job.signed = signed.get("transaction")
+
+    def _fail(self, job: _Job, stage: str, error: Exception) -> None:
+        """Fail a job on an unexpected exception, which is passed on through its future. The job
+        still moves through the remaining stages so that the wallet's later transactions are
+        submitted in order."""
+        self.logger.exception(f"Transaction for wallet {job.wallet_id} failed to {stage}")
+        job.error, job.stage = f"{type(error).__name__}: {error}", stage
+        if not job.future.done():
+            job.future.set_exception(error)
+            with self._metrics_lock:
+                self._counts["failed"] += 1
+
+    def _construct_worker(self):
+        while (job := self._construct_queue.get()) is not _STOP:
+            try:
+                self._construct(job)
+            except Exception as e:
+                self._fail(job, "construct", e)
+            self._sign_queue.put(job)
+
+    def _sign_worker(self):
+        while (job := self._sign_queue.get()) is not _STOP:
+            if job.error is None:
+                try:
+                    self._sign(job)
+                except Exception as e:
+                    self._fail(job, "sign", e)
+            # Shard by wallet so that each wallet's transactions are submitted by one worker
+            self._submit_queues[hash(job.wallet_id) % len(self._submit_queues)].put(job)
+
+    def _submit_worker(self, jobs: queue.Queue):
+        next_seq = {}
+        pending = {}
+        spent = {}
+        while (job := jobs.get()) is not _STOP:
+            pending[(job.wallet_id, job.seq)] = job
+            wallet_id = job.wallet_id
+            # Submit this wallet's transactions that are now in order
+            while (wallet_id, next_seq.get(wallet_id, 0)) in pending:
+                ready = pending.pop((wallet_id, next_seq.get(wallet_id, 0)))
+                next_seq[wallet_id] = ready.seq + 1
+                try:
+                    self._submit(ready, spent.setdefault(wallet_id, set()))
+                except Exception as e:
+                    self._fail(ready, "submit", e)
+
+    def _submit(self, job: _Job, spent: set) -> None:
+        if job.future.done():  # Failed with an exception in an earlier stage
+            return
+        if job.error is None and job.inputs & spent:
+            self.logger.debug(f"Inputs of transaction {job.seq} already spent, rebuilding")
+            with self._metrics_lock:
+                self._counts["rebuilt"] += 1
+            self._construct(job)
+            if job.error is None:
+                self._sign(job)
+        tx_id = None
+        if job.error is None:
+            result = self._call(
+                job, "submit", self.wallet.submit_transaction, job.wallet_id, job.signed
+            )
+            tx_id = result.get("id")
+        if tx_id:
+            spent |= job.inputs
+        with self._metrics_lock:
+            self._counts["submitted" if tx_id else "failed"] += 1
+            self._latencies["total"].append(time.monotonic() - job.enqueued)
+        if job.error:
+            self.logger.error(
+                f"Transaction for wallet {job.wallet_id} failed to {job.stage}: {job.error}"
+            )
+        job.future.set_result(
+            {
+                "wallet_id": job.wallet_id,
+                "tx_id": tx_id,
+                "status": "submitted" if tx_id else "failed",
+                "stage": job.stage,
+                "error": job.error,
+                "attempts": job.attempts,
+            }
+        )
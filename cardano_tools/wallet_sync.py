@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Cardano-Tools components
+from .utils.progress import ProgressEstimator
+from .wallet_tools import WalletHTTP
+
+
+class _Tracker:
+    """Sync state of one wallet."""
+
+    def __init__(self, wallet_id: str, min_interval: float, max_interval: float):
+        self.wallet_id = wallet_id
+        self.status = "missing"
+        self.progress = 0.0
+        self.eta = None
+        self.next_poll = 0.0
+        self.estimator = ProgressEstimator(min_interval, max_interval)
+
+
+class WalletSyncWaiter:
+    """Waits for many wallets to finish syncing (restoring) with a single polling scheduler.
+
+    Wallets restore at very different speeds, so each one keeps its own estimate of its ETA and
+    its own next poll time (see utils.progress.ProgressEstimator): a wallet close to done is
+    checked again soon, while a large wallet early in its restoration, or one the server does not
+    know (yet), is left alone for longer. When many wallets are due at once (listing_threshold
+    or more), a single listing of all wallets replaces the individual requests.
+
+    Usage:
+
+        waiter = WalletSyncWaiter(WalletHTTP(), wallet_ids)
+        statuses = waiter.wait(timeout=3600, callback=lambda s: print(s["eta"]))
+    """
+
+    def __init__(
+        self,
+        wallet: WalletHTTP,
+        wallet_ids: list,
+        min_interval: float = 1.0,
+        max_interval: float = 60.0,
+        listing_threshold: int = 8,
+    ):
+        self.wallet = wallet
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.listing_threshold = listing_threshold
+        self.logger = logging.getLogger(__name__)
+        self._trackers = {
+            wallet_id: _Tracker(wallet_id, min_interval, max_interval)
+            for wallet_id in dict.fromkeys(wallet_ids)
+        }
+
+    def _pending(self) -> list:
+        return [t for t in self._trackers.values() if t.status != "ready"]
+
+    def _update(self, tracker: _Tracker, wallet: dict, now: float) -> None:
+        if not wallet:
+            tracker.status, tracker.eta = "missing", None
+            tracker.estimator.backoff()
+            tracker.next_poll = now + tracker.estimator.interval
+            return
+        state = wallet.get("state", {})
+        tracker.status = state.get("status")
+        if tracker.status == "ready":
+            tracker.progress, tracker.eta = 100.0, 0.0
+            return
+        tracker.progress = state.get("progress", {}).get("quantity", tracker.progress)
+        tracker.estimator.add(tracker.progress, now=now)
+        tracker.eta = tracker.estimator.eta()
+        tracker.next_poll = now + tracker.estimator.interval
+
+    def poll(self, force: bool = False) -> dict:
+        """Poll the wallets that are due (or all pending wallets if force) once.
+
+        Returns
+        -------
+        dict
+            The current status, see status().
+        """
+        now = time.monotonic()
+        pending = self._pending()
+        due = pending if force else [t for t in pending if t.next_poll <= now]
+        if len(due) >= self.listing_threshold:
+            # One listing covers every wallet, so update all pending wallets from it
+            listing = {w.get("id"): w for w in self.wallet.get_all_wallets() or []}
+            for tracker in pending:
+                self._update(tracker, listing.get(tracker.wallet_id), now)
+        elif due:
+            with ThreadPoolExecutor(max_workers=self.listing_threshold) as executor:
+                wallets = executor.map(self.wallet.get_wallet, [t.wallet_id for t in due])
+                for tracker, wallet in zip(due, wallets):
+                    self._update(tracker, wallet, now)
+        return self.status()
+
+    def status(self) -> dict:
+        """The sync status of all wallets.
+
+        Returns
+        -------
+        dict
+            {
+                "statuses": {wallet_id: str},  # "ready", "syncing", "not_responding", "missing"
+                "progress": {wallet_id: float},  # percent
+                "ready": int,  # number of ready wallets
+                "total": int,
+                "eta": float,  # seconds until all wallets are ready, None if unknown
+            }
+        """
+        trackers = self._trackers.values()
+        pending = self._pending()
+        etas = [t.eta for t in pending]
+        return {
+            "statuses": {t.wallet_id: t.status for t in trackers},
+            "progress": {t.wallet_id: t.progress for t in trackers},
+            "ready": len(self._trackers) - len(pending),
+            "total": len(self._trackers),
+            "eta": max(etas, default=0.0) if None not in etas else None,
+        }
+
+    def wait(self, timeout: float = None, callback=None) -> dict:
+        """Block until all wallets are ready or the timeout (seconds) expires.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Give up after this many seconds (default: wait indefinitely).
+        callback : callable, optional
+            Called with the status (see status()) after every poll.
+
+        Returns
+        -------
+        dict
+            The last known status of each wallet ID. Wallets other than "ready" did not
+            finish syncing before the timeout.
+        """
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        status = self.poll(force=True)
+        while True:
+            if callback is not None:
+                callback(status)
+            pending = self._pending()
+            if not pending:
+                break
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                self.logger.warning(f"{len(pending)} wallets not ready after {timeout} s")
+                break
+            wake = min(t.next_poll for t in pending)
+            if deadline is not None:
+                wake = min(wake, deadline)
+            eta = f"{status['eta']:.0f} s" if status["eta"] is not None else "unknown"
+            self.logger.info(
+                f"{status['ready']} of {status['total']} wallets ready, ETA {eta}, "
+                f"next check in {max(wake - now, 0):.1f} s"
+            )
+            time.sleep(max(wake - now, 0))
+            if deadline is not None and time.monotonic() >= deadline:
+                status = self.poll(force=True)
+            else:
+                status = self.poll()
+        self.logger.info(f"Waited {time.monotonic() - start:.1f} s for {status['total']} wallets")
+        return status["statuses"]
+
+    async def wait_async(self, timeout: float = None, callback=None) -> dict:
+        """Awaitable version of wait(), run in the event loop's default executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.wait, timeout, callback)
@@ -1,16 +1,20 @@
-import json
 import logging
 import shlex
 import subprocess
+import threading
 import time
-from collections import namedtuple
+from collections import deque, namedtuple
 from pathlib import Path
 
 import pexpect
 import requests
 
 # Cardano-Tools components
-from .utils import minimum_utxo
+from .utils import LogText, UtxoColumns, json_codec, minimum_utxo, pack_payments
+
+# Fallback values used when the wallet server does not report them.
+DEFAULT_UTXO_COST_PER_WORD = 34482  # Const. from Alonzo genesis file
+DEFAULT_MAX_TX_SIZE = 16384  # Mainnet maxTxSize protocol parameter (bytes)
 
 
 class WalletError(Exception):
@@ -23,20 +27,90 @@ class WalletHTTP:
     refer to the cardano-wallet HTTP API documentation: https://input-output-hk.github.io/cardano-wallet/api/edge/
     """
 
-    def __init__(self, wallet_server: str = "http://localhost", wallet_server_port: int = 8090):
+    def __init__(
+        self,
+        wallet_server: str = "http://localhost",
+        wallet_server_port: int = 8090,
+        cache=None,
+        limiter=None,
+    ):
+        """The optional cache (a WalletResponseCache) serves repeated asset and address listings
+        locally until the wallet's tip changes. The optional limiter (a RequestLimiter, which may
+        be shared between clients) applies rate limits and concurrency caps to the requests."""
         self.wallet_url = f"{wallet_server}:{wallet_server_port}/"
+        self.cache = cache
+        self.limiter = limiter
         self.logger = logging.getLogger(__name__)
+        self._last = threading.local()
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Make an HTTP request to the wallet server, through the limiter if there is one."""
+        self._last.status = None
+        self._last.code = None
+        if self.limiter is None:
+            r = self._send(method, url, **kwargs)
+        else:
+            with self.limiter.slot(self.limiter.classify(method, url)):
+                r = self._send(method, url, **kwargs)
+        self._last.status = r.status_code
+        if not r.ok:
+            try:
+                body = r.json()
+            except ValueError:
+                body = None
+            self._last.code = body.get("code") if isinstance(body, dict) else None
+        return r
+
+    def last_status(self) -> int:
+        """The HTTP status code of the last response received by the calling thread, e.g. to
+        tell a server error from a rejected request after a method returned {}. None if the last
+        request got no response."""
+        return getattr(self._last, "status", None)
+
+    def last_error_code(self) -> str:
+        """The error code (e.g. "not_enough_money") of the last response received by the calling
+        thread, None if it succeeded or carried no code."""
+        return getattr(self._last, "code", None)
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        return requests.request(method, url, **kwargs)
+
+    def _decode(self, r: requests.Response):
+        """Decodes the JSON body of a response straight from the raw bytes. The body is only
+        rendered (truncated) for the debug log if debug logging is enabled."""
+        self.logger.debug("%s", LogText(r.content))
+        return json_codec.loads(r.content)
+
+    def _cached_get(self, wallet_id: str, url: str, cached: bool = True):
+        """GET a wallet listing through the response cache (if enabled). Returns the decoded
+        payload, or None for a bad response. With cached=False the listing is always fetched
+        from the server (and the cache updated)."""
+        self.logger.debug(f"URL: {url}")
+        if self.cache is not None and cached:
+            if self.cache.tip_is_stale(wallet_id) and not self.get_wallet(wallet_id):
+                self.cache.invalidate(wallet_id)
+            content = self.cache.get(wallet_id, url)
+            if content is not None:
+                self.logger.debug("Served from cache")
+                return json_codec.loads(content)
+        generation = self.cache.generation(wallet_id) if self.cache is not None else None
+        r = self._request("GET", url)
+        if not r.ok:
+            self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
+            return None
+        if self.cache is not None:
+            self.cache.put(wallet_id, url, r.content, generation)
+        return self._decode(r)
 
     def get_settings(self) -> dict:
         """Returns wallet server settings"""
         url = f"{self.wallet_url}v2/settings"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def update_settings(self, smash_source: str) -> None:
@@ -44,7 +118,7 @@ class WalletHTTP:
         url = f"{self.wallet_url}v2/settings"
         headers = {"Content-type": "application/json"}
         payload = {"settings": {"pool_metadata_source": "direct"}}
-        r = requests.put(url, headers=headers, json=payload)
+        r = self._request("PUT", url, headers=headers, json=payload)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
         return
@@ -53,60 +127,77 @@ class WalletHTTP:
         """Get health status of currently active SMASH server"""
         url = f"{self.wallet_url}v2/smash/health"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def get_network_info(self) -> dict:
         """Returns network information"""
         url = f"{self.wallet_url}v2/network/information"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def get_network_clock(self, force_ntp_check: bool = False) -> dict:
         """Returns network clock status"""
         url = f"{self.wallet_url}v2/network/clock?forceNtpCheck={force_ntp_check}"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def get_network_params(self) -> dict:
         """Returns the set of network parameters for the current epoch."""
         url = f"{self.wallet_url}v2/network/parameters"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
+    def _min_utxo_params(self) -> dict:
+        """Returns the parameters needed by minimum_utxo, taken from the live network parameters.
+        The wallet reports the minimum value of an ada-only UTxO (29 words) rather than the cost
+        per word, so the cost is recovered from that value."""
+        params = self.get_network_params()
+        min_utxo_value = params.get("minimum_utxo_value", {}).get("quantity")
+        if not min_utxo_value:
+            self.logger.warning("Minimum UTxO value not reported, using the Alonzo constant.")
+            return {"utxoCostPerWord": DEFAULT_UTXO_COST_PER_WORD}
+        return {"utxoCostPerWord": min_utxo_value // minimum_utxo({"utxoCostPerWord": 1})}
+
+    @staticmethod
+    def _apply_min_lovelace(payment: dict, min_utxo_params: dict) -> None:
+        """Raises the lovelace amount of a payment to the minimum UTxO value if needed"""
+        assets = payment.get("assets") or []
+        min_lovelace = minimum_utxo(
+            min_utxo_params,
+            [f"{asset.get('policy_id')}.{asset.get('asset_name')}" for asset in assets],
+        )
+        if payment.get("amount").get("quantity") < min_lovelace:
+            payment["amount"]["quantity"] = min_lovelace
+
     def get_latest_block_header(self) -> dict:
         """Returns the latest block header available at the chain source"""
         url = f"{self.wallet_url}v2/blocks/latest/header"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def create_wallet(
@@ -130,12 +221,11 @@ class WalletHTTP:
             "passphrase": passphrase,
             "address_pool_gap": address_pool_gap,
         }
-        r = requests.post(url, json=tx_body, headers=headers)
+        r = self._request("POST", url, json=tx_body, headers=headers)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def create_wallet_from_key(
@@ -156,12 +246,11 @@ class WalletHTTP:
             "account_public_key": xpub_key,
             "address_pool_gap": address_pool_gap,
         }
-        r = requests.post(url, json=tx_body, headers=headers)
+        r = self._request("POST", url, json=tx_body, headers=headers)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def rename_wallet(self, wallet_id: str, name: str) -> dict:
@@ -170,12 +259,11 @@ class WalletHTTP:
         self.logger.debug(f"URL: {url}")
         headers = {"Content-type": "application/json"}
         payload = {"name": name}
-        r = requests.put(url, headers=headers, json=payload)
+        r = self._request("PUT", url, headers=headers, json=payload)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def update_passphrase(self, wallet_id: str, old_passphrase: str, new_passphrase: str) -> bool:
@@ -184,7 +272,7 @@ class WalletHTTP:
         self.logger.debug(f"URL: {url}")
         headers = {"Content-type": "application/json"}
         payload = {"old_passphrase": old_passphrase, "new_passphrase": new_passphrase}
-        r = requests.put(url, headers=headers, json=payload)
+        r = self._request("PUT", url, headers=headers, json=payload)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return False
@@ -193,9 +281,11 @@ class WalletHTTP:
     def delete_wallet(self, wallet_id: str) -> None:
         url = f"{self.wallet_url}v2/wallets/{wallet_id}"
         self.logger.debug(f"URL: {url}")
-        r = requests.delete(url)
+        r = self._request("DELETE", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
+        if self.cache is not None:
+            self.cache.invalidate(wallet_id)
 
     def get_all_wallets(self) -> dict:
         """Get a list of all created wallets known to the wallet service.
@@ -207,12 +297,11 @@ class WalletHTTP:
         """
         url = f"{self.wallet_url}v2/wallets"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def get_wallet(self, wallet_id: str) -> dict:
@@ -225,12 +314,13 @@ class WalletHTTP:
         """
         url = f"{self.wallet_url}v2/wallets/{wallet_id}"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
+        if self.cache is not None:
+            self.cache.update_tip(wallet_id, payload.get("tip", {}).get("absolute_slot_number"))
         return payload
 
     def get_wallet_by_name(self, name: str) -> dict:
@@ -253,11 +343,11 @@ class WalletHTTP:
         """Get balances of wallet"""
         url = f"{self.wallet_url}v2/wallets/{wallet_id}"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return ()
-        payload = json.loads(r.text)
+        payload = self._decode(r)
         lovelace_balance = payload.get("balance").get("total")
         asset_balances = payload.get("assets").get("total")
         return lovelace_balance, asset_balances
@@ -266,45 +356,63 @@ class WalletHTTP:
         """Get wallet's UTxO distribution statistics"""
         url = f"{self.wallet_url}v2/wallets/{wallet_id}/statistics/utxos"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return ()
-        stats = json.loads(r.text)
+        stats = self._decode(r)
         return stats
 
     def get_utxo_snapshot(self, wallet_id: str) -> tuple:
         """Get wallet's UTxO snapshot"""
         url = f"{self.wallet_url}v2/wallets/{wallet_id}/utxo"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return ()
-        stats = json.loads(r.text)
+        stats = self._decode(r)
         return stats
 
+    def get_utxo_columns(self, wallet_id: str, chunk_size: int = 2**16) -> UtxoColumns:
+        """Stream the wallet's UTxO snapshot into compact columnar arrays. Unlike
+        get_utxo_snapshot, the snapshot is never held in memory as a whole. Returns None on a bad
+        response."""
+        url = f"{self.wallet_url}v2/wallets/{wallet_id}/utxo"
+        self.logger.debug(f"URL: {url}")
+        with self._request("GET", url, stream=True) as r:
+            if not r.ok:
+                self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
+                return None
+            return UtxoColumns.from_chunks(r.iter_content(chunk_size))
+
     def get_addresses(self, wallet_id: str) -> list:
         """Returns a list of addresses tracked by the provided wallet"""
         url = f"{self.wallet_url}v2/wallets/{wallet_id}/addresses"
-        self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
-        if not r.ok:
-            self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
+        payload = self._cached_get(wallet_id, url)
+        if payload is None:
             return []
-        payload = json.loads(r.text)
         addresses = [elem.get("id") for elem in payload]
         return addresses
 
+    def list_addresses(self, wallet_id: str, state: str = None, cached: bool = True) -> list:
+        """Returns the address entries (id, state and derivation path) of the provided wallet,
+        optionally only the "used" or "unused" ones. Returns None on a bad response. With
+        cached=False the response cache is bypassed."""
+        url = f"{self.wallet_url}v2/wallets/{wallet_id}/addresses"
+        if state is not None:
+            url += f"?state={state}"
+        return self._cached_get(wallet_id, url, cached)
+
     def inspect_address(self, address: str) -> dict:
         """Get useful information about the structure of an address"""
         url = f"{self.wallet_url}v2/addresses/{address}"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return []
-        payload = json.loads(r.text)
+        payload = self._decode(r)
         return payload
 
     def get_transaction(self, wallet_id: str, tx_id: str) -> dict:
@@ -312,24 +420,22 @@ class WalletHTTP:
         self.logger.info(f"Querying information for transaction {tx_id}")
         url = f"{self.wallet_url}v2/wallets/{wallet_id}/transactions/{tx_id}"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def get_transactions(self, wallet_id: str) -> dict:
         """List all transactions for the given wallet"""
         url = f"{self.wallet_url}v2/wallets/{wallet_id}/transactions"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def forget_transaction(self, wallet_id: str, tx_id: str) -> None:
@@ -337,7 +443,7 @@ class WalletHTTP:
         self.logger.info(f"Forgetting transaction {tx_id}")
         url = f"{self.wallet_url}v2/wallets/{wallet_id}/transactions/{tx_id}"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
         return
@@ -362,13 +468,9 @@ class WalletHTTP:
     def get_assets(self, wallet_id: str) -> dict:
         """List all assets associated with the wallet (i.e. assets that have ever been spendable by the wallet)"""
         url = f"{self.wallet_url}v2/wallets/{wallet_id}/assets"
-        self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
-        if not r.ok:
-            self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
+        payload = self._cached_get(wallet_id, url)
+        if payload is None:
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
         return payload
 
     def get_asset(self, wallet_id: str, policy_id: str, asset_name: str = None) -> dict:
@@ -377,13 +479,9 @@ class WalletHTTP:
             url = f"{self.wallet_url}v2/wallets/{wallet_id}/assets/{policy_id}/{asset_name}"
         else:
             url = f"{self.wallet_url}v2/wallets/{wallet_id}/assets/{policy_id}"
-        self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
-        if not r.ok:
-            self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
+        payload = self._cached_get(wallet_id, url)
+        if payload is None:
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
         return payload
 
     def estimate_tx_fee(
@@ -411,13 +509,39 @@ class WalletHTTP:
         self.logger.debug(
             f"Estimate fees for sending {quantity:,} lovelace ({quantity / 1e6} ADA) to address {rx_address}..."
         )
-        r = requests.post(url, json=tx_body, headers=headers)
+        r = self._request("POST", url, json=tx_body, headers=headers)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
+        payload = self._decode(r)
         return payload
 
+    def estimate_payment_fees(self, wallet_id: str, payments: list, withdrawal: str = None) -> dict:
+        """Estimate the fee for a transaction with any number of payments (in the send_batch_tx
+        format). See FeePlanner for estimating many payment sets.
+
+        Returns
+        -------
+        dict
+            The wallet's estimate, with the keys "estimated_min", "estimated_max",
+            "minimum_coins" and "deposit".
+        """
+        url = f"{self.wallet_url}v2/wallets/{wallet_id}/payment-fees"
+        self.logger.debug(f"URL: {url}")
+        headers = {
+            "Content-type": "application/json",
+            "Accept": "application/json",
+        }
+        tx_body = {"payments": payments}
+        if withdrawal is not None:
+            tx_body["withdrawal"] = withdrawal
+        self.logger.debug(f"Estimate fees for {len(payments)} payments...")
+        r = self._request("POST", url, json=tx_body, headers=headers)
+        if not r.ok:
+            self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
+            return {}
+        return self._decode(r)
+
     def send_lovelace(
         self,
         wallet_id: str,
@@ -446,11 +570,11 @@ class WalletHTTP:
         self.logger.debug(
             f"Sending {quantity:,} lovelace ({quantity / 1e6} ADA) to address {rx_address}..."
         )
-        r = requests.post(url, json=tx_body, headers=headers)
+        r = self._request("POST", url, json=tx_body, headers=headers)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
+        payload = self._decode(r)
         if wait:
             tx_id = payload.get("id")
             self.confirm_tx(wallet_id, tx_id)
@@ -493,10 +617,8 @@ class WalletHTTP:
 
         # Make sure we send at least the minimum lovelace amount
         min_lovelace = minimum_utxo(
-            {
-                "utxoCostPerWord": 34482,  # Const. from Alonzo genesis file
-            },
-            [f"{asset.get('policy_id')}.{asset.get('asset_name')}" for asset in assets]
+            self._min_utxo_params(),
+            [f"{asset.get('policy_id')}.{asset.get('asset_name')}" for asset in assets],
         )
         if lovelace_amount < min_lovelace:
             lovelace_amount = min_lovelace
@@ -521,13 +643,13 @@ class WalletHTTP:
         self.logger.info(
             f"Sending {len(assets)} unique tokens and {lovelace_amount:,} lovelace ({lovelace_amount / 1e6} ADA) to address {rx_address}..."
         )
-        r = requests.post(url, json=tx_body, headers=headers)
+        r = self._request("POST", url, json=tx_body, headers=headers)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
 
-        payload = json.loads(r.text)
-        self.logger.debug(f"Tokens sent! Payload {payload}")
+        payload = self._decode(r)
+        self.logger.debug("Tokens sent! Payload %s", LogText(payload))
         if wait:
             tx_id = payload.get("id")
             self.confirm_tx(wallet_id, tx_id)
@@ -559,18 +681,10 @@ class WalletHTTP:
             }
         ]
         """
+        min_utxo_params = self._min_utxo_params()
         for payment in payments:
             # Make sure we send at least the minimum lovelace amount
-            assets = payment.get("assets") if "assets" in payment.keys() else []
-            lovelace_amount = payment.get("amount").get("quantity")
-            min_lovelace = minimum_utxo(
-                {
-                    "utxoCostPerWord": 34482,  # Const. from Alonzo genesis file
-                },
-                [f"{asset.get('policy_id')}.{asset.get('asset_name')}" for asset in assets],
-            )
-            if lovelace_amount < min_lovelace:
-                payment["amount"]["quantity"] = min_lovelace
+            self._apply_min_lovelace(payment, min_utxo_params)
 
         url = f"{self.wallet_url}v2/wallets/{wallet_id}/transactions"
         self.logger.debug(f"URL: {url}")
@@ -584,19 +698,89 @@ class WalletHTTP:
             "withdrawal": "self",
         }
         self.logger.debug(f"Sending batch of {len(payments)} payments...")
-        r = requests.post(url, json=tx_body, headers=headers)
+        r = self._request("POST", url, json=tx_body, headers=headers)
         if not r.ok:
             self.logger.error(f"ERROR: Bad status code received: {r.status_code}, {r.text}")
             return {}
 
-        payload = json.loads(r.text)
-        self.logger.debug(f"Tokens sent! Payload {payload}")
+        payload = self._decode(r)
+        self.logger.debug("Tokens sent! Payload %s", LogText(payload))
         if wait:
             tx_id = payload.get("id")
             self.confirm_tx(wallet_id, tx_id)
             return self.get_transaction(wallet_id, tx_id)
         return payload
 
+    def send_batch_payouts(
+        self,
+        wallet_id: str,
+        payments: list,
+        passphrase: str,
+        max_tx_size: int = DEFAULT_MAX_TX_SIZE,
+        tx_overhead: int = 2048,
+        wait: bool = False,
+    ) -> dict:
+        """Sends any number of payments, split across as many transactions as needed to keep each
+        one under the maximum transaction size. Payments use the same format as send_batch_tx.
+
+        The serialized size of every payment is estimated and the payments are packed, in order,
+        into batches whose outputs fit in max_tx_size minus tx_overhead (an estimate of the bytes
+        taken by inputs, change, fee, metadata and witnesses). The batches are then constructed,
+        signed and submitted one after the other, so each one selects its inputs after the
+        previous one is pending. A batch the wallet rejects as too big (more inputs or witnesses
+        than the overhead allows for) is halved and both halves are sent in its place.
+
+        Returns a dict mapping the index of each payment to its result:
+          {
+              "batch": int, # index of the transaction carrying the payment
+              "tx_id": str, # None if the batch was not submitted
+              "status": str, # "submitted", "failed", or the tx status if wait=True
+          }
+        """
+        min_utxo_params = self._min_utxo_params()
+        payments = [dict(payment, amount=dict(payment.get("amount"))) for payment in payments]
+        for payment in payments:
+            self._apply_min_lovelace(payment, min_utxo_params)
+        pending = deque(pack_payments(payments, max_tx_size - tx_overhead))
+        self.logger.info(f"Sending {len(payments)} payments in {len(pending)} transactions...")
+
+        results = {}
+        n = 0
+        while pending:
+            batch = pending.popleft()
+            tx = self.construct_transaction(wallet_id, {"payments": [payments[i] for i in batch]})
+            if not tx and self.last_error_code() == "transaction_is_too_big" and len(batch) > 1:
+                self.logger.debug(f"Splitting a batch of {len(batch)} payments that is too big")
+                half = len(batch) // 2
+                pending.extendleft([batch[half:], batch[:half]])
+                continue
+            signed, submitted = {}, {}
+            if tx:
+                signed = self.sign_transaction(wallet_id, passphrase, tx.get("transaction"))
+            if signed:
+                submitted = self.submit_transaction(wallet_id, signed.get("transaction"))
+            tx_id = submitted.get("id")
+            if not tx_id:
+                self.logger.error(f"Batch {n} of {len(batch)} payments could not be submitted")
+            for i in batch:
+                results[i] = {
+                    "batch": n,
+                    "tx_id": tx_id,
+                    "status": "submitted" if tx_id else "failed",
+                }
+            n += 1
+
+        if wait:
+            statuses = {}
+            for result in results.values():
+                tx_id = result.get("tx_id")
+                if tx_id and tx_id not in statuses:
+                    self.confirm_tx(wallet_id, tx_id)
+                    statuses[tx_id] = self.get_transaction(wallet_id, tx_id).get("status")
+                if tx_id:
+                    result["status"] = statuses[tx_id]
+        return results
+
     def construct_transaction(self, wallet_id: str, payload: dict) -> dict:
         """Create a transaction to be signed from the wallet.
         For simple transactions, you can use the send_ada or send_lovelace functions.
@@ -673,13 +857,34 @@ class WalletHTTP:
             "Content-type": "application/json",
             "Accept": "application/json",
         }
-        self.logger.debug(f"Constructing transaction with the following payload: {payload}")
-        r = requests.post(url, json=payload, headers=headers)
+        self.logger.debug(
+            "Constructing transaction with the following payload: %s", LogText(payload)
+        )
+        r = self._request("POST", url, json=payload, headers=headers)
+        if not r.ok:
+            self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
+            return {}
+        payload = self._decode(r)
+        return payload
+
+    def balance_transaction(self, wallet_id: str, tx: str, inputs: list = None) -> dict:
+        """Balance a partial, serialized transaction (base16 CBOR) with the wallet: the wallet
+        adds the fee and, only where the transaction's own inputs do not cover its outputs and
+        the fee, further inputs and change. inputs lists the UTxO entries of any inputs that do
+        not belong to the wallet. Returns the balanced transaction, which must then be signed."""
+        self.logger.info(f"Balancing transaction for wallet ID {wallet_id}")
+        url = f"{self.wallet_url}v2/wallets/{wallet_id}/transactions-balance"
+        self.logger.debug(f"URL: {url}")
+        headers = {
+            "Content-type": "application/json",
+            "Accept": "application/json",
+        }
+        payload = {"transaction": tx, "inputs": inputs or [], "encoding": "base16"}
+        r = self._request("POST", url, json=payload, headers=headers)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def sign_transaction(self, wallet_id: str, passphrase: str, tx: str) -> dict:
@@ -693,12 +898,11 @@ class WalletHTTP:
             "Accept": "application/json",
         }
         payload = {"passphrase": passphrase, "transaction": tx}
-        r = requests.post(url, json=payload, headers=headers)
+        r = self._request("POST", url, json=payload, headers=headers)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def decode_transaction(self, wallet_id: str, tx: str) -> dict:
@@ -711,12 +915,11 @@ class WalletHTTP:
             "Accept": "application/json",
         }
         payload = {"transaction": tx}
-        r = requests.post(url, json=payload, headers=headers)
+        r = self._request("POST", url, json=payload, headers=headers)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def submit_transaction(self, wallet_id: str, tx: str) -> dict:
@@ -729,12 +932,11 @@ class WalletHTTP:
             "Accept": "application/json",
         }
         payload = {"transaction": tx}
-        r = requests.post(url, json=payload, headers=headers)
+        r = self._request("POST", url, json=payload, headers=headers)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def create_migration_plan(self, wallet_id: str, dest_addresses: list) -> dict:
@@ -747,12 +949,11 @@ class WalletHTTP:
             "Accept": "application/json",
         }
         payload = {"addresses": dest_addresses}
-        r = requests.post(url, json=payload, headers=headers)
+        r = self._request("POST", url, json=payload, headers=headers)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def migrate_wallet(self, wallet_id: str, passphrase: str, dest_addresses: list) -> dict:
@@ -765,12 +966,11 @@ class WalletHTTP:
             "Accept": "application/json",
         }
         payload = {"passphrase": passphrase, "addresses": dest_addresses}
-        r = requests.post(url, json=payload, headers=headers)
+        r = self._request("POST", url, json=payload, headers=headers)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def list_stake_keys(self, wallet_id: str) -> dict:
@@ -778,12 +978,11 @@ class WalletHTTP:
         self.logger.debug(f"Listing stake keys for wallet ID {wallet_id}")
         url = f"{self.wallet_url}v2/wallets/{wallet_id}/stake-keys"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def list_stake_pools(self, lovelace_to_stake: int) -> dict:
@@ -793,12 +992,11 @@ class WalletHTTP:
         )
         url = f"{self.wallet_url}v2/stake-pools?stake={lovelace_to_stake}"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def pool_maintenance_actions(self) -> dict:
@@ -806,12 +1004,11 @@ class WalletHTTP:
         self.logger.debug(f"Viewing stake pool maintenance actions.")
         url = f"{self.wallet_url}v2/stake-pools/maintenance-actions"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def trigger_pool_maintenance(self, action: str) -> None:
@@ -825,7 +1022,7 @@ class WalletHTTP:
             "Accept": "application/json",
         }
         payload = {"maintenance_action": action}
-        r = requests.post(url, json=payload, headers=headers)
+        r = self._request("POST", url, json=payload, headers=headers)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
         return
@@ -835,12 +1032,11 @@ class WalletHTTP:
         self.logger.debug(f"Estimating delegation fee for wallet {wallet_id}")
         url = f"{self.wallet_url}v2/wallets/{wallet_id}/delegation-fees"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def join_stake_pool(self, wallet_id: str, passphrase: str, pool_id: str) -> None:
@@ -853,7 +1049,7 @@ class WalletHTTP:
             "Accept": "application/json",
         }
         payload = {"passphrase": passphrase}
-        r = requests.put(url, json=payload, headers=headers)
+        r = self._request("PUT", url, json=payload, headers=headers)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
         return
@@ -869,11 +1065,10 @@ class WalletHTTP:
             "Accept": "application/json",
         }
         payload = {"passphrase": passphrase}
-        r = requests.delete(url, json=payload, headers=headers)
+        r = self._request("DELETE", url, json=payload, headers=headers)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def create_account_public_key(
@@ -894,11 +1089,10 @@ class WalletHTTP:
             "Accept": "application/json",
         }
         payload = {"passphrase": passphrase, "format": format, "purpose": purpose}
-        r = requests.post(url, json=payload, headers=headers)
+        r = self._request("POST", url, json=payload, headers=headers)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def get_account_public_key(self, wallet_id: str) -> dict:
@@ -906,12 +1100,11 @@ class WalletHTTP:
         self.logger.debug(f"Retrieving account public key for wallet {wallet_id}")
         url = f"{self.wallet_url}v2/wallets/{wallet_id}/keys"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def get_public_key(self, wallet_id: str, role: str, index: str) -> dict:
@@ -920,12 +1113,11 @@ class WalletHTTP:
         self.logger.debug(f"Retrieving public key for wallet {wallet_id}")
         url = f"{self.wallet_url}v2/wallets/{wallet_id}/keys/{role}/{index}"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def create_policy_id(self, wallet_id: str, policy_script_template: dict) -> dict:
@@ -943,11 +1135,10 @@ class WalletHTTP:
             "Accept": "application/json",
         }
         payload = {"policy_script_template": policy_script_template}
-        r = requests.post(url, json=payload, headers=headers)
+        r = self._request("POST", url, json=payload, headers=headers)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def create_policy_key(
@@ -965,11 +1156,10 @@ class WalletHTTP:
             "Accept": "application/json",
         }
         payload = {"passphrase": passphrase}
-        r = requests.post(url, json=payload, headers=headers)
+        r = self._request("POST", url, json=payload, headers=headers)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
     def get_policy_key(self, wallet_id: str, hash_format: bool = False) -> dict:
@@ -978,17 +1168,17 @@ class WalletHTTP:
         self.logger.debug(f"Retrieving policy key for wallet {wallet_id}")
         url = f"{self.wallet_url}v2/wallets/{wallet_id}/policy-key?hash={hash_format}"
         self.logger.debug(f"URL: {url}")
-        r = requests.get(url)
+        r = self._request("GET", url)
         if not r.ok:
             self.logger.error(f"Bad status code received: {r.status_code}, {r.text}")
             return {}
-        payload = json.loads(r.text)
-        self.logger.debug(r.text)
+        payload = self._decode(r)
         return payload
 
 
 class WalletCLI:
-    """We recommend using the WalletHTTP class over this CLI class"""
+    """We recommend using the WalletHTTP class over this CLI class (see WalletFleet.provision for
+    creating many wallets)"""
 
     def __init__(
         self,
@@ -1008,9 +1198,9 @@ class WalletCLI:
         result = subprocess.run(shlex.split(cmd), capture_output=True)
         stdout = result.stdout.decode().strip()
         stderr = result.stderr.decode().strip()
-        self.logger.debug(f'CMD: "{cmd}"')
-        self.logger.debug(f'stdout: "{stdout}"')
-        self.logger.debug(f'stderr: "{stderr}"')
+        self.logger.debug('CMD: "%s"', cmd)
+        self.logger.debug('stdout: "%s"', LogText(stdout))
+        self.logger.debug('stderr: "%s"', LogText(stderr))
         ResultType = namedtuple("Result", "stdout, stderr")
         return ResultType(stdout, stderr)
 
@@ -1044,8 +1234,8 @@ class WalletCLI:
             child.sendline(passphrase)
             child.expect("Ok.")
             self.logger.debug(f"Create wallet result: {child.after}")
-        except:
-            self.logger.error(f"Error creating wallet: {child}")
+        except pexpect.exceptions.ExceptionPexpect:
+            self.logger.error(f"Error creating wallet: {child.before}")
 
     def create_wallet_from_key(
         self,
@@ -1059,7 +1249,7 @@ class WalletCLI:
             f"wallet create from-public-key {name} --address-pool-gap {address_pool_gap} {xpub_key}"
         )
         if len(res.stdout) > 0:
-            wallet = json.loads(res.stdout)
+            wallet = json_codec.loads(res.stdout)
             return wallet
         else:
             return {}
@@ -1075,7 +1265,7 @@ class WalletCLI:
         wallet_list = []
         res = self.run_cli("wallet list")
         if len(res.stdout) > 0:
-            wallet_list = json.loads(res.stdout)
+            wallet_list = json_codec.loads(res.stdout)
             return wallet_list
         else:
             return {}
@@ -1091,7 +1281,7 @@ class WalletCLI:
 
         res = self.run_cli(f"wallet get --port={self.port} {wallet_id}")
         if "ok" in res.stderr.lower():
-            return json.loads(res.stdout)
+            return json_codec.loads(res.stdout)
         return {}
 
     def get_wallet_by_name(self, name: str) -> dict:
@@ -1150,14 +1340,20 @@ class WalletCLI:
         wallet = self.get_wallet(wallet_id)
         res = self.run_cli(f"wallet utxo --port {self.port} {wallet_id}")
         if res:
-            return json.loads(res.stdout)
+            return json_codec.loads(res.stdout)
 
     def get_utxo_snapshot(self, wallet_id: str) -> dict:
         """Get wallet's UTxO snapshot"""
         wallet = self.get_wallet(wallet_id)
         res = self.run_cli(f"wallet utxo-snapshot --port {self.port} {wallet_id}")
         if res:
-            return json.loads(res.stdout)
+            return json_codec.loads(res.stdout)
+
+    def get_utxo_columns(self, wallet_id: str) -> UtxoColumns:
+        """Parse the wallet's UTxO snapshot into compact columnar arrays (see UtxoColumns)."""
+        res = self.run_cli(f"wallet utxo-snapshot --port {self.port} {wallet_id}")
+        if res:
+            return UtxoColumns.from_json(res.stdout)
 
 
 if __name__ == "__main__":
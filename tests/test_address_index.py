@@ -0,0 +1,109 @@
+import pytest
+
+from cardano_tools import WalletResponseCache
+from cardano_tools.address_index import AddressIndex
+from cardano_tools.testing import StandInWalletServer
+
+
+@pytest.fixture
+def stand_in():
+    with StandInWalletServer(n_wallets=20, n_addresses=30) as server:
+        yield server
+
+
+def _receive(stand_in, wallet_id, *states, role="0", credit=True):
+    """Extend a stand-in wallet's address pool (of external or change addresses) by addresses in
+    the given states and credit the wallet, or not if the funds were spent again."""
+    addresses = stand_in._wallet_details(wallet_id)["addresses"]
+    for state in states:
+        index = sum(a["derivation_path"][-2] == role for a in addresses)
+        address = f"addr_test1new{wallet_id[:8]}{role}{index}"
+        path = ["1852H", "1815H", "0H", role, str(index)]
+        addresses.append({"id": address, "state": state, "derivation_path": path})
+    if credit:
+        stand_in._wallets[wallet_id]["balance"]["total"]["quantity"] += 1_000_000
+    else:
+        stand_in.advance_tip()
+    return [a["id"] for a in addresses[-len(states) :]]
+
+
+def test_address_index(stand_in):
+    http_api = stand_in.client()
+    index = AddressIndex(http_api, miss_refresh_interval=0).build()
+    assert len(index) == 20 * 30
+    assert stand_in.request_counts["list_addresses"] == 20
+
+    wallet_ids = stand_in.wallet_ids()
+    for wallet_id in wallet_ids[:3]:
+        for address in http_api.get_addresses(wallet_id):
+            assert index.owner(address) == wallet_id
+    stand_in.request_counts.clear()
+
+    # Nothing changed: a refresh only lists the wallets
+    assert index.owner("addr_test1unknown") is None
+    assert stand_in.request_counts["list_addresses"] == 0
+
+    # After a new block every wallet's unused addresses are fetched, but not the full listings
+    stand_in.advance_tip()
+    stats = index.refresh()
+    assert stats["fetched"] == 20 and stats["added"] == 0
+    assert stand_in.request_counts["list_addresses"] == 20
+    stand_in.request_counts.clear()
+
+    # Only the wallet that received funds is fetched, and only its unused addresses
+    (new_address,) = _receive(stand_in, wallet_ids[5], "unused")
+    stats = index.refresh()
+    assert stats["fetched"] == 1 and stats["added"] == 1
+    assert stand_in.request_counts["list_addresses"] == 1
+    assert index.owner(new_address) == wallet_ids[5]
+
+    # New addresses that were used before the refresh are found through the full listing
+    stand_in.request_counts.clear()
+    used, unused = _receive(stand_in, wallet_ids[6], "used", "unused")
+    stats = index.refresh()
+    assert stats["fetched"] == 1 and stats["added"] == 2
+    assert stand_in.request_counts["list_addresses"] == 2
+    assert index.owner(used) == index.owner(unused) == wallet_ids[6]
+
+    # Change addresses are numbered separately from external addresses
+    stand_in.request_counts.clear()
+    (change,) = _receive(stand_in, wallet_ids[7], "unused", role="1")
+    stats = index.refresh()
+    assert stats["added"] == 1 and index.owner(change) == wallet_ids[7]
+    assert stand_in.request_counts["list_addresses"] == 1
+
+    # Deleted wallets are dropped
+    http_api.delete_wallet(wallet_ids[0])
+    stats = index.refresh()
+    assert stats["removed"] == 1 and stats["fetched"] == 0
+    assert len(index) == 19 * 30 + 4
+
+    owners = index.owners([new_address, "addr_test1unknown"])
+    assert owners == {new_address: wallet_ids[5], "addr_test1unknown": None}
+
+
+def test_address_index_miss_refresh_throttled(stand_in):
+    http_api = stand_in.client()
+    index = AddressIndex(http_api, miss_refresh_interval=3600).build()
+    stand_in.request_counts.clear()
+
+    assert index.owner("addr_test1unknown") is None
+    assert stand_in.request_counts["list_wallets"] == 1
+    # Further misses within the interval do not refresh, explicit refreshes still do
+    assert index.owners(["addr_test1unknown", "addr_test1other"])["addr_test1other"] is None
+    assert stand_in.request_counts["list_wallets"] == 1
+    (new_address,) = _receive(stand_in, stand_in.wallet_ids()[2], "unused")
+    assert index.refresh()["added"] == 1
+    assert index.owner(new_address) == stand_in.wallet_ids()[2]
+
+
+def test_address_index_bypasses_response_cache(stand_in):
+    http_api = stand_in.client(cache=WalletResponseCache(tip_ttl=60))
+    index = AddressIndex(http_api).build()
+    wallet_id = stand_in.wallet_ids()[3]
+    assert http_api.list_addresses(wallet_id, state="unused")
+    # Funds arrive at a new address and are spent again: the balance does not change
+    (new_address,) = _receive(stand_in, wallet_id, "unused", credit=False)
+    assert new_address not in {a["id"] for a in http_api.list_addresses(wallet_id, state="unused")}
+    assert index.refresh()["added"] == 1
+    assert index.owner(new_address) == wallet_id
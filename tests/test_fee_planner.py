@@ -0,0 +1,43 @@
+import pytest
+
+from cardano_tools.fee_planner import FeePlanner
+from cardano_tools.testing import StandInWalletServer
+
+
+@pytest.fixture
+def stand_in():
+    with StandInWalletServer(n_wallets=2, n_utxos=300) as server:
+        yield server
+
+
+def test_fee_planner(stand_in):
+    http_api = stand_in.client()
+    wallet_id = stand_in.wallet_ids()[0]
+    addresses = http_api.get_addresses(stand_in.wallet_ids()[1])
+    payments = [
+        {
+            "address": addresses[i % len(addresses)],
+            "amount": {"quantity": 2_000_000 + i, "unit": "lovelace"},
+        }
+        for i in range(60)
+    ]
+    planner = FeePlanner(http_api, wallet_id)
+
+    table = planner.estimate([payments[:10], payments[10:20], payments[:20], [payments[0]]])
+    assert [row["outputs"] for row in table] == [10, 10, 20, 1]
+    assert [row["cached"] for row in table] == [False, True, False, False]
+    assert table[0]["fee_min"] == table[1]["fee_min"]
+    assert table[2]["fee_min"] > table[0]["fee_min"] > table[3]["fee_min"]
+    assert all(row["fee_min"] <= row["fee_max"] and row["error"] is None for row in table)
+    assert stand_in.request_counts["payment_fees"] == 3
+
+    comparison = planner.compare_batch_sizes(payments, [1, 10, 20, 60])
+    assert [row["transactions"] for row in comparison] == [60, 6, 3, 1]
+    assert comparison[-1]["fee_max"] < comparison[0]["fee_max"]
+    # Only the 60 output batch is a new shape
+    assert stand_in.request_counts["payment_fees"] == 4
+
+    failed = planner.estimate(
+        [[dict(payments[0], amount={"quantity": 10**18, "unit": "lovelace"})]]
+    )
+    assert failed[0]["error"] and failed[0]["fee_min"] is None
@@ -0,0 +1,127 @@
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from cardano_tools import cli_tools, kes
+
+# A stand-in for cardano-cli generating KES keys and operational certificates. The issue
+# counter file holds the next counter as plain text.
+FAKE_CLI = f"""#!{sys.executable}
+import json, sys
+args = sys.argv[1:]
+opts = dict(zip(args[::2], args[1::2]))
+if args[0] == "--version":
+    print("cardano-cli 1.32.1 - linux-x86_64 - ghc-8.10")
+elif args[:2] == ["node", "key-gen-KES"]:
+    open(opts["--verification-key-file"], "w").write("kes vkey")
+    open(opts["--signing-key-file"], "w").write("kes skey")
+elif args[:2] == ["node", "issue-op-cert"]:
+    counter_file = opts["--operational-certificate-issue-counter"]
+    counter = int(open(counter_file).read())
+    open(counter_file, "w").write(str(counter + 1))
+    cbor = "8284" + "5820" + "aa" * 32 + "19" + f"{{counter:04x}}" + "19" + (
+        f"{{int(opts['--kes-period']):04x}}" + "5840" + "bb" * 64 + "5820" + "cc" * 32
+    )
+    json.dump({{"type": "NodeOperationalCertificate", "cborHex": cbor}}, open(opts["--out-file"], "w"))
+"""
+
+
+def write_cert(path, counter, kes_period):
+    cbor = bytes([0x82, 0x84, 0x58, 0x20]) + b"\xaa" * 32 + bytes([counter, 0x19])
+    cbor += kes_period.to_bytes(2, "big") + bytes([0x58, 0x40]) + b"\xbb" * 64
+    cbor += bytes([0x58, 0x20]) + b"\xcc" * 32
+    path.write_text(json.dumps({"type": "NodeOperationalCertificate", "cborHex": cbor.hex()}))
+
+
+def test_read_op_cert(tmp_path):
+    write_cert(tmp_path / "node.cert", 3, 700)
+    cert = kes.read_op_cert(tmp_path / "node.cert")
+    assert cert.counter == 3 and cert.kes_period == 700
+    assert cert.kes_vkey == b"\xaa" * 32 and cert.cold_vkey == b"\xcc" * 32
+    (tmp_path / "bad.cert").write_text(json.dumps({"cborHex": "1903e8"}))
+    with pytest.raises(ValueError):
+        kes.read_op_cert(tmp_path / "bad.cert")
+
+
+def test_kes_clock(tmp_path):
+    clock = kes.KESClock()
+    # Mainnet: KES period 129600 slots (1.5 days), 62 evolutions (93 days)
+    when = datetime(2022, 10, 25, 21, 44, 51, tzinfo=timezone.utc)
+    slot = clock.slot_at(when)
+    assert slot == 4492800 + int((when - kes.MAINNET_SHELLEY_START[1]).total_seconds())
+    assert clock.time_of(slot) == when
+    assert clock.period(slot) == slot // 129600
+    assert clock.expiry_time(500) - clock.time_of(500 * 129600) == timedelta(days=93)
+
+    genesis = tmp_path / "shelley-genesis.json"
+    genesis.write_text(
+        json.dumps(
+            {
+                "networkMagic": 2,
+                "systemStart": "2022-10-25T00:00:00Z",
+                "slotsPerKESPeriod": 129600,
+                "maxKESEvolutions": 62,
+                "slotLength": 1,
+            }
+        )
+    )
+    clock = kes.KESClock.from_genesis(genesis)
+    assert clock.slot_at(datetime(2022, 10, 26, tzinfo=timezone.utc)) == 86400
+
+    # Preprod had four Byron epochs (of 21600 slots of 20 seconds) before the Shelley era
+    genesis.write_text(json.dumps(dict(json.loads(genesis.read_text()), networkMagic=1)))
+    clock = kes.KESClock.from_genesis(genesis)
+    assert clock.time_of(86400) == datetime(2022, 6, 21, tzinfo=timezone.utc)
+    assert clock.slot_at(datetime(2022, 6, 22, tzinfo=timezone.utc)) == 86400 * 2
+
+    # Other networks need the reference
+    genesis.write_text(json.dumps(dict(json.loads(genesis.read_text()), networkMagic=42)))
+    with pytest.raises(ValueError, match="reference"):
+        kes.KESClock.from_genesis(genesis)
+    start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    clock = kes.KESClock.from_genesis(genesis, reference=(1000, start))
+    assert clock.slot_at(start + timedelta(seconds=10)) == 1010
+
+
+def test_planner(tmp_path, monkeypatch):
+    monkeypatch.setenv("CARDANO_NODE_SOCKET_PATH", "")
+    binary = tmp_path / "cardano-cli"
+    binary.write_text(FAKE_CLI)
+    binary.chmod(0o755)
+    cli = cli_tools.NodeCLI(binary, str(tmp_path / "node.socket"), tmp_path)
+
+    clock = kes.KESClock()
+    current = clock.period()
+    pools = {}
+    for name, start in (("fresh", current), ("expiring", current - 55), ("expired", current - 70)):
+        folder = tmp_path / name
+        folder.mkdir()
+        write_cert(folder / f"{name}.cert", 1, start)
+        (folder / "cold.counter").write_text("2")
+        pools[name] = {
+            "cert": folder / f"{name}.cert",
+            "cold_skey": folder / "cold.skey",
+            "cold_counter": folder / "cold.counter",
+        }
+    pools["missing"] = dict(pools["fresh"], cert=tmp_path / "missing.cert")
+    planner = kes.KESPlanner(clock, pools)
+
+    report = planner.report()
+    assert report["fresh"]["periods_left"] == 62 and report["fresh"]["days_left"] > 90
+    assert report["expiring"]["periods_left"] == 7
+    assert report["expired"]["periods_left"] == -8 and report["expired"]["days_left"] < 0
+    assert "error" in report["missing"]
+    # The unreadable certificate is not due, it is reported as an error by rotate
+    assert planner.due(timedelta(days=14)) == ["expiring", "expired"]
+
+    results, errors = planner.rotate(cli, names=["expiring", "expired"])
+    assert not errors
+    for name in ("expiring", "expired"):
+        assert results[name]["kes_period"] == current and results[name]["counter"] == 2
+        assert (tmp_path / name / f"{name}_kes.skey").exists()
+    assert planner.due(timedelta(days=14)) == []
+
+    results, errors = planner.rotate(cli)
+    assert results == {} and list(errors) == ["missing"]
@@ -0,0 +1,219 @@
+import decimal
+import hashlib
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from fractions import Fraction
+
+import pytest
+
+from cardano_tools import cli_tools, leadership
+from cardano_tools.utils import vrf
+
+SCHEDULE = """
+     SlotNo                          UTC Time
+-------------------------------------------------------------
+     4073     2021-12-29 17:26:54.998001755 UTC
+     3955     2021-12-29 17:24:56 UTC
+"""
+
+# A stand-in for cardano-cli answering the version and leadership schedule queries
+FAKE_CLI = f"""#!{sys.executable}
+import sys
+if sys.argv[1] == "--version":
+    print("cardano-cli 1.32.1 - linux-x86_64 - ghc-8.10")
+elif "--current" in sys.argv:
+    print('''{SCHEDULE}''')
+else:
+    print("Leadership schedule for the next epoch is not available yet", file=sys.stderr)
+"""
+
+
+class FakeCLI:
+    def __init__(self, epoch=300, delay=0.2):
+        self.epoch = epoch
+        self.delay = delay
+        self.calls = []
+        self.fail_next = False
+
+    def get_epoch(self):
+        return self.epoch
+
+    def get_leadership_schedule(self, genesis, vrf_key, pool_id, current_epoch, next_epoch):
+        self.calls.append("current" if current_epoch else "next")
+        time.sleep(self.delay)
+        if next_epoch and self.fail_next:
+            raise cli_tools.NodeCLIError("Too early")
+        slot = 1000 * (self.epoch + (1 if next_epoch else 0))
+        return f'[{{"slotNumber": {slot}, "slotTime": "2022-10-25T21:44:51Z"}}]'
+
+
+def test_parse_leadership_schedule():
+    slots = leadership.parse_leadership_schedule(SCHEDULE)
+    assert [s.slot for s in slots] == [3955, 4073]
+    assert slots[1].time == datetime(2021, 12, 29, 17, 26, 54, 998001, tzinfo=timezone.utc)
+    assert leadership.parse_leadership_schedule(SCHEDULE.split("---")[0]) == []
+    slots = leadership.parse_leadership_schedule(
+        '[{"slotNumber": 7, "slotTime": "2022-10-25T21:44:51.5Z"}]'
+    )
+    assert slots == [
+        leadership.LeaderSlot(7, datetime(2022, 10, 25, 21, 44, 51, 500000, timezone.utc))
+    ]
+
+
+def test_node_cli_leader_slots(tmp_path, monkeypatch):
+    # NodeCLI sets the socket path in the environment, restore it afterwards
+    monkeypatch.setenv("CARDANO_NODE_SOCKET_PATH", "")
+    binary = tmp_path / "cardano-cli"
+    binary.write_text(FAKE_CLI)
+    binary.chmod(0o755)
+    cli = cli_tools.NodeCLI(binary, str(tmp_path / "node.socket"), tmp_path)
+    with pytest.raises(cli_tools.NodeCLIError, match="Must set"):
+        cli.get_leadership_schedule("genesis.json", "vrf.skey", "pool")
+    with pytest.raises(cli_tools.NodeCLIError, match="Must set"):
+        cli.get_leadership_schedule("genesis.json", "vrf.skey", "pool", True, True)
+    slots = cli.get_leader_slots("genesis.json", "vrf.skey", "pool", current_epoch=True)
+    assert [s.slot for s in slots] == [3955, 4073]
+    with pytest.raises(cli_tools.NodeCLIError, match="not available yet"):
+        cli.get_leader_slots("genesis.json", "vrf.skey", "pool", next_epoch=True)
+
+
+def test_schedule_background_and_cache(tmp_path):
+    cli = FakeCLI()
+    schedule = leadership.LeadershipSchedule(cli, "genesis.json", "vrf.skey", "pool1", tmp_path)
+    start = time.monotonic()
+    futures = schedule.prefetch()
+    # Both epochs are computed concurrently and concurrent requests share the computation
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(schedule.get())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert futures["next"].result()[0].slot == 301_000
+    assert time.monotonic() - start < 0.35
+    assert sorted(cli.calls) == ["current", "next"]
+    assert all(r[0].slot == 300_000 for r in results)
+    assert (tmp_path / "pool1-300.json").exists() and (tmp_path / "pool1-301.json").exists()
+
+    # After the epoch boundary the next epoch's schedule is the current one, from the cache
+    cli.epoch = 301
+    schedule = leadership.LeadershipSchedule(cli, "genesis.json", "vrf.skey", "pool1", tmp_path)
+    assert schedule.get("current")[0].slot == 301_000
+    assert len(cli.calls) == 2
+    schedule.close()
+
+
+def test_schedule_failure_is_retried(tmp_path):
+    cli = FakeCLI(delay=0)
+    cli.fail_next = True
+    schedule = leadership.LeadershipSchedule(cli, "genesis.json", "vrf.skey", "pool1", tmp_path)
+    with pytest.raises(cli_tools.NodeCLIError):
+        schedule.get("next")
+    cli.fail_next = False
+    assert schedule.get("next")[0].slot == 301_000
+    assert cli.calls == ["next", "next"]
+    # Not cached if the epoch changed while computing
+    cli.get_leadership_schedule = lambda *args, **kwargs: setattr(cli, "epoch", 302) or "[]"
+    assert schedule.get("current") == []
+    assert not (tmp_path / "pool1-300.json").exists()
+
+
+def test_leader_threshold():
+    assert leadership.leader_threshold(1, 0.05) / 2**256 == pytest.approx(0.05)
+    assert leadership.leader_threshold("0.001", 0.05) / 2**256 == pytest.approx(
+        1 - 0.95**0.001, rel=1e-12
+    )
+    assert leadership.leader_threshold(0, 0.05) == 0
+    assert leadership.leader_threshold(0.5, 1) == 2**256
+    # Floats are taken by their decimal value, like the rationals of the genesis file
+    assert leadership.leader_threshold(1, 0.05) == leadership.leader_threshold(1, Fraction(1, 20))
+    assert leadership.leader_threshold(0.001, 0.05) == leadership.leader_threshold("0.001", "0.05")
+
+
+def test_compute_leader_slots(tmp_path):
+    seed = bytes.fromhex("9d61b19deffd5a60ba844af492ec2cc44449c5697b326919703bac031cae7f60")
+    secret_key = seed + vrf.public_key(seed)
+    skey = tmp_path / "vrf.skey"
+    skey.write_text(
+        json.dumps({"type": "VrfSigningKey_PraosVRF", "cborHex": "5840" + secret_key.hex()})
+    )
+    assert leadership.read_vrf_skey(skey) == secret_key
+    skey.write_text(json.dumps({"cborHex": "5840" + seed.hex() * 2}))
+    with pytest.raises(ValueError):
+        leadership.read_vrf_skey(skey)
+
+    nonce = "1a3be38bcbb7911969283716ad7aa550250226b76a61fc51cc9a9a35d9276d81"
+    clock = leadership.slot_clock(*leadership.MAINNET_SHELLEY_START)
+    slots = leadership.compute_leader_slots(
+        secret_key,
+        nonce,
+        1,
+        4492800,
+        epoch_length=200,
+        active_slot_coeff=0.5,
+        slot_time=clock,
+        processes=2,
+        chunk_size=50,
+    )
+    assert 60 < len(slots) < 140
+    assert slots[0].time == datetime(2020, 7, 29, 21, 44, 51, tzinfo=timezone.utc) + timedelta(
+        seconds=slots[0].slot - 4492800
+    )
+    # Each leader slot has a valid VRF proof whose output is below the threshold
+    threshold = leadership.leader_threshold(1, 0.5)
+    pk = secret_key[32:]
+    led = {s.slot for s in slots}
+    for slot in range(4492800, 4492800 + 20):
+        alpha = leadership.leader_vrf_input(slot, bytes.fromhex(nonce))
+        beta = vrf.verify(pk, vrf.prove(secret_key, alpha), alpha)
+        assert (leadership.leader_value(beta) < threshold) == (slot in led)
+
+    praos, tpraos = [
+        leadership.compute_leader_slots(
+            secret_key, nonce, 1, 0, epoch_length=20, active_slot_coeff=0.5, tpraos=t, processes=1
+        )
+        for t in (False, True)
+    ]
+    assert praos and tpraos and praos != tpraos
+    assert len(leadership.compute_leader_slots(secret_key, nonce, 1, 0, 10, 1, processes=1)) == 10
+
+    # The leader check, derived independently from the ledger and consensus definitions:
+    # the VRF input is blake2b-256(slot || epoch nonce), XORed with seedL = blake2b-256 of the
+    # 64-bit number 1 in TPraos. The leader value is the whole 512-bit VRF output in TPraos and
+    # blake2b-256("L" || output) in Praos. A slot is led if, with p = value / 2^bits,
+    # 1 / (1 - p) < exp(-sigma * ln(1 - f)) (cardano-ledger's checkLeaderNatValue).
+    sigma, f = Fraction(1, 4), Fraction(1, 2)
+    seed_l = hashlib.blake2b((1).to_bytes(8, "big"), digest_size=32).digest()
+    with decimal.localcontext() as ctx:
+        ctx.prec = 200
+        ln_1_f = (1 - decimal.Decimal(f.numerator) / f.denominator).ln()
+        bound = (-(decimal.Decimal(sigma.numerator) / sigma.denominator) * ln_1_f).exp()
+        for tpraos in (False, True):
+            bits = 512 if tpraos else 256
+            led = {
+                s.slot
+                for s in leadership.compute_leader_slots(
+                    secret_key, nonce, sigma, 4492800, 60, f, tpraos=tpraos, processes=1
+                )
+            }
+            for slot in range(4492800, 4492860):
+                alpha = hashlib.blake2b(
+                    slot.to_bytes(8, "big") + bytes.fromhex(nonce), digest_size=32
+                ).digest()
+                if tpraos:
+                    alpha = bytes(a ^ b for a, b in zip(alpha, seed_l))
+                assert leadership.leader_vrf_input(slot, bytes.fromhex(nonce), tpraos) == alpha
+                beta = vrf.verify(pk, vrf.prove(secret_key, alpha), alpha)
+                if tpraos:
+                    value = int.from_bytes(beta, "big")
+                else:
+                    value = int.from_bytes(
+                        hashlib.blake2b(b"L" + beta, digest_size=32).digest(), "big"
+                    )
+                assert leadership.leader_value(beta, tpraos) == value
+                recip_q = decimal.Decimal(1 << bits) / decimal.Decimal((1 << bits) - value)
+                assert (slot in led) == (recip_q < bound)
+            assert 0 < len(led) < 60
@@ -0,0 +1,78 @@
+import fcntl
+
+import pytest
+
+from cardano_tools import node_db, node_tools
+
+
+@pytest.fixture
+def source(tmp_path):
+    db = tmp_path / "source"
+    (db / "immutable").mkdir(parents=True)
+    for chunk in range(3):
+        for ext in ("chunk", "primary", "secondary"):
+            (db / "immutable" / f"{chunk:05d}.{ext}").write_bytes(bytes([chunk]) * 100)
+    (db / "ledger").mkdir()
+    (db / "ledger" / "4492799").write_bytes(b"ledger" * 10)
+    (db / "volatile").mkdir()
+    (db / "volatile" / "blocks-0.dat").write_bytes(b"block" * 10)
+    (db / "protocolMagicId").write_text("764824073")
+    (db / "clean").write_text("")
+    (db / "lock").write_text("")
+    return db
+
+
+def test_clone_hardlink(source, tmp_path):
+    counts = node_db.clone_database(source, tmp_path / "clone", method="hardlink")
+    # The two completed chunks are linked, the newest chunk and the rest are copied
+    assert counts["linked"] == 6 and counts["copied"] == 7 and counts["reflinked"] == 0
+    clone = tmp_path / "clone"
+    assert (clone / "immutable" / "00000.chunk").samefile(source / "immutable" / "00000.chunk")
+    assert not (clone / "immutable" / "00002.chunk").samefile(source / "immutable" / "00002.chunk")
+    assert not (clone / "volatile" / "blocks-0.dat").samefile(source / "volatile" / "blocks-0.dat")
+    assert (clone / "ledger" / "4492799").read_bytes() == b"ledger" * 10
+    assert not (clone / "lock").exists()
+
+
+def test_clone_unclean_source_is_not_linked(source, tmp_path):
+    (source / "clean").unlink()
+    counts = node_db.clone_database(source, tmp_path / "clone", method="hardlink")
+    assert counts["linked"] == 0 and counts["copied"] == 12
+    clone = tmp_path / "clone"
+    assert not (clone / "immutable" / "00000.chunk").samefile(source / "immutable" / "00000.chunk")
+
+
+def test_clone_auto_and_copy(source, tmp_path):
+    counts = node_db.clone_database(source, tmp_path / "auto")
+    assert counts["reflinked"] + counts["linked"] + counts["copied"] == 13
+    counts = node_db.clone_database(source, tmp_path / "copy", method="copy")
+    assert counts["copied"] == 13 and counts["bytes_copied"] == 9 * 100 + 60 + 50 + 9
+    with pytest.raises(ValueError):
+        node_db.clone_database(source, tmp_path / "other", method="rsync")
+
+
+def test_clone_checks(source, tmp_path):
+    with pytest.raises(node_db.DatabaseCloneError, match="not empty"):
+        node_db.clone_database(source, source)
+    with pytest.raises(node_db.DatabaseCloneError, match="not a cardano-node database"):
+        node_db.clone_database(tmp_path, tmp_path / "clone")
+    with open(source / "lock") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        assert node_db.database_in_use(source)
+        with pytest.raises(node_db.DatabaseCloneError, match="in use"):
+            node_db.clone_database(source, tmp_path / "clone")
+    assert not node_db.database_in_use(source)
+
+    node_db.clone_database(source, tmp_path / "clone", method="copy")
+    (tmp_path / "clone" / "ledger" / "4492799").write_bytes(b"truncated")
+    with pytest.raises(node_db.DatabaseCloneError, match="differs in size"):
+        node_db.validate_clone(source, tmp_path / "clone")
+
+
+def test_node_clone_database(source, tmp_path):
+    node = node_tools.CardanoNode(
+        "cardano-node", "topology.json", tmp_path / "new", "node.socket", "config.json"
+    )
+    counts = node.clone_database(source, method="hardlink")
+    assert counts["linked"] == 6
+    assert (tmp_path / "new" / "protocolMagicId").read_text() == "764824073"
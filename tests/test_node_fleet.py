@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from cardano_tools import node_fleet
+from test_node_tools import FAKE_NODE
+
+
+@pytest.fixture
+def fleet(tmp_path):
+    binary = tmp_path / "cardano-node"
+    binary.write_text(FAKE_NODE)
+    binary.chmod(0o755)
+    fleet = node_fleet.NodeFleet(
+        [
+            {"name": "relay-1"},
+            {"name": "relay-2", "port": 3001},
+            {"name": "bp", "mode": "pool", "kes_key": "kes", "vrf_key": "vrf", "cert": "cert"},
+        ],
+        base_dir=tmp_path / "nodes",
+        defaults={
+            "binary": binary,
+            "topology": tmp_path / "topology.json",
+            "config": tmp_path / "config.json",
+        },
+        base_port=3001,
+    )
+    yield fleet
+    for node in fleet.nodes.values():
+        if node.is_running():
+            node.process.kill()
+            node.process.wait()
+
+
+def test_spec_validation(tmp_path):
+    with pytest.raises(ValueError):
+        node_fleet.NodeFleet([{"name": "a"}, {"name": "a"}], tmp_path)
+    with pytest.raises(ValueError):
+        node_fleet.NodeFleet([{"name": "bp", "mode": "pool"}], tmp_path)
+
+
+def test_fleet(fleet, tmp_path):
+    ports = {name: node.port for name, node in fleet.nodes.items()}
+    assert ports["relay-2"] == 3001 and len(set(ports.values())) == 3
+    assert fleet.nodes["bp"].socket_path == tmp_path / "nodes" / "bp" / "node.socket"
+    assert fleet.relays == ["relay-1", "relay-2"] and fleet.producers == ["bp"]
+
+    fleet.start()
+    assert all(s["ready"] for s in fleet.status().values())
+
+    # At least one relay stays up during the rolling restart
+    relays = [fleet.nodes[name] for name in fleet.relays]
+    down = []
+    done = threading.Event()
+
+    def monitor():
+        while not done.is_set():
+            if not any(node.is_ready() for node in relays):
+                down.append(True)
+            done.wait(0.01)
+
+    thread = threading.Thread(target=monitor)
+    thread.start()
+    fleet.restart(stagger=0)
+    done.set()
+    thread.join()
+    assert not down
+    for name, node in fleet.nodes.items():
+        assert (node.db_path / "runs").read_text() == "2"
+
+    # Not restarting a relay while the other one is down
+    fleet.nodes["relay-2"].stop(timeout=5)
+    with pytest.raises(node_fleet.CardanoNodeError):
+        fleet.restart(["relay-1"], stagger=0)
+
+    codes = fleet.stop()
+    assert list(codes) == ["bp", "relay-1", "relay-2"]
+    assert codes["bp"] == 0 and codes["relay-1"] == 0
+    assert not any(s["running"] for s in fleet.status().values())
@@ -0,0 +1,56 @@
+import os
+import time
+
+import pytest
+
+from cardano_tools import node_resources
+
+TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def write_proc(proc, utime, rss, read_bytes):
+    pid_dir = proc / "42"
+    (pid_dir / "fd").mkdir(parents=True, exist_ok=True)
+    # Fields after the command name: state, ppid, ..., utime (12th), stime, ..., threads (18th)
+    fields = ["S"] + ["0"] * 10 + [str(utime), "0"] + ["0"] * 4 + ["7"] + ["0"] * 30
+    (pid_dir / "stat").write_text(f"42 (cardano node) {' '.join(fields)}\n")
+    (pid_dir / "status").write_text(f"Name:\tcardano-node\nVmHWM:\t 9000 kB\nVmRSS:\t {rss} kB\n")
+    (pid_dir / "io").write_text(f"rchar: 1\nread_bytes: {read_bytes}\nwrite_bytes: 0\n")
+    for fd in range(3):
+        (pid_dir / "fd" / str(fd)).touch()
+
+
+def test_sample(tmp_path):
+    sampler = node_resources.ProcessSampler(window=2, proc=str(tmp_path))
+    sampler.pid = 42
+    assert sampler.sample() is None
+
+    write_proc(tmp_path, utime=0, rss=1000, read_bytes=0)
+    first = sampler.sample()
+    assert first.cpu_percent is None and first.read_rate is None
+    assert first.rss == 1000 * 1024 and first.peak_rss == 9000 * 1024
+    assert first.threads == 7 and first.open_files == 3
+
+    time.sleep(0.1)
+    write_proc(tmp_path, utime=TICKS, rss=2000, read_bytes=1_000_000)
+    second = sampler.sample()
+    elapsed = 1 / (second.cpu_percent / 100)  # one second of CPU time
+    assert 0.1 <= elapsed < 1
+    assert second.read_rate == pytest.approx(1_000_000 / elapsed)
+
+    sampler.sample()
+    stats = sampler.stats()
+    # The window holds the last two samples
+    assert stats["rss"]["count"] == 2 and stats["rss"]["max"] == 2000 * 1024
+    assert stats["cpu_percent"]["count"] == 2
+    assert stats["peak_rss"] == 9000 * 1024 and stats["last"]["rss"] == 2000 * 1024
+
+
+def test_sampler_thread():
+    sampler = node_resources.ProcessSampler(interval=0.05).start(os.getpid())
+    time.sleep(0.3)
+    sampler.stop()
+    samples = sampler.samples()
+    assert len(samples) >= 3
+    assert samples[-1].rss > 0 and samples[-1].threads >= 2
+    assert samples[-1].cpu_percent is not None
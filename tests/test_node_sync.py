@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+from cardano_tools import node_sync
+
+
+class FakeTip:
+    """A node that starts answering after `startup` seconds and then syncs 50% per second."""
+
+    def __init__(self, startup=0.05):
+        self.start = time.monotonic()
+        self.startup = startup
+        self.queries = 0
+
+    def __call__(self):
+        self.queries += 1
+        elapsed = time.monotonic() - self.start
+        if elapsed < self.startup:
+            raise RuntimeError("Network.Socket.connect: does not exist")
+        progress = min(100.0, 80.0 + 50 * (elapsed - self.startup))
+        return {"slot": int(progress * 1000), "epoch": 300, "syncProgress": f"{progress:.2f}"}
+
+
+def test_wait_until_synced():
+    tip = FakeTip()
+    tracker = node_sync.NodeSyncTracker(tip, min_interval=0.02, max_interval=0.1)
+    assert tracker.status()["slot"] is None
+    statuses = []
+    assert tracker.wait_until_synced(99.0, timeout=5, callback=statuses.append)
+    status = statuses[-1]
+    assert status["progress"] >= 99.0 and status["epoch"] == 300
+    # 50% per second is 50,000 slots per second
+    assert 40_000 < status["slot_rate"] < 60_000
+    etas = [s["eta"] for s in statuses if s["eta"] is not None]
+    assert etas and all(eta < 1 for eta in etas)
+    # The polls are spaced out rather than looping on the tip query
+    assert tip.queries < 30
+
+
+def test_wait_timeout():
+    tracker = node_sync.NodeSyncTracker(
+        lambda: {"slot": 1, "syncProgress": "50.00"}, min_interval=0.01, max_interval=0.05
+    )
+    start = time.monotonic()
+    assert not tracker.wait_until_synced(timeout=0.2)
+    assert time.monotonic() - start < 0.5
+    assert tracker.status()["eta"] is None and tracker.status()["slot_rate"] == 0
+
+
+def test_wait_async():
+    tracker = node_sync.NodeSyncTracker(FakeTip(0), min_interval=0.02, max_interval=0.1)
+    assert asyncio.run(tracker.wait_until_synced_async(99.0, timeout=5))
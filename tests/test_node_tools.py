@@ -1,8 +1,222 @@
-import pytest
+import json
 import os
+import socket
+import sys
+import time
+
+import pytest
+
+from cardano_tools import node_metrics, node_resources, node_tools
+
+# A stand-in for the cardano-node binary: opens the node socket after a short delay and runs
+# until interrupted, serving Prometheus metrics if the configuration enables them.
+# FAKE_NODE_CRASH_AFTER makes the first run exit with an error, and FAKE_NODE_IGNORE_SIGINT
+# makes it ignore SIGINT.
+FAKE_NODE = f"""#!{sys.executable}
+import http.server, json, os, signal, socket, sys, threading, time
+args = sys.argv[2:]
+opts = dict(zip(args[::2], args[1::2]))
+config = json.load(open(opts["--config"])) if os.path.exists(opts["--config"]) else {{}}
+if "hasPrometheus" in config:
+    class Metrics(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            slot = 1000 + int((time.time() - start) * 20)
+            body = (
+                "# TYPE cardano_node_metrics_slotNum_int gauge\\n"
+                f"cardano_node_metrics_slotNum_int {{slot}}\\n"
+                "cardano_node_metrics_blockNum_int 50\\n"
+                "cardano_node_metrics_density_real 4.8e-2\\n"
+                "cardano_node_metrics_mempoolBytes_int 1234\\n"
+                "cardano_node_metrics_connectedPeers_int 7\\n"
+            ).encode()
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(body)
+        def log_message(self, *args):
+            pass
+    server = http.server.HTTPServer(tuple(config["hasPrometheus"]), Metrics)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+start = time.time()
+os.makedirs(opts["--database-path"], exist_ok=True)
+runs_file = os.path.join(opts["--database-path"], "runs")
+runs = int(open(runs_file).read()) if os.path.exists(runs_file) else 0
+open(runs_file, "w").write(str(runs + 1))
+if os.path.exists(opts["--socket-path"]):
+    os.unlink(opts["--socket-path"])
+time.sleep(0.2)
+sock = socket.socket(socket.AF_UNIX)
+sock.bind(opts["--socket-path"])
+sock.listen()
+for msg in [
+    {{"ns": ["cardano.node.ChainDB"], "sev": "Notice",
+      "data": {{"kind": "TraceAddBlockEvent.AddedToCurrentChain", "newtip": "ab12@1000"}}}},
+    {{"ns": "Forge.Loop.NodeIsLeader", "sev": "Info", "data": {{"kind": "NodeIsLeader", "slot": 1001}}}},
+]:
+    print(json.dumps(dict(msg, at="2022-10-25T00:00:00Z")), flush=True)
+print("Not a JSON line", flush=True)
+if os.environ.get("FAKE_NODE_IGNORE_SIGINT"):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+else:
+    signal.signal(signal.SIGINT, lambda *_: sys.exit(0))
+crash_after = float(os.environ.get("FAKE_NODE_CRASH_AFTER", 0))
+while True:
+    if crash_after and runs == 0 and time.time() - start > crash_after:
+        os._exit(3)
+    time.sleep(0.05)
+"""
+
+
+def make_node(tmp_path, database_path, **kwargs):
+    binary = tmp_path / "cardano-node"
+    binary.write_text(FAKE_NODE)
+    binary.chmod(0o755)
+    return node_tools.CardanoNode(
+        binary=binary,
+        topology=tmp_path / "topology.json",
+        database_path=database_path,
+        socket_path=tmp_path / "node.socket",
+        config=tmp_path / "config.json",
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def node(tmp_path):
+    (tmp_path / "db").mkdir()
+    node = make_node(tmp_path, tmp_path / "db")
+    yield node
+    if node.is_running():
+        node.process.kill()
+        node.process.wait()
+
+
+def test_start_stop(node):
+    node.start()
+    assert node.is_running()
+    node.wait_until_ready(timeout=10, pause=0.05)
+    assert node.socket_ready()
+    with pytest.raises(node_tools.CardanoNodeError):
+        node.wait_until_ready(timeout=0.2, sync_progress=lambda: 42.0, pause=0.05)
+    node.wait_until_ready(timeout=1, sync_progress=lambda: 100.0, pause=0.05)
+    assert node.stop(timeout=5) == 0
+    assert not node.is_running()
+
+
+def test_stop_escalates(node, monkeypatch):
+    monkeypatch.setenv("FAKE_NODE_IGNORE_SIGINT", "1")
+    node.start()
+    node.wait_until_ready(timeout=10, pause=0.05)
+    start = time.monotonic()
+    assert node.stop(timeout=0.5) == -15  # SIGTERM
+    assert time.monotonic() - start < 5
+
+
+def test_supervisor_restarts(node, monkeypatch):
+    monkeypatch.setenv("FAKE_NODE_CRASH_AFTER", "0.5")
+    supervisor = node_tools.NodeSupervisor(node, backoff_initial=0.2, poll_interval=0.05)
+    supervisor.start()
+    assert supervisor.wait_ready(timeout=10)
+    time.sleep(1.0)
+    # The first run crashed and the node was restarted
+    assert supervisor.exit_codes == [3]
+    assert supervisor.restarts == 1
+    assert supervisor.wait_ready(timeout=10)
+    assert supervisor.stop(timeout=5) == 0
+    assert not supervisor.ready.is_set()
+    with open(os.path.join(node.db_path, "runs")) as f:
+        assert f.read() == "2"
+
+
+def test_supervisor_spaces_sync_queries(node):
+    calls = []
+
+    def sync_progress():
+        calls.append(time.monotonic())
+        return min(100.0, 50.0 + 50 * (calls[-1] - calls[0]))
+
+    supervisor = node_tools.NodeSupervisor(
+        node, sync_progress=sync_progress, poll_interval=0.01, sync_max_interval=0.5
+    )
+    supervisor.start()
+    assert supervisor.wait_ready(timeout=10)
+    supervisor.stop(timeout=5)
+    # About a second of syncing: polling every poll_interval would query 100 times
+    assert 3 <= len(calls) < 20
+    assert calls[-1] - calls[0] >= 0.9
+
+
+def test_log_stream(node):
+    node.logs = node_tools.NodeLogStream(buffer_size=2)
+    leaders = []
+    node.logs.subscribe(leaders.append, kinds=["leader"])
+    node.start()
+    node.wait_until_ready(timeout=10, pause=0.05)
+    node.stop(timeout=5)
+    node.logs.join(timeout=5)
+    assert [e.slot for e in leaders] == [1001]
+    # The ring buffer keeps the last two lines
+    events = node.logs.events()
+    assert [e.kind for e in events] == ["leader", "text"]
+    assert events[0].namespace == "Forge.Loop.NodeIsLeader"
+    assert events[1].raw == "Not a JSON line"
+
+    event = node_tools.NodeLogStream.parse(
+        '{"ns": ["cardano.node.ChainDB"], "data": {"kind": "TraceAddBlockEvent.AddedToCurrentChain",'
+        ' "newtip": "ab12@1000"}, "sev": "Notice", "at": "2022-10-25T00:00:00Z"}'
+    )
+    assert event.kind == "chain_extended" and event.slot == 1000
+    assert event.namespace == "cardano.node.ChainDB" and event.severity == "Notice"
+
+
+def test_metrics(tmp_path):
+    (tmp_path / "config.json").write_text(json.dumps({"ShelleyGenesisFile": "shelley.json"}))
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    # A fresh node: its database directory does not exist yet
+    db_path = tmp_path / "fresh" / "db"
+    node = make_node(tmp_path, db_path, prometheus_port=port, metrics_max_age=0.2)
+    assert node.metrics.summary() == dict.fromkeys(node_metrics.GAUGES)
+    try:
+        node.start()
+        node.wait_until_ready(timeout=10, pause=0.05)
+        # The configuration is written to a run directory, not into the chain database
+        assert not (db_path / "prometheus-config.json").exists()
+        config = json.loads((node.run_dir / "prometheus-config.json").read_text())
+        assert config["hasPrometheus"] == ["127.0.0.1", port]
+        assert config["ShelleyGenesisFile"] == str(tmp_path / "shelley.json")
+
+        summary = node.metrics.summary()
+        assert summary["block"] == 50 and summary["peers"] == 7
+        assert summary["mempool_bytes"] == 1234
+        assert summary["density"] == pytest.approx(0.048) and summary["epoch"] is None
+        # Cached until max_age has passed
+        slot = node.metrics.slot
+        time.sleep(0.1)
+        assert node.metrics.slot == slot
+        time.sleep(0.2)
+        assert node.metrics.slot > slot
+    finally:
+        node.stop(timeout=5)
+
 
-from cardano_tools import node_tools
+def test_resources(node):
+    node.resources = node_resources.ProcessSampler(interval=0.05)
+    node.start()
+    node.wait_until_ready(timeout=10, pause=0.05)
+    time.sleep(0.2)
+    node.stop(timeout=5)
+    samples = node.resources.samples()
+    assert samples and all(s.rss > 0 for s in samples)
+    assert not node.resources._thread.is_alive()
 
 
-def test_stub():
-    pass
+def test_parse_prometheus():
+    metrics = node_metrics.parse_prometheus(
+        "# HELP x\n"
+        "cardano_node_metrics_slotNum_int 12 1666656000000\n"
+        'rts_gc{kind="major"} 3\n'
+        "\n"
+        "bad_value abc\n"
+    )
+    assert metrics == {"cardano_node_metrics_slotNum_int": 12.0, 'rts_gc{kind="major"}': 3.0}
@@ -0,0 +1,55 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cardano_tools.rate_limit import RequestLimiter, TokenBucket
+from cardano_tools.testing import StandInWalletServer
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=50, burst=5)
+    start = time.monotonic()
+    for _ in range(15):
+        bucket.acquire()
+    # 5 tokens from the burst, the other 10 at 50 per second
+    assert 0.18 < time.monotonic() - start < 0.5
+
+
+def test_classify():
+    url = "http://localhost:8090/v2/wallets/abc"
+    assert RequestLimiter.classify("GET", f"{url}/transactions") == "read"
+    assert RequestLimiter.classify("POST", f"{url}/transactions-construct") == "construct"
+    assert RequestLimiter.classify("POST", f"{url}/payment-fees") == "construct"
+    assert RequestLimiter.classify("POST", f"{url}/transactions-submit") == "submit"
+    assert RequestLimiter.classify("POST", f"{url}/transactions") == "submit"
+    assert RequestLimiter.classify("DELETE", url) == "submit"
+
+
+def test_limited_client():
+    limiter = RequestLimiter(read={"concurrency": 2}, submit={"rate": 20, "burst": 1})
+    with StandInWalletServer(n_wallets=4, latency=0.05) as server:
+        http_api = server.client(limiter=limiter)
+        wallet_ids = server.wallet_ids()
+        in_flight = []
+        lock = threading.Lock()
+
+        def read(wallet_id):
+            with lock:
+                in_flight.append(limiter.metrics()["read"]["in_flight"])
+            return http_api.get_wallet(wallet_id)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            assert all(executor.map(read, wallet_ids * 4))
+        metrics = limiter.metrics()
+        assert max(in_flight) <= 2
+        assert metrics["read"]["requests"] == 16
+        assert metrics["read"]["in_flight"] == 0 and metrics["read"]["waiting"] == 0
+        # 16 requests of 50 ms, two at a time: most of them had to queue
+        assert metrics["read"]["queue_time"]["max"] > 0.2
+
+        start = time.monotonic()
+        for i in range(6):
+            http_api.rename_wallet(wallet_ids[0], f"Renamed{i}")
+        assert time.monotonic() - start > 0.25
+        assert limiter.metrics()["submit"]["requests"] == 6
+        assert limiter.metrics()["construct"]["requests"] == 0
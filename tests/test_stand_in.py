@@ -0,0 +1,71 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cardano_tools.testing import StandInWalletServer, run_load_test
+
+
+@pytest.fixture(scope="module")
+def stand_in():
+    with StandInWalletServer(n_wallets=5, n_transactions=20, n_assets=3, n_pools=10) as server:
+        yield server
+
+
+@pytest.fixture
+def http_api(stand_in):
+    return stand_in.client()
+
+
+def test_wallets(http_api):
+    wallets = http_api.get_all_wallets()
+    assert len(wallets) == 5
+    wallet = http_api.get_wallet(wallets[0]["id"])
+    assert wallet["name"] == wallets[0]["name"]
+    assert wallet["state"]["status"] == "ready"
+    assert http_api.get_wallet_by_name(wallets[1]["name"])["id"] == wallets[1]["id"]
+    assert http_api.get_wallet("00" * 20) == {}
+
+
+def test_wallet_data(http_api):
+    wallet_id = http_api.get_all_wallets()[0]["id"]
+    assert len(http_api.get_transactions(wallet_id)) == 20
+    assets = http_api.get_assets(wallet_id)
+    assert len(assets) == 3
+    asset = http_api.get_asset(wallet_id, assets[0]["policy_id"], assets[0]["asset_name"])
+    assert asset["policy_id"] == assets[0]["policy_id"]
+    addresses = http_api.get_addresses(wallet_id)
+    assert addresses[0].startswith("addr_test1")
+    assert http_api.get_utxo_stats(wallet_id)["distribution"]
+    snapshot = http_api.get_utxo_snapshot(wallet_id)["entries"]
+    utxos = http_api.get_utxo_columns(wallet_id, chunk_size=100)
+    assert list(utxos.lovelace) == [e["ada"]["quantity"] for e in snapshot]
+    assert utxos.distribution() == http_api.get_utxo_stats(wallet_id)["distribution"]
+
+
+def test_stake_pools(http_api):
+    pools = http_api.list_stake_pools(1_000_000_000)
+    assert len(pools) == 10
+    rewards = [p["metrics"]["non_myopic_member_rewards"]["quantity"] for p in pools]
+    assert rewards == sorted(rewards, reverse=True)
+
+
+def test_error_injection():
+    with StandInWalletServer(n_wallets=1, error_rate=1.0) as server:
+        assert server.client().get_all_wallets() == {}
+
+
+def test_load_test(http_api):
+    result = run_load_test(http_api, n_requests=50, concurrency=4)
+    assert result["requests"] == 50
+    assert result["errors"] == 0
+    assert result["latency"]["p50"] <= result["latency"]["p99"]
+    assert sum(op["count"] for op in result["operations"].values()) == 50
+
+
+def test_request_counts_under_concurrency():
+    with StandInWalletServer(n_wallets=1) as server:
+        http_api = server.client()
+        wallet_id = server.wallet_ids()[0]
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(lambda _: http_api.get_wallet(wallet_id), range(400)))
+        assert server.request_counts["get_wallet"] == 400
@@ -1,3 +1,6 @@
+import json
+from datetime import datetime
+
 import pytest
 from cardano_tools import utils
 
@@ -35,3 +38,143 @@ def test_bad_bech32(bad_test_vectors):
     assert (None, None) == utils.bech32_decode(bad_test_vectors[1])
     assert (None, None) == utils.bech32_decode(bad_test_vectors[2])
     assert (None, None) == utils.bech32_decode(bad_test_vectors[3])
+
+
+def test_estimate_output_size(test_vectors):
+    ada_only = {"address": test_vectors[0], "amount": {"quantity": 1_000_000, "unit": "lovelace"}}
+    # 1 (output) + 2 + 57 (address) + 5 (coin)
+    assert utils.estimate_output_size(ada_only) == 65
+
+    policy_id = "65ab82542b0ca20391caaf66a4d4d7897d281f9c136cd3513136945b"
+    with_assets = dict(
+        ada_only,
+        assets=[
+            {"policy_id": policy_id, "asset_name": "4e4654303031", "quantity": 1},
+            {"policy_id": policy_id, "asset_name": "4e4654303032", "quantity": 1},
+        ],
+    )
+    # 65 + 1 (value) + 1 (multi-asset map) + 31 (policy) + 2 * 8 (assets)
+    assert utils.estimate_output_size(with_assets) == 114
+
+
+def test_pack_payments(test_vectors):
+    payment = {"address": test_vectors[0], "amount": {"quantity": 1_000_000, "unit": "lovelace"}}
+    batches = utils.pack_payments([payment] * 10, 200)
+    assert batches == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+    assert utils.pack_payments([payment], 10) == [[0]]
+    assert utils.pack_payments([], 200) == []
+
+
+def test_json_codec():
+    data = b'{"entries": [{"ada": {"quantity": 1, "unit": "lovelace"}}]}'
+    expected = {"entries": [{"ada": {"quantity": 1, "unit": "lovelace"}}]}
+    assert utils.json_codec.loads(data) == expected
+    assert utils.json_codec.loads(data.decode()) == expected
+    for backend in utils.json_codec.BACKENDS:
+        try:
+            utils.json_codec.set_backend(backend)
+        except ImportError:
+            continue
+        assert utils.json_codec.loads(data) == expected
+    utils.json_codec.set_backend()
+    with pytest.raises(ValueError):
+        utils.json_codec.set_backend("pickle")
+
+
+def test_log_text():
+    assert str(utils.LogText("short")) == "short"
+    assert str(utils.LogText(b"short")) == "short"
+    assert str(utils.LogText("x" * 100, limit=10)) == "xxxxxxxxxx... (100 total)"
+    payload = {"id": "ab" * 32, "status": "pending"}
+    assert json.loads(str(utils.LogText(payload))) == payload
+    assert str(utils.LogText([1, 2, 3], limit=4)) == "[1, ... (9 total)"
+    assert "%s" % utils.LogText({"time": datetime(2022, 1, 1)}) == '{"time": "2022-01-01 00:00:00"}'
+
+
+def test_utxo_columns():
+    snapshot = {
+        "entries": [
+            {
+                "ada": {"quantity": quantity, "unit": "lovelace"},
+                "ada_minimum": {"quantity": 999_978, "unit": "lovelace"},
+                "assets": [{"policy_id": "ab" * 28, "asset_name": "", "quantity": 1}] * n_assets,
+            }
+            for quantity, n_assets in [(10, 0), (1_000_000, 2), (1_000_001, 0), (3_000_000, 1)]
+        ]
+    }
+    text = json.dumps(snapshot, indent=2).encode()
+    # Chunk boundaries fall anywhere, including inside entries
+    chunks = [text[i : i + 7] for i in range(0, len(text), 7)]
+    utxos = utils.UtxoColumns.from_chunks(chunks)
+    assert list(utxos.lovelace) == list(utils.UtxoColumns.from_json(text).lovelace)
+    assert len(utxos) == 4
+    summary = utxos.summary()
+    assert summary["total_lovelace"] == 5_000_011
+    assert summary["min_ada_overhead"] == 4 * 999_978
+    assert summary["token_utxo_count"] == 2
+    assert summary["dust_count"] == 2
+    assert summary["distribution"]["10"] == 1
+    assert summary["distribution"]["1000000"] == 1
+    assert summary["distribution"]["10000000"] == 2
+    assert (
+        utils.UtxoColumns.from_json('{"entries": [{"ada": {"quantity": 5}}]}').fragmentation() == 0
+    )
+    assert 0.5 < summary["fragmentation"] < 0.75
+    assert len(utils.UtxoColumns.from_json('{"entries": []}')) == 0
+
+    # A truncated or malformed body is an error, not a partial snapshot
+    for body in (text[: len(text) // 2], text[:-3], text.replace(b"999978", b"999x78"), b""):
+        with pytest.raises(ValueError):
+            utils.UtxoColumns.from_chunks([body[i : i + 7] for i in range(0, len(body), 7)])
+
+
+def test_vrf():
+    # ECVRF-ED25519-SHA512-Elligator2 test vectors of draft-irtf-cfrg-vrf-03
+    vrf = utils.vrf
+    sk = bytes.fromhex("9d61b19deffd5a60ba844af492ec2cc44449c5697b326919703bac031cae7f60")
+    pk = vrf.public_key(sk)
+    assert pk.hex() == "d75a980182b10ab7d54bfed3c964073a0ee172f3daa62325af021a68f707511a"
+    proof = vrf.prove(sk, b"")
+    assert proof.hex() == (
+        "b6b4699f87d56126c9117a7da55bd0085246f4c56dbc95d20172612e9d38e8d7"
+        "ca65e573a126ed88d4e30a46f80a666854d675cf3ba81de0de043c3774f06156"
+        "0f55edc256a787afe701677c0f602900"
+    )
+    beta = (
+        "5b49b554d05c0cd5a5325376b3387de59d924fd1e13ded44648ab33c21349a60"
+        "3f25b84ec5ed887995b33da5e3bfcb87cd2f64521c4c62cf825cffabbe5d31cc"
+    )
+    assert vrf.proof_to_hash(proof).hex() == beta
+    assert vrf.verify(pk, proof, b"").hex() == beta
+    assert vrf.output(sk + pk, b"").hex() == beta
+    assert vrf.verify(pk, proof, b"\x00") is None
+    assert vrf.verify(pk, proof[:40] + bytes([proof[40] ^ 1]) + proof[41:], b"") is None
+
+    sk = bytes.fromhex("4ccd089b28ff96da9db6c346ec114e0f5b8a319f35aba624da8cf6ed4fb8a6fb")
+    pk = vrf.public_key(sk)
+    assert pk.hex() == "3d4017c3e843895a92b70aa74d1b7ebc9c982ccf2ec4968cc0cd55f12af4660c"
+    proof = vrf.prove(sk, b"\x72")
+    assert vrf.verify(pk, proof, b"\x72").hex() == (
+        "94f4487e1b2fec954309ef1289ecb2e15043a2461ecc7b2ae7d4470607ef82eb"
+        "1cfa97d84991fe4a7bfdfd715606bc27e2967a6c557cfb5875879b671740b7d8"
+    )
+
+
+def test_summarize():
+    stats = utils.summarize([3.0, 1.0, 2.0, 4.0])
+    assert stats["count"] == 4 and stats["mean"] == 2.5 and stats["max"] == 4.0
+    assert stats["p50"] == 2.0
+
+
+def test_progress_estimator():
+    estimator = utils.progress.ProgressEstimator(min_interval=1.0, max_interval=60.0)
+    estimator.add(50.0, 1000, now=0.0)
+    assert estimator.eta() is None and estimator.interval == 2.0
+    estimator.add(60.0, 2000, now=10.0)
+    assert estimator.rates() == (1.0, 100.0)
+    assert estimator.eta() == 40.0 and estimator.time_to(70.0) == 10.0
+    assert estimator.interval == 10.0
+    estimator.backoff()
+    assert estimator.interval == 20.0
+    estimator.add(100.0, 6000, now=50.0)
+    assert estimator.eta() == 0.0 and estimator.interval == 60.0
@@ -0,0 +1,86 @@
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cardano_tools.testing import StandInWalletServer
+from cardano_tools.wallet_balancer import BalancedWalletHTTP
+
+
+@pytest.fixture
+def replicas():
+    servers = [StandInWalletServer(n_wallets=6, latency=0.01).start() for _ in range(3)]
+    yield servers
+    for server in servers:
+        server.stop()
+
+
+def test_reads_are_spread(replicas):
+    cw_http = BalancedWalletHTTP([f"{s.url}:{s.port}" for s in replicas])
+    wallet_ids = replicas[0].wallet_ids()
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        assert all(executor.map(cw_http.get_wallet, wallet_ids * 10))
+    counts = [s.request_counts["get_wallet"] for s in replicas]
+    assert sum(counts) == 60
+    assert min(counts) >= 10
+
+
+def test_writes_are_pinned(replicas):
+    cw_http = BalancedWalletHTTP([f"{s.url}:{s.port}" for s in replicas])
+    wallet_ids = replicas[0].wallet_ids()
+    for wallet_id in wallet_ids:
+        for i in range(3):
+            assert cw_http.rename_wallet(wallet_id, f"Renamed{i}")
+    owners = set()
+    for wallet_id in wallet_ids:
+        names = [s._wallets[wallet_id]["name"] for s in replicas]
+        assert names.count("Renamed2") == 1
+        assert sum(name.startswith("Wallet") for name in names) == 2
+        owners.add(names.index("Renamed2"))
+    # Different wallets are pinned to different replicas
+    assert len(owners) > 1
+
+
+def test_failover(replicas):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        dead_port = sock.getsockname()[1]
+    urls = [f"http://127.0.0.1:{dead_port}"] + [f"{s.url}:{s.port}" for s in replicas[:1]]
+    cw_http = BalancedWalletHTTP(urls, down_time=60)
+    wallet_id = replicas[0].wallet_ids()[0]
+    for _ in range(5):
+        assert cw_http.get_wallet(wallet_id)["id"] == wallet_id
+        assert cw_http.rename_wallet(wallet_id, "Moved")
+    metrics = cw_http.metrics()
+    assert metrics[0]["healthy"] is False and metrics[0]["failures"] == 1
+    assert cw_http.check_health() == {urls[0] + "/": False, urls[1] + "/": True}
+    assert [c.get_wallet(wallet_id) != {} for c in cw_http.replica_clients()[1:]] == [True]
+
+
+def test_reads_of_submitted_transactions_are_pinned(replicas):
+    cw_http = BalancedWalletHTTP([f"{s.url}:{s.port}" for s in replicas])
+    wallet_id = replicas[0].wallet_ids()[0]
+    address = cw_http.get_addresses(wallet_id)[0]
+    payload = {
+        "payments": [{"address": address, "amount": {"quantity": 1_000_000, "unit": "lovelace"}}]
+    }
+    tx = cw_http.construct_transaction(wallet_id, payload)
+    signed = cw_http.sign_transaction(wallet_id, "passphrase", tx["transaction"])
+    tx_id = cw_http.submit_transaction(wallet_id, signed["transaction"])["id"]
+    # Only the replica that accepted the transaction knows it, and every read is sent there
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        results = list(executor.map(lambda _: cw_http.get_transaction(wallet_id, tx_id), range(12)))
+    assert all(result.get("id") == tx_id for result in results)
+    assert sorted(s.request_counts["get_transaction"] for s in replicas) == [0, 0, 12]
+
+
+def test_replica_clients_parse_urls():
+    cw_http = BalancedWalletHTTP(
+        ["http://wallet-1:8090", "https://wallets.example.com/replica-2", "http://[::1]:8091/"]
+    )
+    clients = cw_http.replica_clients()
+    assert [c.wallet_url for c in clients] == [
+        "http://wallet-1:8090/",
+        "https://wallets.example.com/replica-2/",
+        "http://[::1]:8091/",
+    ]
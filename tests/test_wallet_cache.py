@@ -0,0 +1,145 @@
+import threading
+import time
+
+import pytest
+
+from cardano_tools import StakePoolCache, WalletResponseCache
+from cardano_tools.testing import StandInWalletServer
+
+
+def test_lru_eviction():
+    cache = WalletResponseCache(max_bytes=10)
+    cache.put("w1", "a", b"1234")
+    cache.put("w1", "b", b"5678")
+    assert cache.get("w1", "a") == b"1234"  # "a" is now most recently used
+    cache.put("w2", "c", b"90ab")
+    assert cache.get("w1", "b") is None
+    assert cache.get("w1", "a") == b"1234"
+    assert cache.size == 8 and cache.evictions == 1
+    cache.put("w2", "d", b"x" * 11)  # Larger than the budget
+    assert cache.get("w2", "d") is None
+
+
+def test_tip_invalidation():
+    cache = WalletResponseCache()
+    assert cache.tip_is_stale("w1")
+    cache.update_tip("w1", 100)
+    assert not cache.tip_is_stale("w1")
+    cache.put("w1", "a", b"1")
+    cache.put("w2", "a", b"2")
+    cache.update_tip("w1", 100)
+    assert cache.get("w1", "a") == b"1"
+    cache.update_tip("w1", 120)
+    assert cache.get("w1", "a") is None
+    assert cache.get("w2", "a") == b"2"
+
+
+def test_stale_put_is_refused():
+    cache = WalletResponseCache()
+    cache.update_tip("w1", 100)
+    # Responses requested before the tip moved (or the cache was cleared) are not stored
+    generation = cache.generation("w1")
+    other = cache.generation("w2")
+    cache.update_tip("w1", 120)
+    cache.put("w1", "a", b"1", generation)
+    cache.put("w2", "a", b"2", other)
+    assert cache.get("w1", "a") is None
+    assert cache.get("w2", "a") == b"2"
+    cache.put("w1", "a", b"1", cache.generation("w1"))
+    assert cache.get("w1", "a") == b"1"
+    generation = cache.generation("w2")
+    cache.invalidate()
+    cache.put("w2", "a", b"2", generation)
+    assert cache.get("w2", "a") is None
+
+
+def test_wallet_http_cache():
+    with StandInWalletServer(n_wallets=2, n_assets=5) as server:
+        cache = WalletResponseCache(tip_ttl=60)
+        http_api = server.client(cache=cache)
+        wallet_id = server.wallet_ids()[0]
+        assets = http_api.get_assets(wallet_id)
+        for _ in range(5):
+            assert http_api.get_assets(wallet_id) == assets
+            assert len(http_api.get_addresses(wallet_id)) == 50
+            asset = http_api.get_asset(wallet_id, assets[0]["policy_id"], assets[0]["asset_name"])
+            assert asset["asset_name"] == assets[0]["asset_name"]
+        assert server.request_counts["list_assets"] == 1
+        assert server.request_counts["list_addresses"] == 1
+        assert server.request_counts["get_asset"] == 1
+        assert server.request_counts["get_wallet"] == 1
+
+        # A new block invalidates the wallet's entries once the tip is checked
+        server.advance_tip()
+        http_api.get_wallet(wallet_id)
+        http_api.get_assets(wallet_id)
+        assert server.request_counts["list_assets"] == 2
+
+        # Cached results are independent copies
+        http_api.get_assets(wallet_id).clear()
+        assert http_api.get_assets(wallet_id) == assets
+
+        http_api.delete_wallet(wallet_id)
+        assert http_api.get_assets(wallet_id) == {}
+
+
+def test_stake_pool_cache():
+    with StandInWalletServer(n_wallets=0, n_pools=50) as server:
+        http_api = server.client()
+        pools = StakePoolCache(http_api, epoch_check_interval=0)
+
+        # On the grid, the ranking is the wallet's
+        ranked = pools.list_stake_pools(1_000_000_000)
+        assert len(ranked) == 50
+        for stake in (1_200_000_000, 1_500_000_000, 1_700_000_000):
+            pools.list_stake_pools(stake)
+        assert pools._grid(1_500_000_000) == (1_000_000_000, 1_778_279_410)
+        assert server.request_counts["list_stake_pools"] == 2
+        assert ranked == http_api.list_stake_pools(1_000_000_000)
+
+        # Between grid points, the pools are re-ranked for the requested stake: pools close to
+        # saturation drop as the stake grows
+        stake = 5_000_000_000_000
+        low, high = pools._grid(stake)
+        reranked = [p["id"] for p in pools.list_stake_pools(stake)]
+        direct = [p["id"] for p in http_api.list_stake_pools(stake)]
+        assert reranked != [p["id"] for p in http_api.list_stake_pools(low)]
+        assert reranked[:5] == direct[:5]
+        assert sum(a == b for a, b in zip(reranked, direct)) >= 45
+
+        # Filters and lookups are served from the index
+        filtered = pools.list_stake_pools(
+            2_000_000_000, max_saturation=0.5, max_margin=5.0, min_pledge=10**12, limit=5
+        )
+        assert len(filtered) <= 5
+        for pool in filtered:
+            assert pool["metrics"]["saturation"] <= 0.5
+            assert pool["margin"]["quantity"] <= 5.0
+            assert pool["pledge"]["quantity"] >= 10**12
+        assert len(pools.filter_pools(max_cost=170_000_000)) < 50
+        top = ranked[0]
+        assert pools.get_pool(top["id"])["id"] == top["id"]
+
+        # Another grid interval and a new epoch both require fetches
+        count = server.request_counts["list_stake_pools"]
+        pools.list_stake_pools(50_000_000_000)
+        assert server.request_counts["list_stake_pools"] == count + 2
+        server.advance_tip(432000)
+        pools.list_stake_pools(1_000_000_000)
+        assert server.request_counts["list_stake_pools"] == count + 3
+
+
+def test_stake_pool_cache_fetch_does_not_block_lookups():
+    with StandInWalletServer(n_wallets=0, n_pools=10) as server:
+        http_api = server.client()
+        pools = StakePoolCache(http_api)
+        top = pools.list_stake_pools(1_000_000_000)[0]
+        server.latency = 0.5
+        fetch = threading.Thread(target=pools.list_stake_pools, args=(10**13,))
+        fetch.start()
+        time.sleep(0.1)
+        start = time.monotonic()
+        assert pools.get_pool(top["id"])["id"] == top["id"]
+        assert pools.filter_pools()
+        assert time.monotonic() - start < 0.2
+        fetch.join()
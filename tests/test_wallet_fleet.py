@@ -0,0 +1,80 @@
+import pytest
+
+from cardano_tools import WalletFleet
+from cardano_tools.testing import StandInWalletServer
+
+
+class StubWallet:
+    """Minimal stand-in for WalletHTTP returning canned wallet server data."""
+
+    def __init__(self, n_wallets):
+        self.wallets = [
+            {
+                "id": f"{i:040x}",
+                "name": f"Wallet{i}",
+                "balance": {
+                    "total": {"quantity": 5_000_000, "unit": "lovelace"},
+                    "available": {"quantity": 4_000_000, "unit": "lovelace"},
+                    "reward": {"quantity": 1_000_000, "unit": "lovelace"},
+                },
+                "assets": {
+                    "total": [{"policy_id": "aa" * 28, "asset_name": "4e4654", "quantity": i}],
+                    "available": [],
+                },
+                "state": {"status": "ready"} if i else {"status": "syncing"},
+            }
+            for i in range(n_wallets)
+        ]
+
+    def get_all_wallets(self):
+        return self.wallets
+
+    def get_utxo_stats(self, wallet_id):
+        if wallet_id == self.wallets[-1]["id"]:
+            raise ConnectionError("wallet server unavailable")
+        return {"distribution": {"100000": 2, "1000000": 1, "10000000": 3}}
+
+
+def test_snapshot():
+    snapshot = WalletFleet(StubWallet(10), max_workers=4).snapshot()
+    assert len(snapshot["wallets"]) == 10
+    assert snapshot["total_lovelace"] == 50_000_000
+    assert snapshot["available_lovelace"] == 40_000_000
+    assert snapshot["tokens"] == {"aa" * 28: {"4e4654": sum(range(10))}}
+    assert snapshot["utxo_count"] == 9 * 6
+    assert snapshot["dust_count"] == 9 * 3
+    assert snapshot["not_ready"] == [f"{0:040x}"]
+    assert list(snapshot["errors"]) == [f"{9:040x}"]
+    assert snapshot["wallets"][f"{9:040x}"]["utxo_count"] is None
+
+
+def test_map_reports_failures():
+    fleet = WalletFleet(StubWallet(1))
+    results, errors = fleet.map(lambda w: {} if w == "b" else w.upper(), ["a", "b"])
+    assert results == {"a": "A"}
+    assert list(errors) == ["b"]
+
+
+def test_provision():
+    specs = [
+        {"name": f"New{i}", "recovery_phrase": [f"word{i}"] * 24, "passphrase": "secret123"}
+        for i in range(8)
+    ]
+    specs.append({"name": "FromKey", "xpub_key": "ab" * 64})
+    specs.append(dict(specs[0], name="Duplicate"))
+    with StandInWalletServer(n_wallets=0, restore_time=0.3) as server:
+        fleet = WalletFleet(server.client(), max_workers=4)
+        records = []
+        results = fleet.provision(specs, timeout=10, pause=0.1, progress=records.append)
+    assert sorted(r["completed"] for r in records) == list(range(1, 11))
+    assert [r["status"] for r in results] == ["ready"] * 9 + ["failed"]
+    assert results[-1]["error"] and results[-1]["wallet_id"] is None
+    assert len({r["wallet_id"] for r in results[:-1]}) == 9
+
+
+def test_wait_until_ready_timeout():
+    with StandInWalletServer(n_wallets=0, restore_time=60) as server:
+        fleet = WalletFleet(server.client())
+        created = fleet.provision([{"name": "Slow", "xpub_key": "cd" * 64}], timeout=0.2, pause=0.1)
+    assert created[0]["status"] == "syncing"
+    assert created[0]["error"]
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from cardano_tools.testing import StandInWalletServer
+from cardano_tools.wallet_migration import WalletMigration
+
+
+@pytest.fixture
+def stand_in():
+    with StandInWalletServer(n_wallets=2, n_utxos=200) as server:
+        yield server
+
+
+def test_migration(stand_in, tmp_path):
+    http_api = stand_in.client()
+    wallet_id, dest_id = stand_in.wallet_ids()
+    dest = http_api.get_addresses(dest_id)[:2]
+    checkpoint = tmp_path / "migration.json"
+    records = []
+    migration = WalletMigration(
+        http_api, wallet_id, dest, "passphrase", str(checkpoint), chunk_size=4
+    )
+    plan = http_api.create_migration_plan(wallet_id, dest)
+    result = migration.run(progress=records.append)
+    assert result["status"] == "complete"
+    # Every transaction spent exactly the inputs of a selection of the original plan, without
+    # change, so the migration took exactly as many transactions as planned
+    assert len(result["transactions"]) == len(plan["selections"])
+    planned = {frozenset((i["id"], i["index"]) for i in s["inputs"]) for s in plan["selections"]}
+    for tx in result["transactions"]:
+        if tx["method"] == "chunk":
+            spent = http_api.get_transaction(wallet_id, tx["tx_id"])
+            assert frozenset((i["id"], i["index"]) for i in spent["inputs"]) in planned
+            assert len(spent["outputs"]) == 1
+    methods = {tx["method"] for tx in result["transactions"]}
+    assert methods == {"chunk", "sweep"}
+    assert [r["completed"] for r in records] == list(range(1, len(records) + 1))
+    assert records[-1]["remaining"] == 0
+    assert json.loads(checkpoint.read_text()) == result
+    assert not http_api.create_migration_plan(wallet_id, dest)
+
+    # Running a completed migration again does nothing
+    again = WalletMigration(http_api, wallet_id, dest, "passphrase", str(checkpoint)).run()
+    assert again["transactions"] == result["transactions"]
+
+
+def test_migration_resume(stand_in, tmp_path):
+    http_api = stand_in.client()
+    wallet_id, dest_id = stand_in.wallet_ids()
+    dest = http_api.get_addresses(dest_id)[:1]
+    checkpoint = str(tmp_path / "migration.json")
+
+    def crash(record):
+        if record["completed"] == 3:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        WalletMigration(http_api, wallet_id, dest, "passphrase", checkpoint).run(progress=crash)
+    # The transactions of the chunk in flight still complete and are recorded
+    with open(checkpoint) as f:
+        recorded = len(json.load(f)["transactions"])
+    assert recorded >= 3
+
+    result = WalletMigration(http_api, wallet_id, dest, "passphrase", checkpoint).run()
+    assert result["status"] == "complete"
+    tx_ids = [tx["tx_id"] for tx in result["transactions"]]
+    assert len(tx_ids) > recorded and len(set(tx_ids)) == len(tx_ids)
+
+    with pytest.raises(ValueError):
+        WalletMigration(http_api, dest_id, dest, "passphrase", checkpoint)
+
+
+def test_migration_to_byron_address(stand_in, tmp_path):
+    http_api = stand_in.client()
+    wallet_id, _ = stand_in.wallet_ids()
+    dest = ["Ae2tdPwUPEZFRbyhz3cpfC2CumGzNkFBN2L42rcUc2yjQpEkxDbkPodpMAi"]
+    plan = http_api.create_migration_plan(wallet_id, dest)
+    assert len(plan["selections"]) > 4
+    result = WalletMigration(
+        http_api, wallet_id, dest, "passphrase", str(tmp_path / "m.json")
+    ).run()
+    # Nothing was submitted as a chunk: the whole plan went to the migration endpoint
+    assert result["status"] == "complete"
+    assert {tx["method"] for tx in result["transactions"]} == {"sweep"}
+    assert len(result["transactions"]) == len(plan["selections"])
+    assert stand_in.request_counts["submit_tx"] == 0
@@ -0,0 +1,111 @@
+import pytest
+
+from cardano_tools.testing import StandInWalletServer
+from cardano_tools.wallet_pipeline import TransactionPipeline
+from cardano_tools.wallet_tools import WalletHTTP
+
+
+@pytest.fixture
+def stand_in():
+    with StandInWalletServer(n_wallets=3, n_utxos=200, latency=0.002) as server:
+        yield server
+
+
+def payment(address, quantity=1_000_000):
+    return {
+        "payments": [{"address": address, "amount": {"quantity": quantity, "unit": "lovelace"}}]
+    }
+
+
+def test_pipeline(stand_in):
+    http_api = stand_in.client()
+    wallet_ids = stand_in.wallet_ids()
+    address = http_api.get_addresses(wallet_ids[0])[0]
+    futures = []
+    with TransactionPipeline(http_api, queue_size=4, backoff=0.01) as pipeline:
+        for i in range(30):
+            wallet_id = wallet_ids[i % 3]
+            futures.append((wallet_id, pipeline.add(wallet_id, payment(address), "passphrase")))
+    results = [(wallet_id, future.result(timeout=10)) for wallet_id, future in futures]
+    assert all(r["status"] == "submitted" for _, r in results)
+    assert len({r["tx_id"] for _, r in results}) == 30
+
+    # Each wallet's transactions were submitted in the order they were added
+    for wallet_id in wallet_ids:
+        submitted = [r["tx_id"] for w, r in results if w == wallet_id]
+        history = [tx["id"] for tx in http_api.get_transactions(wallet_id)]
+        assert history[: len(submitted)] == submitted[::-1]
+
+    metrics = pipeline.metrics()
+    assert metrics["submitted"] == 30 and metrics["failed"] == 0
+    for stage in ("construct", "sign", "submit", "total"):
+        assert metrics[stage]["count"] >= 30
+        assert metrics[stage]["p50"] <= metrics[stage]["max"]
+
+
+def test_pipeline_failures(stand_in):
+    http_api = stand_in.client()
+    wallet_id = stand_in.wallet_ids()[0]
+    address = http_api.get_addresses(wallet_id)[0]
+    with TransactionPipeline(http_api, retries=1, backoff=0.01) as pipeline:
+        too_much = pipeline.add(wallet_id, payment(address, 10**18), "passphrase")
+        fine = pipeline.add(wallet_id, payment(address), "passphrase")
+    # Insufficient funds (403) is permanent and not retried
+    result = too_much.result(timeout=10)
+    assert result["status"] == "failed"
+    assert result["stage"] == "construct"
+    assert result["attempts"] == 1
+    assert "403" in result["error"]
+    assert fine.result(timeout=10)["status"] == "submitted"
+    assert pipeline.metrics()["retried"] == 0
+
+
+def test_pipeline_retries_server_errors():
+    with StandInWalletServer(n_wallets=1, n_utxos=200) as server:
+        http_api = server.client()
+        wallet_id = server.wallet_ids()[0]
+        address = http_api.get_addresses(wallet_id)[0]
+        server.error_rate = 0.2  # 503 responses
+        with TransactionPipeline(http_api, retries=8, backoff=0.001) as pipeline:
+            futures = [pipeline.add(wallet_id, payment(address), "passphrase") for _ in range(20)]
+        results = [f.result(timeout=10) for f in futures]
+    assert all(r["status"] == "submitted" for r in results)
+    assert pipeline.metrics()["retried"] > 0
+
+
+class FailingWallet(WalletHTTP):
+    """Raises an unexpected error when signing one transaction."""
+
+    def sign_transaction(self, wallet_id, passphrase, tx):
+        if passphrase == "boom":
+            raise RuntimeError("signer crashed")
+        return super().sign_transaction(wallet_id, passphrase, tx)
+
+
+def test_pipeline_worker_exception(stand_in):
+    http_api = FailingWallet(stand_in.url, stand_in.port)
+    wallet_id = stand_in.wallet_ids()[0]
+    address = http_api.get_addresses(wallet_id)[0]
+    with TransactionPipeline(http_api, sign_workers=1, submit_workers=1) as pipeline:
+        futures = [
+            pipeline.add(wallet_id, payment(address), "boom" if i == 1 else "passphrase")
+            for i in range(4)
+        ]
+    with pytest.raises(RuntimeError, match="signer crashed"):
+        futures[1].result(timeout=10)
+    # The workers survived and the later transactions of the wallet were still submitted
+    assert [f.result(timeout=10)["status"] for i, f in enumerate(futures) if i != 1] == [
+        "submitted"
+    ] * 3
+    metrics = pipeline.metrics()
+    assert metrics["submitted"] == 3 and metrics["failed"] == 1
+
+
+def test_pipeline_latency_window(stand_in):
+    http_api = stand_in.client()
+    wallet_id = stand_in.wallet_ids()[0]
+    address = http_api.get_addresses(wallet_id)[0]
+    with TransactionPipeline(http_api, latency_window=5) as pipeline:
+        futures = [pipeline.add(wallet_id, payment(address), "passphrase") for _ in range(10)]
+    assert all(f.result(timeout=10)["status"] == "submitted" for f in futures)
+    assert pipeline.metrics()["total"]["count"] == 5
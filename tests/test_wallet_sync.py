@@ -0,0 +1,38 @@
+import asyncio
+
+from cardano_tools.testing import StandInWalletServer
+from cardano_tools.wallet_sync import WalletSyncWaiter
+
+
+def test_sync_waiter():
+    with StandInWalletServer(n_wallets=0, restore_time=1.0) as server:
+        http_api = server.client()
+        wallet_ids = [
+            http_api.create_wallet_from_key(f"W{i}", f"{i:02x}" * 64).get("id") for i in range(3)
+        ]
+        statuses = []
+        waiter = WalletSyncWaiter(http_api, wallet_ids + ["00" * 20], min_interval=0.05)
+        result = waiter.wait(timeout=0.5, callback=statuses.append)
+        assert result["00" * 20] == "missing"
+        assert set(result[w] for w in wallet_ids) == {"syncing"}
+        assert 0 < statuses[-1]["progress"][wallet_ids[0]] < 100
+        # A missing wallet has no ETA
+        assert statuses[-1]["eta"] is None
+
+        waiter = WalletSyncWaiter(http_api, wallet_ids, min_interval=0.05, max_interval=0.5)
+        server.request_counts.clear()
+        result = waiter.wait(timeout=5, callback=statuses.append)
+        assert set(result.values()) == {"ready"}
+        etas = [s["eta"] for s in statuses[-4:-1] if s["eta"] is not None]
+        assert etas and all(0 < eta < 1.5 for eta in etas)
+        # Polling adapts to the ETA instead of checking every min_interval
+        assert server.request_counts["get_wallet"] < 3 * 20
+
+
+def test_sync_waiter_async():
+    with StandInWalletServer(n_wallets=10) as server:
+        waiter = WalletSyncWaiter(server.client(), server.wallet_ids(), listing_threshold=5)
+        result = asyncio.run(waiter.wait_async(timeout=5))
+        assert set(result.values()) == {"ready"}
+        assert server.request_counts["list_wallets"] == 1
+        assert server.request_counts["get_wallet"] == 0
@@ -6,7 +6,8 @@ import time
 import pytest
 import requests
 
-from cardano_tools import WalletCLI, WalletHTTP, wallet_tools
+from cardano_tools import WalletCLI, WalletHTTP, utils, wallet_tools
+from cardano_tools.testing import StandInWalletServer
 
 
 @pytest.fixture
@@ -452,3 +453,45 @@ class TestWalletTools:
     def test_get_latest_block_header(self, http_api):
         block_header = http_api.get_latest_block_header()
         pytest.skip(reason="This endpoint doesn't exist in the current cardano-wallet release")
+
+
+def test_send_batch_payouts():
+    # A wallet with a single UTxO, so every transaction spends the change of the one before it,
+    # and a wallet that rejects transactions of more than two payments as too big
+    with StandInWalletServer(n_wallets=1, n_utxos=1, max_tx_size=700, seed=4) as server:
+        http_api = server.client()
+        wallet_id = server.wallet_ids()[0]
+        change_address, *addresses = http_api.get_addresses(wallet_id)
+        payments = [
+            {"address": addresses[i], "amount": {"quantity": 2_000_000, "unit": "lovelace"}}
+            for i in range(12)
+        ]
+        payments.append(
+            {"address": addresses[12], "amount": {"quantity": 10**15, "unit": "lovelace"}}
+        )
+        size = utils.estimate_output_size(payments[0])
+        results = http_api.send_batch_payouts(
+            wallet_id, payments, "passphrase", max_tx_size=1000 + 4 * size, tx_overhead=1000
+        )
+
+        # Packed four payments per transaction, each batch halved after the wallet rejected it,
+        # the oversized payment alone in the last one
+        assert [results[i]["batch"] for i in range(13)] == [i // 2 for i in range(12)] + [6]
+        tx_ids = [results[2 * n]["tx_id"] for n in range(6)]
+        assert len(set(tx_ids)) == 6
+        for i in range(12):
+            assert results[i] == {"batch": i // 2, "tx_id": tx_ids[i // 2], "status": "submitted"}
+        assert results[12] == {"batch": 6, "tx_id": None, "status": "failed"}
+
+        # Batches were submitted in order, each paying its own payments
+        history = http_api.get_transactions(wallet_id)
+        assert [tx["id"] for tx in history[:6]] == tx_ids[::-1]
+        for n, tx in enumerate(history[5::-1]):
+            paid = [o["address"] for o in tx["outputs"] if o["address"] != change_address]
+            assert paid == addresses[2 * n : 2 * n + 2]
+
+        # Built one after the other, so no batch was rebuilt: besides the six transactions, three
+        # batches were rejected as too big and one for lack of funds
+        assert server.request_counts["construct_tx"] == 3 + 6 + 1
+        assert server.request_counts["sign_tx"] == 6
+        assert server.request_counts["submit_tx"] == 6